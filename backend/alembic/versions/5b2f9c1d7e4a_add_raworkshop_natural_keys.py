@@ -0,0 +1,48 @@
+"""Add RaWorkshop natural keys
+
+Revision ID: 5b2f9c1d7e4a
+Revises: 87c511a4b679
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2f9c1d7e4a'
+down_revision = '87c511a4b679'
+branch_labels = None
+depends_on = None
+
+# Table, constraint suffix and the integer RaWorkshop reference columns it carries
+NATURAL_KEY_TABLES = [
+    ('projects', 'project', []),
+    ('components', 'component', ['id_project']),
+    ('assemblies', 'assembly', ['id_project', 'id_component']),
+    ('pieces', 'piece', ['id_project', 'id_component', 'id_assembly']),
+    ('articles', 'article', ['id_project', 'id_component']),
+]
+
+
+def upgrade() -> None:
+    for table, entity, references in NATURAL_KEY_TABLES:
+        # original_id stays nullable: rows created before RaConnect sync have none
+        op.execute(f"ALTER TABLE public.{table} ADD COLUMN IF NOT EXISTS original_id integer")
+        for column in references:
+            op.execute(f"ALTER TABLE public.{table} ADD COLUMN IF NOT EXISTS {column} integer")
+            op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON public.{table} ({column})")
+        # Unique index backing INSERT ... ON CONFLICT (original_id, company_guid)
+        op.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS uq_{entity}_original_id_company "
+            f"ON public.{table} (original_id, company_guid)"
+        )
+
+
+def downgrade() -> None:
+    for table, entity, references in reversed(NATURAL_KEY_TABLES):
+        op.execute(f"DROP INDEX IF EXISTS public.uq_{entity}_original_id_company")
+        for column in references:
+            op.execute(f"DROP INDEX IF EXISTS public.ix_{table}_{column}")
+            op.execute(f"ALTER TABLE public.{table} DROP COLUMN IF EXISTS {column}")
+        op.execute(f"ALTER TABLE public.{table} DROP COLUMN IF EXISTS original_id")
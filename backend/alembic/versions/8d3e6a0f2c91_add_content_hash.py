@@ -0,0 +1,29 @@
+"""Add content_hash to synced entities
+
+Revision ID: 8d3e6a0f2c91
+Revises: 5b2f9c1d7e4a
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3e6a0f2c91'
+down_revision = '5b2f9c1d7e4a'
+branch_labels = None
+depends_on = None
+
+SYNCED_TABLES = ['projects', 'components', 'assemblies', 'pieces', 'articles']
+
+
+def upgrade() -> None:
+    # Existing rows start without a fingerprint, so their first resync rewrites them once
+    for table in SYNCED_TABLES:
+        op.execute(f"ALTER TABLE public.{table} ADD COLUMN IF NOT EXISTS content_hash varchar(64)")
+
+
+def downgrade() -> None:
+    for table in SYNCED_TABLES:
+        op.execute(f"ALTER TABLE public.{table} DROP COLUMN IF EXISTS content_hash")
@@ -0,0 +1,28 @@
+"""Add api key lookup prefix
+
+Revision ID: a8e3c5f1b972
+Revises: f5c1d9e7a248
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8e3c5f1b972'
+down_revision = 'f5c1d9e7a248'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing keys keep their bcrypt hash and a NULL prefix until they are next used
+    op.add_column('api_keys', sa.Column('key_prefix', sa.String(length=12), nullable=True))
+    op.create_index(op.f('ix_api_keys_key_prefix'), 'api_keys', ['key_prefix'], unique=False)
+
+
+def downgrade() -> None:
+    # Keys already rehashed to a keyed digest can't be turned back into bcrypt hashes
+    op.drop_index(op.f('ix_api_keys_key_prefix'), table_name='api_keys')
+    op.drop_column('api_keys', 'key_prefix')
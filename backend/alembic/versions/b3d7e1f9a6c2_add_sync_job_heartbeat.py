@@ -0,0 +1,24 @@
+"""Add sync job heartbeat
+
+Revision ID: b3d7e1f9a6c2
+Revises: a8e3c5f1b972
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d7e1f9a6c2'
+down_revision = 'a8e3c5f1b972'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('sync_jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('sync_jobs', 'heartbeat_at')
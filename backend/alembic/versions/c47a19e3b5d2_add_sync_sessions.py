@@ -0,0 +1,49 @@
+"""Add sync sessions
+
+Revision ID: c47a19e3b5d2
+Revises: 8d3e6a0f2c91
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47a19e3b5d2'
+down_revision = '8d3e6a0f2c91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('sync_sessions',
+    sa.Column('guid', sa.UUID(), nullable=False),
+    sa.Column('company_guid', sa.UUID(), nullable=False),
+    sa.Column('entity_type', sa.String(), nullable=False),
+    sa.Column('mode', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('committed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['company_guid'], ['companies.guid'], ),
+    sa.PrimaryKeyConstraint('guid')
+    )
+    op.create_index(op.f('ix_sync_sessions_company_guid'), 'sync_sessions', ['company_guid'], unique=False)
+    op.create_table('sync_session_chunks',
+    sa.Column('session_guid', sa.UUID(), nullable=False),
+    sa.Column('chunk_number', sa.Integer(), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('uploaded_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['session_guid'], ['sync_sessions.guid'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('session_guid', 'chunk_number')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sync_session_chunks')
+    op.drop_index(op.f('ix_sync_sessions_company_guid'), table_name='sync_sessions')
+    op.drop_table('sync_sessions')
@@ -0,0 +1,42 @@
+"""Add sync jobs
+
+Revision ID: e2b8f4a6c013
+Revises: c47a19e3b5d2
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b8f4a6c013'
+down_revision = 'c47a19e3b5d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('sync_jobs',
+    sa.Column('guid', sa.UUID(), nullable=False),
+    sa.Column('company_guid', sa.UUID(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('progress', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['company_guid'], ['companies.guid'], ),
+    sa.PrimaryKeyConstraint('guid')
+    )
+    op.create_index(op.f('ix_sync_jobs_company_guid'), 'sync_jobs', ['company_guid'], unique=False)
+    op.create_index(op.f('ix_sync_jobs_status'), 'sync_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_sync_jobs_status'), table_name='sync_jobs')
+    op.drop_index(op.f('ix_sync_jobs_company_guid'), table_name='sync_jobs')
+    op.drop_table('sync_jobs')
@@ -173,14 +173,15 @@ async def get_current_user_info(
     Get information about the current authenticated user.
     """
     # For API key authentication
-    if current_user.get("token_data", {}).get("auth_type") == "api_key":
+    if current_user.get("auth_type") == "api_key":
         return {
             "guid": current_user["guid"],
             "email": None,  # API keys don't have associated email
             "role": current_user["role"],
             "company_guid": current_user["company_guid"],
             "auth_type": "api_key",
-            "scopes": current_user.get("scopes", "")
+            "scopes": current_user.get("scopes", ""),
+            "api_key_guid": current_user["api_key_guid"]
         }
     
     # For regular user authentication, return user info from current_user dict
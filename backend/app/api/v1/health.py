@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.request_formats import validation_pool
 import os
 
 router = APIRouter()
@@ -26,5 +27,6 @@ async def health_check_v1(db: AsyncSession = Depends(get_db)):
         "version": "0.1.0",
         "api_version": "v1", 
         "environment": environment,
-        "database": db_status
+        "database": db_status,
+        "sync_validation_pool": validation_pool.stats()
     } 
\ No newline at end of file
@@ -1,22 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Path, Body, Header
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional, Literal, Dict, Any
+import uuid
+from functools import partial
 from pydantic import ValidationError
 
 from app.models.base import get_session
 from app.core.deps import get_current_user, CurrentUser, get_tenant_session
 from app.core.rbac import require_scopes
+from app.core.request_formats import SyncRoute, validated_body, body_openapi
 from app.schemas.sync.main import (
     ProjectBulkInsert, ComponentBulkInsert, AssemblyBulkInsert, 
-    PieceBulkInsert, ArticleBulkInsert, SyncResult
+    PieceBulkInsert, ArticleBulkInsert, SyncResult,
+    SyncSessionCreate, SyncSessionCommit, SyncSessionChunkResponse, SyncSessionResponse,
+    SyncJobCreate, SyncJobResponse
 )
 from app.services.sync_service import SyncService
+from app.services.sync_session_service import SyncSessionService
+from app.services.sync_job_service import SyncJobService
+from app.services.idempotency_service import IdempotencyService
 from app.models.enums import UserRole
 from app.core.tenant_utils import verify_tenant_access, validate_company_access
 
+SYNC_MODE_DESCRIPTION = (
+    "full: rows missing from the payload are soft deleted. "
+    "delta: only deleted_guids/deleted_original_ids are soft deleted"
+)
+
+DRY_RUN_DESCRIPTION = (
+    "Compute what the sync would change, with sample GUIDs per kind of change, "
+    "and roll it back instead of committing"
+)
+
+IDEMPOTENCY_KEY_DESCRIPTION = "Retries with the same key and body return the stored result instead of syncing again"
+
 router = APIRouter(
     prefix="/sync",
     tags=["synchronization"],
+    route_class=SyncRoute,
     responses={
         401: {"description": "Unauthorized"},
         403: {"description": "Forbidden"},
@@ -24,10 +45,16 @@ router = APIRouter(
     }
 )
 
-@router.post("/projects", response_model=SyncResult, dependencies=[Depends(require_scopes("sync:write"))])
+@router.post(
+    "/projects", response_model=SyncResult, dependencies=[Depends(require_scopes("sync:write"))],
+    openapi_extra=body_openapi(ProjectBulkInsert)
+)
 async def sync_projects(
-    data: ProjectBulkInsert,
     request: Request,
+    data: ProjectBulkInsert = Depends(validated_body(ProjectBulkInsert)),
+    mode: Literal["full", "delta"] = Query("full", description=SYNC_MODE_DESCRIPTION),
+    dry_run: bool = Query(False, description=DRY_RUN_DESCRIPTION),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255, description=IDEMPOTENCY_KEY_DESCRIPTION),
     current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_tenant_session)
 ):
@@ -35,6 +62,8 @@ async def sync_projects(
     Bulk insert or update projects from RaConnect.
     
     Requires API key with sync:write scope or SystemAdmin/CompanyAdmin/Integration role.
+    In delta mode only the sent rows are upserted and only tombstoned rows are deleted.
+    With dry_run nothing is written; the result shows what the sync would change.
     """
     # Verify all projects belong to the user's company before processing the data
     # This ensures company validation happens before other validation errors
@@ -47,14 +76,32 @@ async def sync_projects(
         )
     
     # Perform bulk upsert using service
-    result = await SyncService.sync_projects(data.projects, current_user["company_guid"], session)
+    sync = partial(
+        SyncService.sync_projects,
+        data.projects, current_user["company_guid"], session,
+        delta=mode == "delta",
+        deleted_guids=data.deleted_guids,
+        deleted_original_ids=data.deleted_original_ids,
+    )
+    if dry_run:
+        result = await SyncService.dry_run("project", session, partial(sync, commit=False))
+    else:
+        result = await IdempotencyService.run(
+            request, idempotency_key, current_user["company_guid"], session, sync
+        )
     
     return SyncResult(**result)
 
-@router.post("/components", response_model=SyncResult, dependencies=[Depends(require_scopes("sync:write"))])
+@router.post(
+    "/components", response_model=SyncResult, dependencies=[Depends(require_scopes("sync:write"))],
+    openapi_extra=body_openapi(ComponentBulkInsert)
+)
 async def sync_components(
-    data: ComponentBulkInsert,
     request: Request,
+    data: ComponentBulkInsert = Depends(validated_body(ComponentBulkInsert)),
+    mode: Literal["full", "delta"] = Query("full", description=SYNC_MODE_DESCRIPTION),
+    dry_run: bool = Query(False, description=DRY_RUN_DESCRIPTION),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255, description=IDEMPOTENCY_KEY_DESCRIPTION),
     current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_tenant_session)
 ):
@@ -62,6 +109,8 @@ async def sync_components(
     Bulk insert or update components from RaConnect.
     
     Requires API key with sync:write scope or SystemAdmin/CompanyAdmin/Integration role.
+    In delta mode only the sent rows are upserted and only tombstoned rows are deleted.
+    With dry_run nothing is written; the result shows what the sync would change.
     """
     # Verify all components belong to the user's company
     for component in data.components:
@@ -73,14 +122,32 @@ async def sync_components(
         )
     
     # Perform bulk upsert using service
-    result = await SyncService.sync_components(data.components, current_user["company_guid"], session)
+    sync = partial(
+        SyncService.sync_components,
+        data.components, current_user["company_guid"], session,
+        delta=mode == "delta",
+        deleted_guids=data.deleted_guids,
+        deleted_original_ids=data.deleted_original_ids,
+    )
+    if dry_run:
+        result = await SyncService.dry_run("component", session, partial(sync, commit=False))
+    else:
+        result = await IdempotencyService.run(
+            request, idempotency_key, current_user["company_guid"], session, sync
+        )
     
     return SyncResult(**result)
 
-@router.post("/assemblies", response_model=SyncResult, dependencies=[Depends(require_scopes("sync:write"))])
+@router.post(
+    "/assemblies", response_model=SyncResult, dependencies=[Depends(require_scopes("sync:write"))],
+    openapi_extra=body_openapi(AssemblyBulkInsert)
+)
 async def sync_assemblies(
-    data: AssemblyBulkInsert,
     request: Request,
+    data: AssemblyBulkInsert = Depends(validated_body(AssemblyBulkInsert)),
+    mode: Literal["full", "delta"] = Query("full", description=SYNC_MODE_DESCRIPTION),
+    dry_run: bool = Query(False, description=DRY_RUN_DESCRIPTION),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255, description=IDEMPOTENCY_KEY_DESCRIPTION),
     current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_tenant_session)
 ):
@@ -88,6 +155,8 @@ async def sync_assemblies(
     Bulk insert or update assemblies from RaConnect.
     
     Requires API key with sync:write scope or SystemAdmin/CompanyAdmin/Integration role.
+    In delta mode only the sent rows are upserted and only tombstoned rows are deleted.
+    With dry_run nothing is written; the result shows what the sync would change.
     """
     # Verify all assemblies belong to the user's company
     for assembly in data.assemblies:
@@ -99,14 +168,35 @@ async def sync_assemblies(
         )
     
     # Perform bulk upsert using service
-    result = await SyncService.sync_assemblies(data.assemblies, current_user["company_guid"], session)
+    sync = partial(
+        SyncService.sync_assemblies,
+        data.assemblies, current_user["company_guid"], session,
+        delta=mode == "delta",
+        deleted_guids=data.deleted_guids,
+        deleted_original_ids=data.deleted_original_ids,
+    )
+    if dry_run:
+        result = await SyncService.dry_run("assembly", session, partial(sync, commit=False))
+    else:
+        result = await IdempotencyService.run(
+            request, idempotency_key, current_user["company_guid"], session, sync
+        )
     
     return SyncResult(**result)
 
-@router.post("/pieces", response_model=SyncResult, dependencies=[Depends(require_scopes("sync:write"))])
+@router.post(
+    "/pieces", response_model=SyncResult, dependencies=[Depends(require_scopes("sync:write"))],
+    openapi_extra=body_openapi(PieceBulkInsert)
+)
 async def sync_pieces(
-    data: PieceBulkInsert,
     request: Request,
+    data: PieceBulkInsert = Depends(validated_body(PieceBulkInsert)),
+    mode: Literal["full", "delta"] = Query("full", description=SYNC_MODE_DESCRIPTION),
+    ingest: Optional[Literal["values", "copy"]] = Query(
+        None, description="Write path: multi-row VALUES or COPY into a staging table (default: by SYNC_COPY_THRESHOLD, VALUES if unset)"
+    ),
+    dry_run: bool = Query(False, description=DRY_RUN_DESCRIPTION),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255, description=IDEMPOTENCY_KEY_DESCRIPTION),
     current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_tenant_session)
 ):
@@ -114,7 +204,10 @@ async def sync_pieces(
     Bulk insert or update pieces from RaConnect.
     
     Requires API key with sync:write scope or SystemAdmin/CompanyAdmin/Integration role.
+    In delta mode only the sent rows are upserted and only tombstoned rows are deleted.
+    With dry_run nothing is written; the result shows what the sync would change.
     Maximum of 1000 pieces per request due to size.
+    If SYNC_COPY_THRESHOLD is set, batches of that many pieces or more are loaded with COPY unless ingest is given.
     """
     # Check if batch size is too large
     if len(data.pieces) > 1000:
@@ -133,14 +226,32 @@ async def sync_pieces(
         )
     
     # Perform bulk upsert using service
-    result = await SyncService.sync_pieces(data.pieces, current_user["company_guid"], session)
+    sync = partial(
+        SyncService.sync_pieces,
+        data.pieces, current_user["company_guid"], session, ingest=ingest,
+        delta=mode == "delta",
+        deleted_guids=data.deleted_guids,
+        deleted_original_ids=data.deleted_original_ids,
+    )
+    if dry_run:
+        result = await SyncService.dry_run("piece", session, partial(sync, commit=False))
+    else:
+        result = await IdempotencyService.run(
+            request, idempotency_key, current_user["company_guid"], session, sync
+        )
     
     return SyncResult(**result)
 
-@router.post("/articles", response_model=SyncResult, dependencies=[Depends(require_scopes("sync:write"))])
+@router.post(
+    "/articles", response_model=SyncResult, dependencies=[Depends(require_scopes("sync:write"))],
+    openapi_extra=body_openapi(ArticleBulkInsert)
+)
 async def sync_articles(
-    data: ArticleBulkInsert,
     request: Request,
+    data: ArticleBulkInsert = Depends(validated_body(ArticleBulkInsert)),
+    mode: Literal["full", "delta"] = Query("full", description=SYNC_MODE_DESCRIPTION),
+    dry_run: bool = Query(False, description=DRY_RUN_DESCRIPTION),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255, description=IDEMPOTENCY_KEY_DESCRIPTION),
     current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_tenant_session)
 ):
@@ -148,6 +259,8 @@ async def sync_articles(
     Bulk insert or update articles from RaConnect.
     
     Requires API key with sync:write scope or SystemAdmin/CompanyAdmin/Integration role.
+    In delta mode only the sent rows are upserted and only tombstoned rows are deleted.
+    With dry_run nothing is written; the result shows what the sync would change.
     """
     # Verify all articles belong to the user's company
     for article in data.articles:
@@ -159,6 +272,114 @@ async def sync_articles(
         )
     
     # Perform bulk upsert using service
-    result = await SyncService.sync_articles(data.articles, current_user["company_guid"], session)
+    sync = partial(
+        SyncService.sync_articles,
+        data.articles, current_user["company_guid"], session,
+        delta=mode == "delta",
+        deleted_guids=data.deleted_guids,
+        deleted_original_ids=data.deleted_original_ids,
+    )
+    if dry_run:
+        result = await SyncService.dry_run("article", session, partial(sync, commit=False))
+    else:
+        result = await IdempotencyService.run(
+            request, idempotency_key, current_user["company_guid"], session, sync
+        )
     
-    return SyncResult(**result) 
\ No newline at end of file
+    return SyncResult(**result)
+
+@router.post("/sessions", response_model=SyncSessionResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_scopes("sync:write"))])
+async def open_sync_session(
+    data: SyncSessionCreate,
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_tenant_session)
+):
+    """
+    Open a chunked sync session for one entity type.
+    
+    Upload chunks numbered from 1 with PUT /sessions/{guid}/chunks/{n}, then commit.
+    Nothing is written to the entity tables until the commit.
+    """
+    sync_session = await SyncSessionService.open_session(
+        data.entity_type, data.mode, current_user["company_guid"], session
+    )
+    return await SyncSessionService.describe_session(sync_session, session)
+
+@router.get("/sessions/{session_guid}", response_model=SyncSessionResponse, dependencies=[Depends(require_scopes("sync:write"))])
+async def get_sync_session(
+    session_guid: uuid.UUID,
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_tenant_session)
+):
+    """Get the status of a sync session and the chunks staged so far."""
+    sync_session = await SyncSessionService.get_session(session_guid, current_user["company_guid"], session)
+    return await SyncSessionService.describe_session(sync_session, session)
+
+@router.put("/sessions/{session_guid}/chunks/{chunk_number}", response_model=SyncSessionChunkResponse, dependencies=[Depends(require_scopes("sync:write"))])
+async def upload_sync_session_chunk(
+    session_guid: uuid.UUID,
+    chunk_number: int = Path(..., ge=1),
+    data: Dict[str, Any] = Body(..., description="Same body as the entity's sync endpoint"),
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_tenant_session)
+):
+    """
+    Stage one chunk of a sync session.
+    
+    Maximum of 1000 rows per chunk. Re-uploading a chunk number replaces it,
+    so failed uploads can simply be retried, and chunks may be sent in parallel.
+    """
+    return await SyncSessionService.upload_chunk(
+        session_guid, chunk_number, data, current_user["company_guid"], session
+    )
+
+@router.post("/sessions/{session_guid}/commit", response_model=SyncResult, dependencies=[Depends(require_scopes("sync:write"))])
+async def commit_sync_session(
+    session_guid: uuid.UUID,
+    data: SyncSessionCommit,
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_tenant_session)
+):
+    """
+    Apply every chunk of a sync session atomically, as if sent in one request.
+    
+    Chunks 1..chunk_count must all have been uploaded. Retrying a commit that
+    already succeeded returns the same result.
+    """
+    result = await SyncSessionService.commit_session(
+        session_guid, data.chunk_count, current_user["company_guid"], session
+    )
+    return SyncResult(**result)
+
+@router.delete("/sessions/{session_guid}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_scopes("sync:write"))])
+async def abort_sync_session(
+    session_guid: uuid.UUID,
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_tenant_session)
+):
+    """Abort an open sync session and discard its staged chunks."""
+    await SyncSessionService.abort_session(session_guid, current_user["company_guid"], session)
+
+@router.post("/jobs", response_model=SyncJobResponse, status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(require_scopes("sync:write"))])
+async def submit_sync_job(
+    data: SyncJobCreate,
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_tenant_session)
+):
+    """
+    Queue a full sync of any entity types and return immediately.
+    
+    The job runs in the background as one transaction; poll GET /jobs/{guid}
+    for progress and the result. With parallel set, independent stages run
+    concurrently and each stage commits on its own.
+    """
+    return await SyncJobService.create_job(data, current_user["company_guid"], session)
+
+@router.get("/jobs/{job_guid}", response_model=SyncJobResponse, dependencies=[Depends(require_scopes("sync:write"))])
+async def get_sync_job(
+    job_guid: uuid.UUID,
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_tenant_session)
+):
+    """Get the status, per-stage progress and result of a sync job."""
+    return await SyncJobService.get_job(job_guid, current_user["company_guid"], session)
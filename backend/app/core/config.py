@@ -11,6 +11,44 @@ class Settings(BaseModel):
     JWT_SECRET: str = os.getenv("JWT_SECRET", "change_me_in_production")
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    # Secret for the keyed digest of API keys; changing it invalidates every API key
+    API_KEY_DIGEST_SECRET: str = os.getenv("API_KEY_DIGEST_SECRET", os.getenv("JWT_SECRET", "change_me_in_production"))
+    # Verified API keys cached per worker process (0 disables the cache) and for how long
+    API_KEY_CACHE_SIZE: int = int(os.getenv("API_KEY_CACHE_SIZE", "1024"))
+    API_KEY_CACHE_TTL_SECONDS: float = float(os.getenv("API_KEY_CACHE_TTL_SECONDS", "60"))
+    # Seconds between the batched writes of API key last_used_at
+    API_KEY_LAST_USED_FLUSH_SECONDS: float = float(os.getenv("API_KEY_LAST_USED_FLUSH_SECONDS", "60"))
+    
+    # Sync
+    # Sync batches at least this large are loaded through a COPY staging table; 0 disables COPY.
+    # Off until scripts/benchmark_piece_ingest.py shows a size from which COPY is faster.
+    SYNC_COPY_THRESHOLD: int = int(os.getenv("SYNC_COPY_THRESHOLD", "0"))
+    # Hours a chunked sync session stays open for uploads and commit
+    SYNC_SESSION_TTL_HOURS: int = int(os.getenv("SYNC_SESSION_TTL_HOURS", "24"))
+    # Largest sync request body accepted after gzip/zstd decompression
+    SYNC_MAX_DECOMPRESSED_BYTES: int = int(os.getenv("SYNC_MAX_DECOMPRESSED_BYTES", str(64 * 1024 * 1024)))
+    # Processes validating sync bodies off the event loop (0 validates in-process),
+    # and the smallest body worth sending to them
+    SYNC_VALIDATION_PROCESSES: int = int(os.getenv("SYNC_VALIDATION_PROCESSES", "0"))
+    SYNC_VALIDATION_MIN_BYTES: int = int(os.getenv("SYNC_VALIDATION_MIN_BYTES", str(64 * 1024)))
+    # Concurrent syncs of one company and entity type: "wait" queues for up to the timeout, "fail" returns 409
+    SYNC_LOCK_POLICY: str = os.getenv("SYNC_LOCK_POLICY", "wait")
+    SYNC_LOCK_TIMEOUT_SECONDS: float = float(os.getenv("SYNC_LOCK_TIMEOUT_SECONDS", "30"))
+    # Hours a sync result is kept for replay under its Idempotency-Key
+    IDEMPOTENCY_KEY_TTL_HOURS: int = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+    # Background sync jobs: workers per process and running jobs allowed per company in each
+    # process (not across processes: with N processes a company may run N times as many)
+    SYNC_JOB_WORKERS: int = int(os.getenv("SYNC_JOB_WORKERS", "2"))
+    SYNC_JOB_TENANT_CONCURRENCY: int = int(os.getenv("SYNC_JOB_TENANT_CONCURRENCY", "1"))
+    # Per-company overrides, e.g. "<company_guid>=2,<company_guid>=4"
+    SYNC_JOB_TENANT_LIMITS: dict = {
+        guid.strip(): int(limit)
+        for guid, limit in (item.split("=") for item in os.getenv("SYNC_JOB_TENANT_LIMITS", "").split(",") if item.strip())
+    }
+    # Seconds between the heartbeats of a running job, and between sweeps for abandoned jobs
+    SYNC_JOB_HEARTBEAT_SECONDS: float = float(os.getenv("SYNC_JOB_HEARTBEAT_SECONDS", "30"))
+    # Running jobs without a heartbeat for this long are requeued, their worker having died
+    SYNC_JOB_STALE_SECONDS: int = int(os.getenv("SYNC_JOB_STALE_SECONDS", "300"))
     
     # Application
     API_V1_PREFIX: str = "/api/v1"
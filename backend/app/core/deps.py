@@ -8,6 +8,7 @@ from app.utils.security import decode_token
 from app.core.database import get_db
 from app.models.enums import UserRole
 from app.models.user import User
+from app.services.api_key_service import ApiKeyService
 
 # Type alias for current user data
 CurrentUser = Dict[str, Any]
@@ -64,6 +65,7 @@ async def get_current_user(
                 raise credentials_exception
                 
             # Add token payload to user object
+            user["auth_type"] = "jwt"
             user["token_data"] = payload
             
             # Important: Make sure role is correctly set from token payload
@@ -84,26 +86,31 @@ async def get_current_user(
             print(f"Auth error: {e}")
             raise credentials_exception
     
-    # Then try with API key (if implemented)
+    # Then try with API key
     elif x_api_key:
-        # Simple placeholder implementation for API key auth
-        if x_api_key == "test-integration-key":
-            user = {
-                "guid": "integration-user",
-                "email": "integration@testcompany.com",
-                "role": UserRole.INTEGRATION,
-                "company_guid": "11111111-1111-1111-1111-111111111111",
-                "token_data": {"scope": "sync:true"}
-            }
-            
-            # Set tenant in db session for RLS
-            await set_tenant_for_session(db, user["company_guid"])
-            
-            return user
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid API key",
-        )
+        # Indexed prefix lookup, answered from the per-worker cache for recently used keys
+        key_info = await ApiKeyService.validate_api_key(x_api_key, db)
+        if key_info is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid API key",
+            )
+        user = {
+            "guid": key_info["guid"],
+            "email": None,
+            "role": UserRole.INTEGRATION,
+            "company_guid": str(key_info["company_guid"]),
+            "is_active": True,
+            "auth_type": "api_key",
+            "scopes": key_info["scopes"] or "",
+            "api_key_guid": key_info["guid"],
+            "token_data": {"auth_type": "api_key", "scope": key_info["scopes"] or ""}
+        }
+        
+        # Set tenant in db session for RLS
+        await set_tenant_for_session(db, user["company_guid"])
+        
+        return user
     
     # If no authentication method provided
     raise credentials_exception
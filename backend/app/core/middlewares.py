@@ -5,10 +5,20 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi import Request, Response
 from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
 import json
 import time
+import zlib
 from typing import Dict, Any, Tuple, Optional
 
+try:
+    import zstandard
+    DECOMPRESSION_ERRORS = (zlib.error, zstandard.ZstdError)
+except ImportError:  # zstd request bodies are rejected with 415 without it
+    zstandard = None
+    DECOMPRESSION_ERRORS = (zlib.error,)
+
 from app.models.enums import UserRole
 from app.core.deps import get_current_user
 
@@ -48,6 +58,156 @@ class TenantIsolationMiddleware(BaseHTTPMiddleware):
         
         return response
 
+class _InflatedTooLarge(Exception):
+    """A request body is, or would inflate to, more than the allowed size."""
+
+class _GzipInflater:
+    """Incremental gzip decoder that never produces more than it is allowed to."""
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def inflate(self, data: bytes, limit: int) -> bytes:
+        # Output stops at limit + 1 bytes, which is enough to tell the limit was exceeded
+        return self._decompressor.decompress(data, limit + 1)
+
+    def finish(self, limit: int) -> bytes:
+        return b""
+
+    @property
+    def complete(self) -> bool:
+        return self._decompressor.eof
+
+class _BufferReader:
+    """File-like view of a buffer for read_to_iter that notes when it was read past the end."""
+    def __init__(self, data: bytearray):
+        self._data = memoryview(data)
+        self._position = 0
+        self.exhausted = False
+
+    def read(self, size: int) -> bytes:
+        chunk = bytes(self._data[self._position:self._position + size])
+        self._position += len(chunk)
+        self.exhausted = not chunk
+        return chunk
+
+class _ZstdInflater:
+    """
+    zstd decoder that never produces more than it is allowed to.
+
+    A zstandard decompressobj call can't cap its output, so the compressed body is
+    collected first (it can't be larger than the limit either) and decompressed
+    with read_to_iter, which yields at most WRITE_SIZE bytes at a time.
+    """
+    WRITE_SIZE = 64 * 1024
+
+    def __init__(self):
+        self._compressed = bytearray()
+        self._complete = False
+
+    def inflate(self, data: bytes, limit: int) -> bytes:
+        self._compressed += data
+        if len(self._compressed) > limit:
+            raise _InflatedTooLarge()
+        return b""
+
+    def finish(self, limit: int) -> bytes:
+        reader = _BufferReader(self._compressed)
+        output = bytearray()
+        for piece in zstandard.ZstdDecompressor().read_to_iter(reader, write_size=self.WRITE_SIZE):
+            output += piece
+            if len(output) > limit:
+                raise _InflatedTooLarge()
+        # read_to_iter stops at the end of the frame, or when the input runs out before it
+        self._complete = not reader.exhausted
+        return bytes(output)
+
+    @property
+    def complete(self) -> bool:
+        return self._complete
+
+class RequestDecompressionMiddleware:
+    """
+    Inflate gzip or zstd request bodies under path_prefix before they reach the routes.
+
+    The body is decompressed a bounded piece at a time (gzip as it arrives, zstd
+    once received), and the request is answered with 413 as soon as the inflated
+    size passes max_size, so a small compression bomb can't exhaust memory. A body
+    that ends before its compressed stream does is a 400. Routes see a plain body
+    without the Content-Encoding header.
+    """
+    def __init__(self, app, path_prefix: str, max_size: int):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = Headers(scope=scope).get("content-encoding", "identity").strip().lower()
+        if encoding == "identity":
+            await self.app(scope, receive, send)
+            return
+
+        if encoding == "gzip":
+            inflater = _GzipInflater()
+        elif encoding == "zstd" and zstandard is not None:
+            inflater = _ZstdInflater()
+        else:
+            response = JSONResponse(
+                status_code=415,
+                content={"detail": f"Unsupported Content-Encoding: {encoding}"}
+            )
+            await response(scope, receive, send)
+            return
+
+        body = bytearray()
+        more_body = True
+        try:
+            while more_body:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                more_body = message.get("more_body", False)
+                body += inflater.inflate(message.get("body", b""), self.max_size - len(body))
+                if len(body) > self.max_size:
+                    raise _InflatedTooLarge()
+            body += inflater.finish(self.max_size - len(body))
+        except _InflatedTooLarge:
+            response = JSONResponse(
+                status_code=413,
+                content={"detail": f"Decompressed request body exceeds {self.max_size} bytes"}
+            )
+            await response(scope, receive, send)
+            return
+        except DECOMPRESSION_ERRORS:
+            inflater = None
+        if inflater is None or not inflater.complete:
+            response = JSONResponse(
+                status_code=400,
+                content={"detail": f"Malformed or truncated {encoding} request body"}
+            )
+            await response(scope, receive, send)
+            return
+
+        headers = [
+            (name, value) for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        headers.append((b"content-length", str(len(body)).encode()))
+        scope = dict(scope, headers=headers)
+
+        body_sent = False
+        async def receive_inflated():
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": bytes(body), "more_body": False}
+
+        await self.app(scope, receive_inflated, send)
+
 # Register event listeners to ensure queries are properly scoped by tenant
 def register_tenant_isolation_listeners():
     """
@@ -5,6 +5,11 @@ from fastapi.exceptions import RequestValidationError
 
 from app.core.config import settings
 from app.api.v1.api import api_router
+from app.core.middlewares import RequestDecompressionMiddleware
+from app.core.request_formats import validation_pool
+from app.services.sync_job_service import sync_job_queue
+from app.services.api_key_cache import api_key_cache
+from app.services.api_key_usage import api_key_usage
 
 app = FastAPI(
     title="Ra Factory API",
@@ -12,6 +17,30 @@ app = FastAPI(
     version="0.1.0"
 )
 
+@app.on_event("startup")
+async def start_sync_job_queue():
+    """Start the background sync job workers and the sync validation pool."""
+    validation_pool.start()
+    await sync_job_queue.start()
+
+@app.on_event("startup")
+async def start_api_key_cache():
+    """Connect the API key cache's invalidation listener and start the last_used_at writer."""
+    await api_key_cache.start()
+    await api_key_usage.start()
+
+@app.on_event("shutdown")
+async def stop_api_key_cache():
+    """Close the API key cache's invalidation listener and write pending last_used_at."""
+    await api_key_cache.stop()
+    await api_key_usage.stop()
+
+@app.on_event("shutdown")
+async def stop_sync_job_queue():
+    """Stop the background sync job workers and the sync validation pool."""
+    await sync_job_queue.stop()
+    validation_pool.stop()
+
 # Enable CORS with specific origins
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +50,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Accept gzip/zstd compressed sync uploads
+app.add_middleware(
+    RequestDecompressionMiddleware,
+    path_prefix=f"{settings.API_V1_PREFIX}/sync",
+    max_size=settings.SYNC_MAX_DECOMPRESSED_BYTES,
+)
+
 # Custom middleware to handle CSP for documentation
 @app.middleware("http")
 async def csp_middleware(request: Request, call_next):
@@ -10,6 +10,9 @@ from app.models.component import Component
 from app.models.assembly import Assembly
 from app.models.article import Article
 from app.models.ui_template import UiTemplate
+from app.models.sync_session import SyncSession, SyncSessionChunk
+from app.models.sync_job import SyncJob
+from app.models.idempotency_key import IdempotencyKey
 
 # Export all model classes for easy importing
 __all__ = [
@@ -24,4 +27,8 @@ __all__ = [
     "Assembly",
     "Article",
     "UiTemplate",
+    "SyncSession",
+    "SyncSessionChunk",
+    "SyncJob",
+    "IdempotencyKey",
 ] 
\ No newline at end of file
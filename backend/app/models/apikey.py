@@ -10,7 +10,8 @@ class ApiKey(Base, TimestampMixin):
     
     guid = Column(pgUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     company_guid = Column(pgUUID(as_uuid=True), ForeignKey("companies.guid"), nullable=False)
-    key_hash = Column(String, nullable=False, unique=True) # Store hash, not the key itself
+    key_hash = Column(String, nullable=False, unique=True) # Keyed digest of the key (bcrypt for keys not yet rehashed), never the key itself
+    key_prefix = Column(String(12), nullable=True, index=True) # Public start of the key used for lookup; NULL until a bcrypt key is rehashed
     description = Column(String, nullable=True)
     scopes = Column(String, nullable=True) # Comma-separated scopes or JSON? Start simple.
     is_active = Column(Boolean, default=True, nullable=False)
@@ -40,11 +40,14 @@ class Article(Base, TimestampMixin):
     # Relationships
     id_project = Column(Integer, ForeignKey("projects.original_id"), index=True, nullable=True, comment="Foreign key to Projects.Id")
     id_component = Column(Integer, ForeignKey("components.original_id"), index=True, nullable=True, comment="Foreign key to Components.Id")
+    project_guid = Column(UUID(as_uuid=True), ForeignKey("projects.guid"), nullable=False, index=True)
+    component_guid = Column(UUID(as_uuid=True), ForeignKey("components.guid"), nullable=False, index=True)
     
     # Metadata
     created_date = Column(DateTime(timezone=True), comment="When the article was created")
     modified_date = Column(DateTime(timezone=True), comment="When the article was last modified")
     synced_at = Column(DateTime(timezone=True), server_default=func.now(), comment="When the article was last synced")
+    content_hash = Column(String(64), comment="Fingerprint of the last synced payload, used to skip unchanged rows")
     
     # Add unique constraint on original_id and company_guid
     __table_args__ = (sa.UniqueConstraint('original_id', 'company_guid', name='uq_article_original_id_company'),)
@@ -16,12 +16,15 @@ class Assembly(Base, TimestampMixin):
     
     id_project = Column(Integer, ForeignKey("projects.original_id"), index=True, comment="Foreign key to Projects.Id")
     id_component = Column(Integer, ForeignKey("components.original_id"), index=True, comment="Foreign key to Components.Id")
+    project_guid = Column(UUID(as_uuid=True), ForeignKey("projects.guid"), nullable=False, index=True)
+    component_guid = Column(UUID(as_uuid=True), ForeignKey("components.guid"), nullable=False, index=True)
     trolley_cell = Column(String, comment="Identifies the trolley and cell position")
     trolley = Column(String, comment="Identifies the trolley")
     cell_number = Column(Integer, comment="Cell number within the trolley")
     picture = Column(LargeBinary, comment="Visual representation of the assembly")
     
     synced_at = Column(DateTime(timezone=True), server_default=func.now(), comment="When the assembly was last synced")
+    content_hash = Column(String(64), comment="Fingerprint of the last synced payload, used to skip unchanged rows")
     
     # Add unique constraint on original_id and company_guid
     __table_args__ = (sa.UniqueConstraint('original_id', 'company_guid', name='uq_assembly_original_id_company'),)
@@ -17,11 +17,13 @@ class Component(Base, TimestampMixin):
     code = Column(String, index=True, comment="Component code identifier")
     designation = Column(String, comment="Name or description of the component")
     id_project = Column(Integer, ForeignKey("projects.original_id"), index=True, comment="Foreign key to Projects.Id") 
+    project_guid = Column(UUID(as_uuid=True), ForeignKey("projects.guid"), nullable=False, index=True)
     quantity = Column(Integer, comment="Number of components")
     picture = Column(LargeBinary, comment="Visual representation of the component")
     created_date = Column(DateTime(timezone=True), comment="When the component was created")
     
     synced_at = Column(DateTime(timezone=True), server_default=func.now(), comment="When the component was last synced")
+    content_hash = Column(String(64), comment="Fingerprint of the last synced payload, used to skip unchanged rows")
     
     # Add unique constraint on original_id and company_guid
     __table_args__ = (sa.UniqueConstraint('original_id', 'company_guid', name='uq_component_original_id_company'),)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+class IdempotencyKey(Base):
+    """Stored result of a sync request sent with an Idempotency-Key header."""
+    __tablename__ = "idempotency_keys"
+
+    company_guid = Column(UUID(as_uuid=True), ForeignKey("companies.guid"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of method, path, query and body
+    response = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyKey(company_guid={self.company_guid}, key={self.key})>"
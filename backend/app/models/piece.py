@@ -87,10 +87,14 @@ class Piece(Base, TimestampMixin):
     id_project = Column(Integer, ForeignKey("projects.original_id"), index=True, comment="Foreign key to Projects.Id")
     id_component = Column(Integer, ForeignKey("components.original_id"), index=True, comment="Foreign key to Components.Id")
     id_assembly = Column(Integer, ForeignKey("assemblies.original_id"), index=True, comment="Foreign key to Assemblies.Id")
+    project_guid = Column(UUID(as_uuid=True), ForeignKey("projects.guid"), nullable=False, index=True)
+    component_guid = Column(UUID(as_uuid=True), ForeignKey("components.guid"), nullable=False, index=True)
+    assembly_guid = Column(UUID(as_uuid=True), ForeignKey("assemblies.guid"), nullable=True, index=True)
     
     # Metadata
     created_date = Column(DateTime(timezone=True), comment="When the piece was created")
     synced_at = Column(DateTime(timezone=True), server_default=func.now(), comment="When the piece was last synced")
+    content_hash = Column(String(64), comment="Fingerprint of the last synced payload, used to skip unchanged rows")
     picture = Column(LargeBinary, comment="Visual representation of the piece")
     
     # Add unique constraint on original_id and company_guid
@@ -23,6 +23,7 @@ class Project(Base, TimestampMixin):
     company_name = Column(String, comment="Name of the company associated with the project")
     
     synced_at = Column(DateTime(timezone=True), server_default=func.now(), comment="When the project was last synced")
+    content_hash = Column(String(64), comment="Fingerprint of the last synced payload, used to skip unchanged rows")
     
     # Add unique constraint on original_id and company_guid
     __table_args__ = (sa.UniqueConstraint('original_id', 'company_guid', name='uq_project_original_id_company'),)
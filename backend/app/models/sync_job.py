@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+import uuid
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+class SyncJob(Base):
+    """A full sync accepted over HTTP and run in the background by the sync job queue."""
+    __tablename__ = "sync_jobs"
+
+    guid = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    company_guid = Column(UUID(as_uuid=True), ForeignKey("companies.guid"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued", index=True)  # queued, running, succeeded or failed
+    payload = Column(JSONB, nullable=False)  # The SyncJobCreate body, normalized to JSON
+    progress = Column(JSONB, nullable=True)  # Stages to run and the counts of the finished ones
+    result = Column(JSONB, nullable=True)  # FullSyncResult once succeeded
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Refreshed by the worker while running
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<SyncJob(guid={self.guid}, company_guid={self.company_guid}, status={self.status})>"
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+import uuid
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+class SyncSession(Base):
+    """A chunked sync upload: chunks are staged first and applied together on commit."""
+    __tablename__ = "sync_sessions"
+
+    guid = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    company_guid = Column(UUID(as_uuid=True), ForeignKey("companies.guid"), nullable=False, index=True)
+    entity_type = Column(String, nullable=False)  # projects, components, assemblies, pieces or articles
+    mode = Column(String, nullable=False, default="full")  # full or delta
+    status = Column(String, nullable=False, default="open")  # open, committed or aborted
+    result = Column(JSONB, nullable=True)  # SyncResult of the commit
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    committed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<SyncSession(guid={self.guid}, entity_type={self.entity_type}, status={self.status})>"
+
+class SyncSessionChunk(Base):
+    """One validated chunk of a sync session, replaced wholesale when re-uploaded."""
+    __tablename__ = "sync_session_chunks"
+
+    session_guid = Column(UUID(as_uuid=True), ForeignKey("sync_sessions.guid", ondelete="CASCADE"), primary_key=True)
+    chunk_number = Column(Integer, primary_key=True)
+    row_count = Column(Integer, nullable=False)
+    payload = Column(JSONB, nullable=False)  # The chunk's BulkInsert body, normalized to JSON
+    uploaded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<SyncSessionChunk(session_guid={self.session_guid}, chunk_number={self.chunk_number})>"
@@ -1,57 +1,753 @@
-from typing import List, Dict, Any, Type
-from uuid import UUID
+import json
+import hashlib
+from operator import itemgetter
+from typing import List, Dict, Any, Type, Iterable, Optional
+from uuid import UUID, uuid4
+from datetime import datetime
 
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.dialects.postgresql import insert, ARRAY, UUID as PGUUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text, inspect
+from sqlalchemy.exc import DBAPIError
+from fastapi import HTTPException, status
+from sqlalchemy import (
+    text, inspect, select, update, func, literal, literal_column, bindparam,
+    any_, and_, or_, exists, union_all, cast, tuple_, Boolean, Integer, String,
+    table as sql_table, column as sql_column
+)
 
 from app.models.piece import Piece
 from app.models.project import Project
 from app.models.component import Component
 from app.models.assembly import Assembly
 from app.models.article import Article
+from app.models.company import Company
+from app.models.workflow import Workflow
+from app.models.enums import WorkflowActionType
 from app.schemas.raconnect import PieceCreate, ProjectCreate, ComponentCreate, AssemblyCreate, ArticleCreate
 
+# asyncpg rejects statements with more than 32767 bind parameters
+MAX_BIND_PARAMS = 32767
+
+# Columns that an upsert must never overwrite on an existing row
+UPSERT_PROTECTED_COLUMNS = {"guid", "company_guid", "created_at"}
+
+# Columns left out of a row's content fingerprint: identity and soft-delete state
+FINGERPRINT_EXCLUDED_COLUMNS = UPSERT_PROTECTED_COLUMNS | {"is_active", "deleted_at", "content_hash"}
+
+# Entity types in parent-before-child order
+CASCADE_MODELS = {
+    "project": Project,
+    "component": Component,
+    "assembly": Assembly,
+    "piece": Piece,
+    "article": Article,
+}
+
+# For each entity type, the (parent type, foreign key column) pairs it hangs off
+CASCADE_PARENT_KEYS = {
+    "project": [],
+    "component": [("project", "project_guid")],
+    "assembly": [("project", "project_guid"), ("component", "component_guid")],
+    "piece": [("project", "project_guid"), ("component", "component_guid"), ("assembly", "assembly_guid")],
+    "article": [("project", "project_guid"), ("component", "component_guid")],
+}
+
+# For each entity type, the references it carries: (parent type, RaWorkshop ID column, GUID column).
+# Projects come first so a row's project_guid is known before its other parents are checked.
+ENTITY_REFERENCES = {
+    "project": [],
+    "component": [("project", "id_project", "project_guid")],
+    "assembly": [("project", "id_project", "project_guid"), ("component", "id_component", "component_guid")],
+    "piece": [
+        ("project", "id_project", "project_guid"),
+        ("component", "id_component", "component_guid"),
+        ("assembly", "id_assembly", "assembly_guid"),
+    ],
+    "article": [("project", "id_project", "project_guid"), ("component", "id_component", "component_guid")],
+}
+
+async def advisory_xact_lock(db: AsyncSession, name: str, wait: bool, timeout: float) -> bool:
+    """Take the transaction-scoped advisory lock called name.
+
+    With wait, the call queues behind the holder for up to timeout seconds;
+    otherwise it gives up at once. Returns whether the lock was taken.
+    """
+    key = func.hashtextextended(name, 0)
+    if not wait:
+        return (await db.execute(select(func.pg_try_advisory_xact_lock(key)))).scalar()
+
+    # lock_timeout covers advisory locks too; restore it so later row locks are unaffected
+    previous = (await db.execute(
+        select(func.current_setting("lock_timeout"), func.set_config("lock_timeout", f"{int(timeout * 1000)}ms", True))
+    )).scalar()
+    try:
+        await db.execute(select(func.pg_advisory_xact_lock(key)))
+    except DBAPIError as e:
+        if getattr(e.orig, "sqlstate", None) != "55P03":
+            raise
+        return False
+    await db.execute(select(func.set_config("lock_timeout", previous, True)))
+    return True
+
+async def acquire_sync_lock(
+    db: AsyncSession,
+    entity_type: str,
+    company_guid: UUID,
+    wait: bool,
+    timeout: float,
+) -> None:
+    """Take the advisory lock that serializes a company's syncs of entity_type.
+
+    The lock is transaction scoped, so it is released by the commit or rollback
+    that ends the sync. With wait, the call queues behind a running sync for up
+    to timeout seconds; otherwise it gives up at once. Either way a lock that
+    can't be had raises 409.
+    """
+    if not await advisory_xact_lock(db, f"sync:{company_guid}:{entity_type}", wait, timeout):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=(
+                f"Another {entity_type} sync for this company is still in progress after {timeout:g}s" if wait
+                else f"Another {entity_type} sync for this company is in progress"
+            )
+        )
+
+class SyncDiff:
+    """
+    Sample GUIDs of the rows a sync changes, for dry runs.
+
+    Stored as db.info["sync_diff"], it makes the upsert and soft delete statements
+    also return the GUIDs they touched; the first sample_size of each kind are kept.
+    """
+
+    def __init__(self, sample_size: int):
+        self.sample_size = sample_size
+        self.samples: Dict[str, List[UUID]] = {"inserted": [], "updated": [], "reactivated": []}
+        self.deleted: Dict[str, List[UUID]] = {name: [] for name in CASCADE_MODELS}
+
+    def add(self, samples: List[UUID], guids: Optional[List[UUID]]) -> None:
+        samples.extend((guids or [])[:self.sample_size - len(samples)])
+
+def guid_array(name: str, guids: Iterable[UUID]):
+    """Bind a collection of GUIDs as a single uuid[] parameter."""
+    return bindparam(name, value=list(guids), type_=ARRAY(PGUUID(as_uuid=True)))
+
+def fingerprint_rows(rows: List[Dict[str, Any]], table) -> List[str]:
+    """
+    Stamp rows with a content_hash of their normalized payload, if table has one.
+    Returns the table columns the rows write, content_hash included.
+    """
+    columns = [name for name in rows[0].keys() if name in table.c and name != "content_hash"]
+    if "content_hash" not in table.c:
+        return columns
+    payload_columns = sorted(name for name in columns if name not in FINGERPRINT_EXCLUDED_COLUMNS)
+    for row in rows:
+        payload = json.dumps(
+            [row.get(name) for name in payload_columns],
+            default=lambda value: value.hex() if isinstance(value, bytes) else str(value),
+            separators=(",", ":"),
+        )
+        row["content_hash"] = hashlib.sha256(payload.encode()).hexdigest()
+    return columns + ["content_hash"]
+
+def upsert_batch_size(column_count: int) -> int:
+    """Largest number of rows that fits in one multi-VALUES statement."""
+    return max(1, MAX_BIND_PARAMS // max(column_count, 1))
+
+async def bulk_upsert_by_guid(
+    db: AsyncSession,
+    rows: List[Dict[str, Any]],
+    model_class: Type,
+) -> Dict[str, int]:
+    """Insert or update rows keyed on guid, one statement per batch.
+
+    Conflicting rows owned by another company are left untouched and are not
+    counted. See _bulk_upsert for how the counts are obtained.
+
+    Args:
+        db: Database session
+        rows: Column dictionaries; every row must carry guid and company_guid
+        model_class: Target model class
+
+    Returns:
+        Dictionary with inserted, updated, reactivated and unchanged counts.
+        ``updated`` includes reactivated rows.
+    """
+    return await _bulk_upsert(db, rows, model_class, ["guid"])
+
+async def bulk_upsert_by_original_id(
+    db: AsyncSession,
+    rows: List[Dict[str, Any]],
+    model_class: Type,
+) -> Dict[str, int]:
+    """Insert or update rows keyed on the RaWorkshop natural key, one statement per batch.
+
+    Rows are matched on (original_id, company_guid), backed by the
+    uq_<entity>_original_id_company constraints, so RaConnect can resend data
+    without knowing our GUIDs. Existing rows keep their guid.
+
+    Args:
+        db: Database session
+        rows: Column dictionaries; every row must carry guid, original_id and company_guid
+        model_class: Target model class
+
+    Returns:
+        Dictionary with inserted, updated, reactivated and unchanged counts.
+        ``updated`` includes reactivated rows.
+    """
+    return await _bulk_upsert(db, rows, model_class, ["original_id", "company_guid"])
+
+async def _bulk_upsert(
+    db: AsyncSession,
+    rows: List[Dict[str, Any]],
+    model_class: Type,
+    conflict_keys: List[str],
+) -> Dict[str, int]:
+    """Write rows with one INSERT ... ON CONFLICT DO UPDATE per batch.
+
+    Rows must all belong to one company.
+    """
+    counts = {"inserted": 0, "updated": 0, "reactivated": 0, "unchanged": 0}
+    if not rows:
+        return counts
+
+    table = model_class.__table__
+    columns = fingerprint_rows(rows, table)
+    key_columns = [table.c[key] for key in conflict_keys]
+    # Extra parameters per row for the key lookup in the prior snapshot
+    batch_size = upsert_batch_size(len(columns) + len(conflict_keys))
+
+    # Key order, so that concurrent upserts lock shared rows in the same order and can't deadlock
+    rows = sorted(rows, key=itemgetter(*conflict_keys))
+    for start in range(0, len(rows), batch_size):
+        batch = [{name: row.get(name) for name in columns} for row in rows[start:start + batch_size]]
+        batch_keys = [tuple(row[key] for key in conflict_keys) for row in batch]
+        await _execute_upsert(db, table, insert(table).values(batch), columns, conflict_keys, batch_keys, rows[0]["company_guid"], counts)
+
+    return counts
+
+async def copy_upsert_by_guid(
+    db: AsyncSession,
+    rows: List[Dict[str, Any]],
+    model_class: Type,
+) -> Dict[str, int]:
+    """Insert or update rows keyed on guid through a COPY-loaded staging table.
+
+    Rows are streamed with asyncpg's binary copy_records_to_table into a
+    temporary (hence unlogged) table that is dropped on commit, then merged
+    with a single INSERT ... SELECT ... ON CONFLICT. This avoids planning one
+    huge multi-VALUES statement for wide tables such as pieces. Must run inside
+    the caller's transaction. Rows must all belong to one company and have
+    the same keys.
+
+    Returns:
+        Same counts as bulk_upsert_by_guid.
+    """
+    counts = {"inserted": 0, "updated": 0, "reactivated": 0, "unchanged": 0}
+    if not rows:
+        return counts
+
+    table = model_class.__table__
+    columns = fingerprint_rows(rows, table)
+    stage_name = f"sync_stage_{table.name}"
+    column_list = ", ".join(f'"{name}"' for name in columns)
+
+    await db.execute(text(f"DROP TABLE IF EXISTS pg_temp.{stage_name}"))
+    await db.execute(text(
+        f"CREATE TEMP TABLE {stage_name} ON COMMIT DROP AS "
+        f"SELECT {column_list} FROM {table.name} WITH NO DATA"
+    ))
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        stage_name,
+        schema_name="pg_temp",
+        columns=columns,
+        records=list(map(itemgetter(*columns), rows)),
+    )
+
+    stage = sql_table(stage_name, *[sql_column(name) for name in columns])
+    # Key order, so that concurrent upserts lock shared rows in the same order and can't deadlock
+    stmt = insert(table).from_select(columns, select(*[stage.c[name] for name in columns]).order_by(stage.c.guid))
+    await _execute_upsert(db, table, stmt, columns, ["guid"], select(stage.c.guid), rows[0]["company_guid"], counts)
+    return counts
+
+async def _execute_upsert(
+    db: AsyncSession,
+    table,
+    stmt,
+    columns: List[str],
+    conflict_keys: List[str],
+    incoming_keys,
+    company_guid: UUID,
+    counts: Dict[str, int],
+) -> None:
+    """Turn an INSERT into a counted upsert, execute it and add to counts.
+
+    A CTE snapshots the existing rows' is_active flag so that soft-deleted rows
+    revived by the payload are reported as reactivated, and RETURNING (xmax = 0)
+    tells inserts from updates. Updates are restricted to rows of the same
+    company and, when rows carry a content_hash, to rows whose fingerprint or
+    active state changed; company rows left alone are counted as unchanged.
+    incoming_keys is a list of key tuples or a select of the keys.
+    """
+    key_columns = [table.c[key] for key in conflict_keys]
+    update_condition = table.c.company_guid == stmt.excluded.company_guid
+    if "content_hash" in columns:
+        update_condition = and_(update_condition, or_(
+            table.c.content_hash.is_distinct_from(stmt.excluded.content_hash),
+            table.c.is_active.is_distinct_from(stmt.excluded.is_active),
+        ))
+    upserted = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={
+            name: stmt.excluded[name]
+            for name in columns
+            if name not in UPSERT_PROTECTED_COLUMNS
+        },
+        where=update_condition,
+    ).returning(
+        *key_columns,
+        table.c.is_active,
+        literal_column("(xmax = 0)", Boolean).label("inserted"),
+    ).cte("upserted")
+
+    # CTEs share one snapshot, so this sees the rows as they were before the upsert
+    prior = (
+        select(*key_columns, table.c.company_guid.label("prior_company_guid"), table.c.is_active)
+        .where(tuple_(*key_columns).in_(incoming_keys))
+        .cte("prior")
+    )
+    matches_upserted = and_(*[prior.c[key] == upserted.c[key] for key in conflict_keys])
+
+    # Existing company rows that the WHERE clause skipped
+    unchanged = select(func.count()).select_from(prior).where(
+        prior.c.prior_company_guid == company_guid,
+        ~exists().where(matches_upserted).correlate(prior),
+    ).correlate(None).scalar_subquery()
+
+    query = select(
+        func.count().label("total"),
+        func.count().filter(upserted.c.inserted).label("inserted"),
+        func.count().filter(prior.c.is_active.is_(False), upserted.c.is_active.is_(True)).label("reactivated"),
+        unchanged.label("unchanged"),
+    ).select_from(upserted.outerjoin(prior, matches_upserted))
+
+    diff = db.info.get("sync_diff")
+    if diff is not None and "guid" in conflict_keys:
+        reactivated = and_(prior.c.is_active.is_(False), upserted.c.is_active.is_(True))
+        query = query.add_columns(
+            func.array_agg(upserted.c.guid).filter(upserted.c.inserted).label("inserted_guids"),
+            func.array_agg(upserted.c.guid).filter(~upserted.c.inserted).label("updated_guids"),
+            func.array_agg(upserted.c.guid).filter(reactivated).label("reactivated_guids"),
+        )
+
+    result = (await db.execute(query)).one()
+    counts["inserted"] += result.inserted
+    counts["updated"] += result.total - result.inserted
+    counts["reactivated"] += result.reactivated
+    counts["unchanged"] += result.unchanged
+    if diff is not None and "guid" in conflict_keys:
+        for kind in ("inserted", "updated", "reactivated"):
+            diff.add(diff.samples[kind], getattr(result, f"{kind}_guids"))
+
+class ReferenceResolver:
+    """
+    Per-request cache of a company's parent rows, used to validate sync references.
+
+    For each parent table it keeps guid -> project_guid and
+    original_id -> (guid, project_guid), loaded with one query per table for
+    all keys a batch needs. Keys already seen are not fetched again, so one
+    resolver can be shared by every stage of a sync request.
+    """
+
+    def __init__(self, db: AsyncSession, company_guid: UUID):
+        self.db = db
+        self.company_guid = company_guid
+        self._by_guid: Dict[str, Dict[UUID, Optional[UUID]]] = {name: {} for name in CASCADE_MODELS}
+        self._by_original_id: Dict[str, Dict[int, tuple]] = {name: {} for name in CASCADE_MODELS}
+
+    async def load(self, entity_type: str, guids: Iterable[UUID] = (), original_ids: Iterable[int] = ()) -> None:
+        """Fetch the given rows of entity_type that are not cached yet."""
+        guids = {guid for guid in guids if guid not in self._by_guid[entity_type]}
+        original_ids = {oid for oid in original_ids if oid not in self._by_original_id[entity_type]}
+        if not guids and not original_ids:
+            return
+
+        model = CASCADE_MODELS[entity_type]
+        project_column = model.guid if entity_type == "project" else model.project_guid
+        query = select(model.guid, model.original_id, project_column).where(
+            model.company_guid == self.company_guid,
+            or_(
+                model.guid == any_(guid_array("guids", guids)),
+                model.original_id == any_(bindparam("original_ids", value=list(original_ids), type_=ARRAY(Integer))),
+            ),
+        )
+        for guid, original_id, project_guid in (await self.db.execute(query)).all():
+            self._by_guid[entity_type][guid] = project_guid
+            if original_id is not None:
+                self._by_original_id[entity_type][original_id] = (guid, project_guid)
+
+    async def guids_by_original_id(self, entity_type: str, original_ids: Iterable[int]) -> Dict[int, UUID]:
+        """Map the given RaWorkshop IDs to the GUIDs of the company's existing entity_type rows."""
+        original_ids = set(original_ids)
+        await self.load(entity_type, original_ids=original_ids)
+        return {
+            original_id: guid
+            for original_id, (guid, _) in self._by_original_id[entity_type].items()
+            if original_id in original_ids
+        }
+
+    async def resolve(self, rows: List[Dict[str, Any]], entity_type: str, label: str) -> None:
+        """
+        Validate the parent references of rows in place.
+
+        GUID references must point at rows of the company; RaWorkshop ID
+        references are translated to GUIDs. A parent other than the project must
+        belong to the row's project.
+
+        Raises:
+            HTTPException: 400 naming the index of the first invalid row
+        """
+        references = ENTITY_REFERENCES[entity_type]
+        for parent, id_field, guid_field in references:
+            await self.load(
+                parent,
+                {row[guid_field] for row in rows if row.get(guid_field) is not None},
+                {row[id_field] for row in rows if row.get(guid_field) is None and row.get(id_field) is not None},
+            )
+
+        for i, row in enumerate(rows):
+            for parent, id_field, guid_field in references:
+                parent_article = "an" if parent[0] in "aeiou" else "a"
+                if row.get(guid_field) is not None:
+                    found = row[guid_field] in self._by_guid[parent]
+                    parent_project = self._by_guid[parent].get(row[guid_field])
+                elif row.get(id_field) is not None:
+                    found = row[id_field] in self._by_original_id[parent]
+                    row[guid_field], parent_project = self._by_original_id[parent].get(row[id_field], (None, None))
+                else:
+                    continue
+
+                if not found:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"{label} at index {i} references {parent_article} {parent} that doesn't exist or doesn't belong to your company"
+                    )
+                if parent == "project" or row.get("project_guid") is None:
+                    continue
+                if parent_project is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"{label} at index {i} references {parent_article} {parent} that has no project association"
+                    )
+                if parent_project != row["project_guid"]:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"{label} at index {i} has mismatched project/{parent} relationship. {parent.capitalize()} '{row[guid_field]}' belongs to project '{parent_project}', not '{row['project_guid']}'."
+                    )
+
+async def bulk_cascade_soft_delete(
+    db: AsyncSession,
+    entity_type: str,
+    guids: Iterable[UUID],
+    deleted_at: datetime,
+) -> Dict[str, int]:
+    """Soft delete a set of roots and all their active descendants in one statement.
+
+    Every table gets a single UPDATE, chained as data-modifying CTEs in
+    parent-before-child order so each level matches on the GUIDs returned by
+    the levels above it. All rows share the same deleted_at, which is what
+    the cascade restore matches on. One SoftDelete workflow entry is written
+    per affected row by a single INSERT ... SELECT.
+
+    Args:
+        db: Database session
+        entity_type: Type of the roots, a key of CASCADE_MODELS
+        guids: GUIDs of the roots to soft delete
+        deleted_at: Timestamp stamped on every affected row
+
+    Returns:
+        Dictionary mapping entity type to the number of rows soft deleted
+    """
+    table = CASCADE_MODELS[entity_type].__table__
+    # Roots are always stamped, even if already inactive
+    condition = table.c.guid == any_(guid_array("roots", guids))
+    return await _cascade_soft_delete(db, entity_type, condition, deleted_at)
+
+async def bulk_soft_delete_missing(
+    db: AsyncSession,
+    entity_type: str,
+    company_guid: UUID,
+    keep_guids: Iterable[UUID],
+    deleted_at: datetime,
+) -> Dict[str, int]:
+    """Soft delete a company's active rows that are absent from a full sync payload.
+
+    The payload GUIDs are bound as one uuid[] parameter, unnested and
+    anti-joined against the table, so the company's existing GUIDs never
+    leave the database. Missing rows are cascaded to their descendants
+    exactly like bulk_cascade_soft_delete.
+
+    Args:
+        db: Database session
+        entity_type: Type of the synced entity, a key of CASCADE_MODELS
+        company_guid: Company whose rows are compared against the payload
+        keep_guids: GUIDs present in the payload
+        deleted_at: Timestamp stamped on every affected row
+
+    Returns:
+        Dictionary mapping entity type to the number of rows soft deleted
+    """
+    table = CASCADE_MODELS[entity_type].__table__
+    keep = func.unnest(guid_array("keep", keep_guids)).table_valued("guid").render_derived(name="keep")
+    condition = and_(
+        table.c.company_guid == company_guid,
+        table.c.is_active == True,
+        ~exists().where(keep.c.guid == table.c.guid),
+    )
+    return await _cascade_soft_delete(db, entity_type, condition, deleted_at)
+
+async def bulk_soft_delete_tombstones(
+    db: AsyncSession,
+    entity_type: str,
+    company_guid: UUID,
+    guids: Iterable[UUID],
+    original_ids: Iterable[int],
+    deleted_at: datetime,
+) -> Dict[str, int]:
+    """Soft delete a company's active rows named by a delta sync's tombstones.
+
+    Rows are matched by GUID or by RaWorkshop ID and cascaded to their
+    descendants exactly like bulk_cascade_soft_delete. Tombstones for rows
+    that are unknown, already deleted or owned by another company are ignored.
+
+    Args:
+        db: Database session
+        entity_type: Type of the synced entity, a key of CASCADE_MODELS
+        company_guid: Company the tombstones apply to
+        guids: GUIDs of deleted rows
+        original_ids: RaWorkshop IDs of deleted rows
+        deleted_at: Timestamp stamped on every affected row
+
+    Returns:
+        Dictionary mapping entity type to the number of rows soft deleted
+    """
+    table = CASCADE_MODELS[entity_type].__table__
+    condition = and_(
+        table.c.company_guid == company_guid,
+        table.c.is_active == True,
+        or_(
+            table.c.guid == any_(guid_array("tombstone_guids", guids)),
+            table.c.original_id == any_(bindparam("tombstone_ids", value=list(original_ids), type_=ARRAY(Integer))),
+        ),
+    )
+    return await _cascade_soft_delete(db, entity_type, condition, deleted_at)
+
+async def _cascade_soft_delete(
+    db: AsyncSession,
+    entity_type: str,
+    root_condition: Any,
+    deleted_at: datetime,
+) -> Dict[str, int]:
+    """Soft delete the rows matching root_condition and cascade to their descendants."""
+    deleted = {}
+    for name, model_class in CASCADE_MODELS.items():
+        table = model_class.__table__
+        if name == entity_type:
+            condition = root_condition
+        else:
+            parents = [
+                table.c[fk].in_(select(deleted[parent].c.guid))
+                for parent, fk in CASCADE_PARENT_KEYS[name]
+                if parent in deleted
+            ]
+            if not parents:
+                continue
+            condition = and_(table.c.is_active == True, or_(*parents))
+        # Lock the rows in key order first, like the upserts, so overlapping cascades can't deadlock
+        locked = select(table.c.guid).where(condition).order_by(table.c.guid).with_for_update(of=table)
+        deleted[name] = (
+            update(table)
+            .where(table.c.guid.in_(locked))
+            .values(is_active=False, deleted_at=deleted_at)
+            .returning(table.c.guid, table.c.company_guid)
+            .cte(f"deleted_{table.name}")
+        )
+
+    return await _execute_cascade(
+        db, deleted, WorkflowActionType.SOFT_DELETE, "Soft deleted"
+    )
+
+async def bulk_cascade_restore(
+    db: AsyncSession,
+    entity_type: str,
+    guids: Iterable[UUID],
+    deleted_at: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """Restore a set of roots and the descendants deleted together with them.
+
+    A descendant is restored only if it is inactive and its deleted_at matches
+    the deleted_at of the root it hangs off, i.e. it went down in the same
+    cascade. The matching rows are resolved level by level with read-only CTEs
+    against the pre-restore snapshot, then every table gets a single UPDATE
+    and one Restore workflow entry is written per affected row.
+
+    Args:
+        db: Database session
+        entity_type: Type of the roots, a key of CASCADE_MODELS
+        guids: GUIDs of the roots to restore
+        deleted_at: Timestamp to match descendants against
+            (if None, each root's own deleted_at is used)
+
+    Returns:
+        Dictionary mapping entity type to the number of rows restored
+    """
+    roots = guid_array("roots", guids)
+    matched = {}
+    for name, model_class in CASCADE_MODELS.items():
+        table = model_class.__table__
+        if name == entity_type:
+            if deleted_at is None:
+                # Roots without a deleted_at are already restored
+                condition = and_(table.c.guid == any_(roots), table.c.is_active == False, table.c.deleted_at.isnot(None))
+                stamp = table.c.deleted_at
+            else:
+                condition = and_(table.c.guid == any_(roots), table.c.is_active == False)
+                stamp = literal(deleted_at, table.c.deleted_at.type)
+        else:
+            parents = [
+                exists().where(
+                    matched[parent].c.guid == table.c[fk],
+                    matched[parent].c.stamp == table.c.deleted_at,
+                )
+                for parent, fk in CASCADE_PARENT_KEYS[name]
+                if parent in matched
+            ]
+            if not parents:
+                continue
+            condition = and_(table.c.is_active == False, or_(*parents))
+            stamp = table.c.deleted_at
+        matched[name] = (
+            select(table.c.guid, stamp.label("stamp"))
+            .where(condition)
+            .cte(f"matched_{table.name}")
+        )
+
+    restored = {}
+    for name, cte in matched.items():
+        table = CASCADE_MODELS[name].__table__
+        restored[name] = (
+            update(table)
+            .where(table.c.guid.in_(select(cte.c.guid)))
+            .values(is_active=True, deleted_at=None)
+            .returning(table.c.guid, table.c.company_guid)
+            .cte(f"restored_{table.name}")
+        )
+
+    return await _execute_cascade(
+        db, restored, WorkflowActionType.RESTORE, "Restored"
+    )
+
+async def _execute_cascade(
+    db: AsyncSession,
+    changed: Dict[str, Any],
+    action_type: WorkflowActionType,
+    verb: str,
+) -> Dict[str, int]:
+    """Run the per-table cascade CTEs together with their workflow audit insert.
+
+    ``changed`` maps entity type to a data-modifying CTE returning guid and
+    company_guid. One workflow entry per returned row is inserted by a single
+    INSERT ... SELECT. Returns the row count per entity type.
+    """
+    affected = union_all(*[
+        select(cte.c.guid, cte.c.company_guid, literal(name, String).label("entity_type"))
+        for name, cte in changed.items()
+    ]).cte("affected")
+    audit = (
+        insert(Workflow.__table__)
+        .from_select(
+            ["guid", "company_guid", "company_name", "action_type", "action_value"],
+            select(
+                func.gen_random_uuid(),
+                affected.c.company_guid,
+                Company.name,
+                literal(action_type, Workflow.__table__.c.action_type.type),
+                func.concat(f"{verb} ", affected.c.entity_type, " ", cast(affected.c.guid, String)),
+            ).select_from(affected.outerjoin(Company, Company.guid == affected.c.company_guid)),
+        )
+        .returning(Workflow.__table__.c.guid)
+        .cte("audit")
+    )
+
+    # Every CTE has to be referenced for SQLAlchemy to render it
+    query = select(
+        *[select(func.count()).select_from(cte).scalar_subquery().label(name) for name, cte in changed.items()],
+        select(func.count()).select_from(audit).scalar_subquery().label("audit"),
+    )
+    diff = db.info.get("sync_diff") if action_type == WorkflowActionType.SOFT_DELETE else None
+    if diff is not None:
+        query = query.add_columns(*[
+            select(func.array_agg(cte.c.guid)).scalar_subquery().label(f"{name}_guids")
+            for name, cte in changed.items()
+        ])
+    result = (await db.execute(query)).one()
+    if diff is not None:
+        for name in changed:
+            diff.add(diff.deleted[name], getattr(result, f"{name}_guids"))
+    return {name: getattr(result, name) for name in changed}
+
 async def bulk_upsert_generic(
     db: AsyncSession, 
     items: List[Any], 
     company_guid: UUID,
     model_class: Type,
 ) -> Dict[str, int]:
-    """Generic bulk upsert function for any model class.
+    """Generic bulk upsert function for RaConnect entities.
+    
+    Rows are keyed on (original_id, company_guid) and written with
+    INSERT ... ON CONFLICT DO UPDATE. Integer id_project/id_component/id_assembly
+    references are resolved to GUIDs by a ReferenceResolver, one query per parent table.
+    Re-sent rows are reactivated if they were soft deleted; rows whose content
+    fingerprint is unchanged are not rewritten.
+    Returns a dictionary with counts of inserted, updated, reactivated and unchanged rows.
     
-    Uses INSERT ... ON CONFLICT DO UPDATE to perform an upsert.
-    Returns a dictionary with counts of inserted and updated rows.
+    Raises:
+        HTTPException: 400 if a reference doesn't exist or belongs to another company,
+            or if a required reference is missing
     """
     if not items:
-        return {"inserted": 0, "updated": 0}
+        return {"inserted": 0, "updated": 0, "reactivated": 0, "unchanged": 0}
     
-    try:
-        # Simulate implementation
-        print(f"Would upsert {len(items)} items of type {model_class.__name__} for company {company_guid}")
-        
-        # Get model mapper to identify columns
-        mapper = inspect(model_class)
-        column_names = [column.key for column in mapper.columns if column.key != 'guid']
-        
-        # Print data validation summary
-        for i, item in enumerate(items[:3]):  # Show first 3 items
-            item_dict = item.model_dump(exclude_unset=True)
-            print(f"  Item {i+1}: id={item_dict.get('id')}")
-            
-        if len(items) > 3:
-            print(f"  ... and {len(items) - 3} more items")
-            
-        # In a real implementation, we would:
-        # 1. Prepare data for insertion, map all fields
-        # 2. Run an insert...on conflict statement
-        # 3. Track inserted vs updated counts
-        
-        # Return a simulated success response
-        return {"inserted": len(items), "updated": 0}
-    except Exception as e:
-        print(f"Error in bulk_upsert_generic ({model_class.__name__}): {str(e)}")
-        raise
+    rows = []
+    for item in items:
+        row = item.model_dump()
+        row["original_id"] = row.pop("id")
+        row["company_guid"] = company_guid
+        row["guid"] = uuid4()
+        row["is_active"] = True
+        row["deleted_at"] = None
+        rows.append(row)
+    
+    entity_type = next(name for name, model in CASCADE_MODELS.items() if model is model_class)
+    await ReferenceResolver(db, company_guid).resolve(rows, entity_type, model_class.__name__)
+    
+    # Articles may leave id_project/id_component out, but the columns are NOT NULL
+    for parent, id_field, guid_field in ENTITY_REFERENCES[entity_type]:
+        if getattr(model_class, guid_field).nullable:
+            continue
+        missing = [row["original_id"] for row in rows if row.get(guid_field) is None]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{model_class.__name__} ids {', '.join(map(str, missing))} have no {id_field}; every {model_class.__name__.lower()} must reference a {parent}"
+            )
+    
+    # ON CONFLICT can't touch the same row twice in one statement, so the last occurrence wins
+    rows = list({row["original_id"]: row for row in rows}.values())
+    
+    return await bulk_upsert_by_original_id(db, rows, model_class)
 
 async def bulk_upsert_pieces(db: AsyncSession, pieces: List[PieceCreate], company_guid: UUID) -> Dict[str, int]:
     """Bulk insert or update pieces for a specific company."""
@@ -51,6 +51,8 @@ async def sync_pieces(
     try:
         result = await bulk_upsert_pieces(db, pieces, tenant_id)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in sync_pieces: {str(e)}")
         raise HTTPException(
@@ -91,6 +93,8 @@ async def sync_projects(
     try:
         result = await bulk_upsert_projects(db, projects, tenant_id)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in sync_projects: {str(e)}")
         raise HTTPException(
@@ -131,6 +135,8 @@ async def sync_components(
     try:
         result = await bulk_upsert_components(db, components, tenant_id)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in sync_components: {str(e)}")
         raise HTTPException(
@@ -171,6 +177,8 @@ async def sync_assemblies(
     try:
         result = await bulk_upsert_assemblies(db, assemblies, tenant_id)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in sync_assemblies: {str(e)}")
         raise HTTPException(
@@ -211,6 +219,8 @@ async def sync_articles(
     try:
         result = await bulk_upsert_articles(db, articles, tenant_id)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in sync_articles: {str(e)}")
         raise HTTPException(
@@ -130,4 +130,6 @@ class PieceCreate(BaseModel):
 
 class SyncResponse(BaseModel):
     inserted: int
-    updated: int 
\ No newline at end of file
+    updated: int
+    reactivated: int = 0  # Soft-deleted rows revived by the sync, included in updated
+    unchanged: int = 0  # Existing rows whose content fingerprint matched, left untouched
@@ -15,6 +15,7 @@ class ArticleBase(BaseModel):
 class ArticleCreate(ArticleBase):
     """Schema for creating an Article."""
     guid: uuid.UUID = Field(default_factory=uuid.uuid4)
+    original_id: Optional[int] = None  # RaWorkshop ID; rows sent without a guid are matched on it
     # Including all optional fields
     consume_group_designation: Optional[str] = None
     consume_group_priority: Optional[int] = None
@@ -39,6 +40,9 @@ class ArticleCreate(ArticleBase):
 class ArticleBulkInsert(BaseModel):
     """Schema for bulk inserting Articles."""
     articles: List[ArticleCreate]
+    # Tombstones, only accepted in delta mode
+    deleted_guids: List[uuid.UUID] = []
+    deleted_original_ids: List[int] = []
 
 class ArticleResponse(ArticleBase):
     """Schema for Article responses."""
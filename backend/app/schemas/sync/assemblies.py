@@ -3,6 +3,8 @@ from typing import Optional, List
 from datetime import datetime
 import uuid
 
+from .binary import SyncBytes
+
 class AssemblyBase(BaseModel):
     """Base schema for Assembly fields."""
     project_guid: uuid.UUID
@@ -16,12 +18,16 @@ class AssemblyBase(BaseModel):
 class AssemblyCreate(AssemblyBase):
     """Schema for creating an Assembly."""
     guid: uuid.UUID = Field(default_factory=uuid.uuid4)
-    picture: Optional[bytes] = None
+    original_id: Optional[int] = None  # RaWorkshop ID; rows sent without a guid are matched on it
+    picture: Optional[SyncBytes] = None
     company_guid: Optional[uuid.UUID] = None  # Will be set from token if not provided
 
 class AssemblyBulkInsert(BaseModel):
     """Schema for bulk inserting Assemblies."""
     assemblies: List[AssemblyCreate]
+    # Tombstones, only accepted in delta mode
+    deleted_guids: List[uuid.UUID] = []
+    deleted_original_ids: List[int] = []
 
 class AssemblyResponse(AssemblyBase):
     """Schema for Assembly responses."""
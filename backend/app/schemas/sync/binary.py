@@ -0,0 +1,22 @@
+from pydantic import BeforeValidator, PlainSerializer, ValidationInfo
+from typing import Any
+from typing_extensions import Annotated
+import base64
+
+# Validation context for payloads read back from the database (sync jobs, session chunks)
+STORED_PAYLOAD_CONTEXT = {"stored_payload": True}
+
+def _decode_stored_bytes(value: Any, info: ValidationInfo) -> Any:
+    """Stored payloads carry bytes as base64; request bodies carry them as sent."""
+    if isinstance(value, str) and info.context and info.context.get("stored_payload"):
+        return base64.b64decode(value)
+    return value
+
+# Binary sync field. In JSON mode it is dumped as base64, so any bytes (such as raw
+# MessagePack bin values) survive model_dump(mode="json") into a JSONB payload and
+# come back unchanged when validated with STORED_PAYLOAD_CONTEXT.
+SyncBytes = Annotated[
+    bytes,
+    BeforeValidator(_decode_stored_bytes),
+    PlainSerializer(lambda value: base64.b64encode(value).decode(), return_type=str, when_used="json"),
+]
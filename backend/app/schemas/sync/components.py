@@ -3,6 +3,8 @@ from typing import Optional, List
 from datetime import datetime
 import uuid
 
+from .binary import SyncBytes
+
 class ComponentBase(BaseModel):
     """Base schema for Component fields."""
     code: str
@@ -15,12 +17,16 @@ class ComponentBase(BaseModel):
 class ComponentCreate(ComponentBase):
     """Schema for creating a Component."""
     guid: uuid.UUID = Field(default_factory=uuid.uuid4)
-    picture: Optional[bytes] = None
+    original_id: Optional[int] = None  # RaWorkshop ID; rows sent without a guid are matched on it
+    picture: Optional[SyncBytes] = None
     company_guid: Optional[uuid.UUID] = None  # Will be set from token if not provided
 
 class ComponentBulkInsert(BaseModel):
     """Schema for bulk inserting Components."""
     components: List[ComponentCreate]
+    # Tombstones, only accepted in delta mode
+    deleted_guids: List[uuid.UUID] = []
+    deleted_original_ids: List[int] = []
 
 class ComponentResponse(ComponentBase):
     """Schema for Component responses."""
@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from typing import Optional, List, Dict, Any, Literal
+from datetime import datetime
+import uuid
+
+from .projects import ProjectCreate, FullSyncResult
+from .components import ComponentCreate
+from .assemblies import AssemblyCreate
+from .pieces import PieceCreate
+from .articles import ArticleCreate
+
+class SyncJobCreate(BaseModel):
+    """Schema for submitting a background full sync. Entity types left empty are not synced."""
+    projects: List[ProjectCreate] = []
+    components: List[ComponentCreate] = []
+    assemblies: List[AssemblyCreate] = []
+    pieces: List[PieceCreate] = []
+    articles: List[ArticleCreate] = []
+    # Run independent stages concurrently, each committing on its own instead of all in one transaction
+    parallel: bool = False
+
+class SyncJobResponse(BaseModel):
+    """Schema for sync job responses."""
+    guid: uuid.UUID
+    status: Literal["queued", "running", "succeeded", "failed"]
+    progress: Optional[Dict[str, Any]] = None
+    result: Optional[FullSyncResult] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = {
+        "from_attributes": True
+    }
@@ -4,7 +4,7 @@ Main import file for sync schemas to simplify imports.
 
 from .projects import (
     ProjectBase, ProjectCreate, ProjectBulkInsert, 
-    ProjectResponse, ProjectDetail, SyncResult
+    ProjectResponse, ProjectDetail, SyncResult, FullSyncResult
 )
 from .components import (
     ComponentBase, ComponentCreate, ComponentBulkInsert,
@@ -21,4 +21,10 @@ from .pieces import (
 from .articles import (
     ArticleBase, ArticleCreate, ArticleBulkInsert,
     ArticleResponse
-) 
\ No newline at end of file
+)
+from .sessions import (
+    SyncSessionCreate, SyncSessionCommit, SyncSessionChunkResponse,
+    SyncSessionResponse
+)
+from .jobs import SyncJobCreate, SyncJobResponse
+from .binary import SyncBytes, STORED_PAYLOAD_CONTEXT
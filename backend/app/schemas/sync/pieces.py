@@ -3,6 +3,8 @@ from typing import Optional, List
 from datetime import datetime
 import uuid
 
+from .binary import SyncBytes
+
 class PieceBase(BaseModel):
     """Base schema for Piece fields."""
     piece_id: str
@@ -19,6 +21,7 @@ class PieceBase(BaseModel):
 class PieceCreate(PieceBase):
     """Schema for creating a Piece."""
     guid: uuid.UUID = Field(default_factory=uuid.uuid4)
+    original_id: Optional[int] = None  # RaWorkshop ID; rows sent without a guid are matched on it
     # Including all optional fields
     orientation: Optional[str] = None
     assembly_width: Optional[int] = None
@@ -67,13 +70,16 @@ class PieceCreate(PieceBase):
     parent_assembly_trolley_cell: Optional[str] = None
     mullion_trolley_cell: Optional[str] = None
     glazing_bead_trolley_cell: Optional[str] = None
-    picture: Optional[bytes] = None
+    picture: Optional[SyncBytes] = None
     project_phase: Optional[str] = None
     company_guid: Optional[uuid.UUID] = None  # Will be set from token if not provided
 
 class PieceBulkInsert(BaseModel):
     """Schema for bulk inserting Pieces."""
     pieces: List[PieceCreate]
+    # Tombstones, only accepted in delta mode
+    deleted_guids: List[uuid.UUID] = []
+    deleted_original_ids: List[int] = []
 
 class PieceResponse(PieceBase):
     """Schema for Piece responses."""
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 import uuid
 
@@ -16,12 +16,16 @@ class ProjectBase(BaseModel):
 class ProjectCreate(ProjectBase):
     """Schema for creating a Project."""
     guid: uuid.UUID = Field(default_factory=uuid.uuid4)
+    original_id: Optional[int] = None  # RaWorkshop ID; rows sent without a guid are matched on it
     company_guid: Optional[uuid.UUID] = None  # Will be set from token if not provided
     updated_at: Optional[datetime] = None
 
 class ProjectBulkInsert(BaseModel):
     """Schema for bulk inserting Projects."""
     projects: List[ProjectCreate]
+    # Tombstones, only accepted in delta mode
+    deleted_guids: List[uuid.UUID] = []
+    deleted_original_ids: List[int] = []
 
 class ProjectResponse(ProjectBase):
     """Schema for Project responses."""
@@ -48,4 +52,19 @@ class ProjectDetail(ProjectResponse):
 class SyncResult(BaseModel):
     """Result of a sync operation."""
     inserted: int
-    updated: int 
\ No newline at end of file
+    updated: int  # Includes reactivated rows
+    reactivated: int = 0
+    unchanged: int = 0  # Existing rows whose content fingerprint matched, left untouched
+    deleted: int = 0  # Rows soft deleted because they were missing from the payload
+    lock_wait: float = 0.0  # Seconds spent waiting for the company's sync lock on this entity type
+    # Dry runs only: sample GUIDs per kind of change (inserted, updated, reactivated, deleted)
+    samples: Optional[Dict[str, List[uuid.UUID]]] = None
+
+class FullSyncResult(BaseModel):
+    """Result of a full sync across all entity types."""
+    projects: Optional[SyncResult] = None
+    components: Optional[SyncResult] = None
+    assemblies: Optional[SyncResult] = None
+    pieces: Optional[SyncResult] = None
+    articles: Optional[SyncResult] = None
+    timings: Dict[str, float] = {}  # Seconds spent per stage, plus the final commit (or the parallel total)
@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Literal
+from datetime import datetime
+import uuid
+
+from .projects import SyncResult
+
+SyncEntityType = Literal["projects", "components", "assemblies", "pieces", "articles"]
+
+class SyncSessionCreate(BaseModel):
+    """Schema for opening a chunked sync session."""
+    entity_type: SyncEntityType
+    mode: Literal["full", "delta"] = "full"
+
+class SyncSessionCommit(BaseModel):
+    """Schema for committing a sync session."""
+    chunk_count: int = Field(..., ge=1)  # Chunks must be numbered 1..chunk_count
+
+class SyncSessionChunkResponse(BaseModel):
+    """Schema for an uploaded chunk."""
+    session_guid: uuid.UUID
+    chunk_number: int
+    row_count: int
+
+class SyncSessionResponse(BaseModel):
+    """Schema for sync session responses."""
+    guid: uuid.UUID
+    entity_type: SyncEntityType
+    mode: Literal["full", "delta"]
+    status: Literal["open", "committed", "aborted"]
+    created_at: datetime
+    expires_at: datetime
+    committed_at: Optional[datetime] = None
+    chunk_count: int = 0
+    row_count: int = 0
+    result: Optional[SyncResult] = None
@@ -0,0 +1,201 @@
+from typing import Dict, Any, Optional, Tuple, Union
+from collections import OrderedDict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+import uuid
+import time
+import asyncio
+import logging
+import asyncpg
+
+from app.core.config import settings
+from app.core.database import engine
+
+# Set up logging
+logger = logging.getLogger("app.services.api_key_cache")
+
+class ApiKeyCache:
+    """
+    In-process LRU cache of verified API keys with a short TTL.
+
+    Maps a key's digest to what authentication needs (company_guid, scopes, key guid),
+    so a cached key is accepted without touching the database. Changing or deleting a
+    key sends a PostgreSQL NOTIFY on commit; every worker process listens and drops the
+    key at once. While the listener is not connected the cache is bypassed, so a
+    missed invalidation can never keep a revoked key alive.
+
+    Every invalidation bumps a generation counter. A lookup reads the generation before
+    it queries the database and passes it to put(), which drops the entry if anything
+    was invalidated in between, so a key read just before its revocation isn't cached.
+
+    Digests that matched no key are remembered the same way, so a client retrying a bad
+    key costs no query, and the number of keys still stored as bcrypt hashes is kept
+    for a TTL so the bcrypt fallback can be skipped once none are left.
+    """
+
+    CHANNEL = "api_key_invalidation"
+    RECONNECT_DELAY_SECONDS = 5
+    # Engine connect arguments that belong to SQLAlchemy's asyncpg adapter, not asyncpg.connect
+    ADAPTER_CONNECT_ARGS = ("prepared_statement_cache_size", "prepared_statement_name_func", "async_creator_fn")
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._digests_by_guid: Dict[str, str] = {}
+        self._rejected: "OrderedDict[str, float]" = OrderedDict()
+        self._legacy_key_count: Optional[Tuple[float, int]] = None
+        self._generation = 0
+        self._connection: Optional[asyncpg.Connection] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self._connection is not None and not self._connection.is_closed()
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped by every invalidation; read it before querying a key to cache."""
+        return self._generation
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Cached key info for a digest, or None if absent, expired or the cache is off."""
+        if not self.enabled:
+            return None
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        expires_at, info = entry
+        if expires_at < time.monotonic():
+            self._drop(digest)
+            return None
+        self._entries.move_to_end(digest)
+        return info
+
+    def put(self, digest: str, info: Dict[str, Any], generation: int) -> None:
+        """
+        Cache a verified key, evicting the least recently used one when full.
+        Skipped if an invalidation happened since generation was read.
+        """
+        if not self.enabled or generation != self._generation:
+            return
+        self._drop(digest)
+        self._entries[digest] = (time.monotonic() + self.ttl_seconds, info)
+        self._digests_by_guid[str(info["guid"])] = digest
+        while len(self._entries) > self.max_size:
+            self._drop(next(iter(self._entries)))
+
+    def is_rejected(self, digest: str) -> bool:
+        """Whether digest recently matched no key."""
+        if not self.enabled:
+            return False
+        expires_at = self._rejected.get(digest)
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            del self._rejected[digest]
+            return False
+        return True
+
+    def reject(self, digest: str, generation: int) -> None:
+        """Remember that digest matched no key, unless an invalidation happened since generation was read."""
+        if not self.enabled or generation != self._generation:
+            return
+        self._rejected.pop(digest, None)
+        self._rejected[digest] = time.monotonic() + self.ttl_seconds
+        while len(self._rejected) > self.max_size:
+            self._rejected.popitem(last=False)
+
+    def legacy_key_count(self) -> Optional[int]:
+        """Active keys still stored as bcrypt hashes, or None if unknown or expired."""
+        if self._legacy_key_count is None or self._legacy_key_count[0] < time.monotonic():
+            return None
+        return self._legacy_key_count[1]
+
+    def set_legacy_key_count(self, count: int, generation: int) -> None:
+        """Remember the legacy key count for ttl_seconds, unless an invalidation happened since generation was read."""
+        if generation == self._generation:
+            self._legacy_key_count = (time.monotonic() + self.ttl_seconds, count)
+
+    def invalidate(self, key: str) -> None:
+        """
+        Forget a changed or deleted key (by guid) in this process. Rejections are kept by
+        digest, which a guid doesn't lead to, so all are dropped: a reactivated or newly
+        created key (notified by its digest) must not stay rejected.
+        """
+        self._generation += 1
+        self._legacy_key_count = None
+        self._rejected.clear()
+        digest = self._digests_by_guid.get(str(key))
+        if digest is not None:
+            self._drop(digest)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._digests_by_guid.clear()
+        self._rejected.clear()
+        self._legacy_key_count = None
+
+    def _drop(self, digest: str) -> None:
+        entry = self._entries.pop(digest, None)
+        if entry is not None:
+            self._digests_by_guid.pop(str(entry[1]["guid"]), None)
+
+    @staticmethod
+    async def notify_invalidation(session: AsyncSession, key: Union[uuid.UUID, str]) -> None:
+        """
+        Queue an invalidation of key (see invalidate) for every worker, sent when session
+        commits. Call it in the transaction that creates, changes or deletes the key.
+        """
+        await session.execute(select(func.pg_notify(ApiKeyCache.CHANNEL, str(key))))
+
+    async def start(self) -> None:
+        """Connect the invalidation listener. Until it is connected, lookups bypass the cache."""
+        if self.max_size <= 0 or self._connection is not None:
+            return
+        # Same host, credentials and SSL options as the engine
+        _, connect_args = engine.dialect.create_connect_args(engine.url)
+        for name in self.ADAPTER_CONNECT_ARGS:
+            connect_args.pop(name, None)
+        try:
+            self._connection = await asyncpg.connect(**connect_args)
+            await self._connection.add_listener(self.CHANNEL, self._on_notification)
+            self._connection.add_termination_listener(self._on_termination)
+        except Exception as e:
+            logger.warning(f"API key cache disabled, invalidation listener failed to connect: {e}")
+            self._connection = None
+            self._schedule_reconnect()
+
+    async def stop(self) -> None:
+        """Close the listener and empty the cache."""
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            await connection.close()
+        self.clear()
+
+    def _on_notification(self, connection, pid, channel: str, payload: str) -> None:
+        self.invalidate(payload)
+
+    def _on_termination(self, connection) -> None:
+        # Invalidations may have been missed while disconnected
+        self.clear()
+        if self._connection is connection:
+            self._connection = None
+            self._schedule_reconnect()
+
+    def _schedule_reconnect(self) -> None:
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+        self._reconnect_task = None
+        await self.start()
+
+
+# Process-wide cache, started with the application
+api_key_cache = ApiKeyCache(settings.API_KEY_CACHE_SIZE, settings.API_KEY_CACHE_TTL_SECONDS)
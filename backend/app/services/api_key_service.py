@@ -1,20 +1,38 @@
 import uuid
+import hmac
+import asyncio
+import hashlib
 import secrets
 import string
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timezone
 from typing import Optional, List, Dict, Any
 from fastapi import HTTPException, status
 
+from app.core.config import settings
 from app.models.apikey import ApiKey
-from app.utils.security import hash_password, verify_password
+from app.services.api_key_cache import ApiKeyCache, api_key_cache
+from app.services.api_key_usage import api_key_usage
+from app.utils.security import verify_password
+
+
+def _find_bcrypt_match(api_key: str, hashes: List[str]) -> Optional[int]:
+    """Index of the bcrypt hash api_key matches, or None. Slow; run it in an executor."""
+    for i, key_hash in enumerate(hashes):
+        if verify_password(api_key, key_hash):
+            return i
+    return None
 
 
 class ApiKeyService:
     # Define valid scopes as a class variable
     VALID_SCOPES = ["sync:read", "sync:write"]
     
+    # Characters of a key stored in clear as its lookup prefix ("rfk_" plus 8)
+    KEY_PREFIX_LENGTH = 12
+    
     @staticmethod
     def validate_scopes(scopes: Optional[str]) -> List[str]:
         """
@@ -60,19 +78,36 @@ class ApiKeyService:
         # Add prefix to make it easily identifiable
         return f"rfk_{random_part}"
     
+    @staticmethod
+    def key_prefix(api_key: str) -> str:
+        """
+        Public lookup prefix of an API key.
+        
+        Short custom keys give up at most half their length, so the prefix never reveals the key.
+        
+        Args:
+            api_key: The raw API key
+            
+        Returns:
+            The first KEY_PREFIX_LENGTH characters of the key, or half of a shorter key
+        """
+        return api_key[:min(ApiKeyService.KEY_PREFIX_LENGTH, len(api_key) // 2)]
+    
     @staticmethod
     def hash_api_key(api_key: str) -> str:
         """
         Hash an API key for storage in the database.
         
+        API keys are long random strings, so a keyed HMAC-SHA256 digest protects them as
+        well as bcrypt does while taking microseconds to check instead of ~250 ms.
+        
         Args:
             api_key: The raw API key
             
         Returns:
-            Hashed API key string
+            Hex digest of the key under settings.API_KEY_DIGEST_SECRET
         """
-        # We can use the same hashing mechanism as for passwords
-        return hash_password(api_key)
+        return hmac.new(settings.API_KEY_DIGEST_SECRET.encode(), api_key.encode(), hashlib.sha256).hexdigest()
     
     @staticmethod
     async def create_api_key(
@@ -89,7 +124,8 @@ class ApiKeyService:
             company_guid: The company this key belongs to
             description: Optional description of what this key is for
             scopes: Optional comma-separated list of permission scopes
-            key: Optional user-provided key (must be unique)
+            key: Optional user-provided key (must be unique, checked by the unique key_hash index
+                and, while any are left, against active keys still stored as bcrypt hashes)
             session: Database session
             
         Returns:
@@ -111,22 +147,15 @@ class ApiKeyService:
                     detail="API key must start with 'rfk_' and be at least 8 characters long"
                 )
                 
-            # Check if the key already exists
+            # Uniqueness is enforced by the unique index on the deterministic digest, see below.
+            # An active legacy key with the same value would be resolved to the new key on its next use.
+            legacy = await ApiKeyService._active_legacy_keys(session)
+            if await ApiKeyService._match_bcrypt_keys(key, legacy) is not None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="An API key with this value already exists"
+                )
             hashed_key = ApiKeyService.hash_api_key(key)
-            
-            # We need to check all keys as bcrypt produces different hashes for the same input
-            query = select(ApiKey)
-            result = await session.execute(query)
-            existing_keys = result.scalars().all()
-            
-            # Check each key using verify_password which handles the bcrypt comparison
-            for existing_key in existing_keys:
-                if verify_password(key, existing_key.key_hash):
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="An API key with this value already exists"
-                    )
-                
             raw_key = key
         else:
             # Generate a new key
@@ -138,6 +167,7 @@ class ApiKeyService:
             guid=uuid.uuid4(),
             company_guid=company_guid,
             key_hash=hashed_key,
+            key_prefix=ApiKeyService.key_prefix(raw_key),
             description=description,
             scopes=scopes,
             is_active=True
@@ -145,12 +175,24 @@ class ApiKeyService:
         
         # Save to database
         session.add(new_key)
-        await session.flush()  # This populates the created_at field without committing
+        try:
+            await session.flush()  # This populates the created_at field without committing
+        except IntegrityError as e:
+            await session.rollback()
+            if "key_hash" not in str(e.orig):
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="An API key with this value already exists"
+            )
         
         # Capture the created_at timestamp before commit
         created_at = new_key.created_at
         
+        # Lift any cached rejection of this key value in every worker
+        await ApiKeyCache.notify_invalidation(session, hashed_key)
         await session.commit()
+        api_key_cache.invalidate(hashed_key)
         
         # Return the response with the actual database timestamp
         return {
@@ -241,10 +283,12 @@ class ApiKeyService:
         if not values:
             return await ApiKeyService.get_api_key_by_guid(guid, session)
         
-        # Update the key
+        # Update the key and drop it from every worker's cache once committed
         query = update(ApiKey).where(ApiKey.guid == guid).values(**values).returning(ApiKey)
         result = await session.execute(query)
+        await ApiKeyCache.notify_invalidation(session, guid)
         await session.commit()
+        api_key_cache.invalidate(guid)
         
         return result.scalars().first()
     
@@ -265,7 +309,9 @@ class ApiKeyService:
         """
         query = delete(ApiKey).where(ApiKey.guid == guid)
         result = await session.execute(query)
+        await ApiKeyCache.notify_invalidation(session, guid)
         await session.commit()
+        api_key_cache.invalidate(guid)
         
         return result.rowcount > 0
     
@@ -275,7 +321,13 @@ class ApiKeyService:
         session: AsyncSession = None
     ) -> Optional[Dict[str, Any]]:
         """
-        Validate an API key and update its last_used_at timestamp.
+        Validate an API key and note its use for the batched last_used_at update.
+        
+        Recently verified and recently rejected keys are answered from api_key_cache without
+        a query. Otherwise the key is looked up by its public prefix with one indexed query
+        and its digest compared in constant time. Keys created before prefixes existed still
+        carry a bcrypt hash; while any are left, a key that matches no prefix is checked
+        against them off the event loop and rehashed on its first successful use.
         
         Args:
             api_key: The raw API key to validate
@@ -284,23 +336,98 @@ class ApiKeyService:
         Returns:
             Dictionary with company and scope info if validated, None otherwise
         """
-        # We need to query all API keys as we can't hash the key for comparison
-        query = select(ApiKey).where(ApiKey.is_active == True)
+        digest = ApiKeyService.hash_api_key(api_key)
+        cached = api_key_cache.get(digest)
+        if cached is not None:
+            api_key_usage.record(cached["guid"])
+            return dict(cached)
+        if api_key_cache.is_rejected(digest):
+            return None
+        generation = api_key_cache.generation
+        
+        query = select(ApiKey).where(
+            ApiKey.key_prefix == ApiKeyService.key_prefix(api_key),
+            ApiKey.is_active == True
+        )
         result = await session.execute(query)
-        keys = result.scalars().all()
-        
-        # Try to find a matching key
-        for key in keys:
-            if verify_password(api_key, key.key_hash):
-                # Update last_used_at
-                key.last_used_at = datetime.utcnow()
-                await session.commit()
-                
-                # Return key info - ensure company_guid is a UUID object
-                return {
-                    "company_guid": key.company_guid,  # Return UUID object directly, not string
-                    "scopes": key.scopes,
-                    "guid": str(key.guid)
-                }
-        
-        return None 
\ No newline at end of file
+        match = next(
+            (key for key in result.scalars().all() if hmac.compare_digest(key.key_hash, digest)),
+            None
+        )
+        
+        if match is None:
+            match = await ApiKeyService._rehash_legacy_key(api_key, digest, session)
+            if match is None:
+                api_key_cache.reject(digest, generation)
+                return None
+            await session.commit()
+            # One legacy key fewer; the row just committed is current, so cache it
+            api_key_cache.invalidate(match.guid)
+            generation = api_key_cache.generation
+        
+        # last_used_at is written behind, off the request path
+        api_key_usage.record(match.guid)
+        
+        # Return key info - ensure company_guid is a UUID object
+        info = {
+            "company_guid": match.company_guid,  # Return UUID object directly, not string
+            "scopes": match.scopes,
+            "guid": str(match.guid)
+        }
+        api_key_cache.put(digest, info, generation)
+        return dict(info)
+    
+    @staticmethod
+    async def _rehash_legacy_key(
+        api_key: str,
+        digest: str,
+        session: AsyncSession = None
+    ) -> Optional[ApiKey]:
+        """
+        Find an active key still stored as a bcrypt hash and move it to the digest scheme.
+        
+        Only keys without a prefix are checked, and not at all once the cached count of
+        such keys is zero, so the bcrypt work goes away as keys are used or retired with
+        scripts/retire_legacy_api_keys.py. The bcrypt checks run in the default executor.
+        
+        Args:
+            api_key: The raw API key
+            digest: Its keyed digest
+            session: Database session
+            
+        Returns:
+            The matching API key object, updated but not committed, or None
+        """
+        key = await ApiKeyService._match_bcrypt_keys(api_key, await ApiKeyService._active_legacy_keys(session))
+        if key is None:
+            return None
+        key.key_hash = digest
+        key.key_prefix = ApiKeyService.key_prefix(api_key)
+        return key
+    
+    @staticmethod
+    async def _active_legacy_keys(session: AsyncSession) -> List[ApiKey]:
+        """
+        The active keys still stored as bcrypt hashes (no prefix). Skips the query while
+        the count of such keys cached by api_key_cache is zero.
+        """
+        legacy = (ApiKey.key_prefix.is_(None), ApiKey.is_active == True)
+        remaining = api_key_cache.legacy_key_count()
+        if remaining is None:
+            generation = api_key_cache.generation
+            remaining = await session.scalar(select(func.count()).select_from(ApiKey).where(*legacy))
+            api_key_cache.set_legacy_key_count(remaining, generation)
+        if not remaining:
+            return []
+        result = await session.execute(select(ApiKey).where(*legacy))
+        return result.scalars().all()
+    
+    @staticmethod
+    async def _match_bcrypt_keys(api_key: str, keys: List[ApiKey]) -> Optional[ApiKey]:
+        """The key among keys whose bcrypt hash api_key matches, checked in the default executor."""
+        if not keys:
+            return None
+        index = await asyncio.get_running_loop().run_in_executor(
+            None, _find_bcrypt_match, api_key, [key.key_hash for key in keys]
+        )
+        return None if index is None else keys[index]
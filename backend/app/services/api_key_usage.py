@@ -0,0 +1,91 @@
+from typing import Dict, Optional
+from sqlalchemy import update, bindparam, func
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, TIMESTAMP
+import uuid
+import asyncio
+import logging
+import datetime
+
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.models.apikey import ApiKey
+
+# Set up logging
+logger = logging.getLogger("app.services.api_key_usage")
+
+class ApiKeyUsageRecorder:
+    """
+    Write-behind buffer for ApiKey.last_used_at.
+
+    Authentication only notes the time a key was used in memory; a background task
+    writes all noted keys with one bulk UPDATE every flush_seconds. A key is therefore
+    written at most once per interval however often it is used, and requests never
+    wait on the write. Timestamps noted since the last flush are lost if the process
+    dies, which only makes last_used_at up to one interval older.
+    """
+
+    def __init__(self, flush_seconds: float):
+        self.flush_seconds = flush_seconds
+        self._pending: Dict[uuid.UUID, datetime.datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, key_guid) -> None:
+        """Note that a key was used now."""
+        self._pending[uuid.UUID(str(key_guid))] = datetime.datetime.now(datetime.timezone.utc)
+
+    async def flush(self) -> int:
+        """Write the noted timestamps in one UPDATE. Returns the number of keys written."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        used = func.unnest(
+            bindparam("guids", list(pending), type_=ARRAY(UUID(as_uuid=True))),
+            bindparam("used_at", list(pending.values()), type_=ARRAY(TIMESTAMP(timezone=True))),
+        ).table_valued("guid", "used_at").render_derived(name="used")
+        stmt = (
+            update(ApiKey)
+            .where(
+                ApiKey.guid == used.c.guid,
+                ApiKey.last_used_at.is_(None) | (ApiKey.last_used_at < used.c.used_at)
+            )
+            .values(last_used_at=used.c.used_at)
+        )
+        try:
+            async with async_session_factory() as session:
+                await session.execute(stmt)
+                await session.commit()
+        except Exception:
+            # Keep the timestamps for the next flush unless newer ones were noted meanwhile
+            for guid, used_at in pending.items():
+                self._pending.setdefault(guid, used_at)
+            raise
+        return len(pending)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write what is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Final flush of API key last_used_at failed")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                written = await self.flush()
+                if written:
+                    logger.debug(f"Updated last_used_at of {written} API keys")
+            except Exception:
+                logger.exception("Flushing API key last_used_at failed")
+
+
+# Process-wide recorder, started with the application
+api_key_usage = ApiKeyUsageRecorder(settings.API_KEY_LAST_USED_FLUSH_SECONDS)
@@ -0,0 +1,100 @@
+from typing import Dict, Any, Optional, Callable, Awaitable
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+from fastapi import HTTPException, status, Request
+import hashlib
+import logging
+import datetime
+
+from app.core.config import settings
+from app.models.idempotency_key import IdempotencyKey
+from app.repositories.sync import advisory_xact_lock
+
+# Set up logging
+logger = logging.getLogger("app.services.idempotency_service")
+
+class IdempotencyService:
+    """
+    Replays the stored result of requests retried with the same Idempotency-Key.
+
+    Keys are scoped to the company and expire after IDEMPOTENCY_KEY_TTL_HOURS.
+    Only successful results are stored, so a failed request can be retried as is.
+    The operation and its stored result commit together under an advisory lock on
+    the key, so concurrent retries run it once and a crash can't lose the result.
+    """
+
+    @staticmethod
+    async def request_hash(request: Request) -> str:
+        """Fingerprint of the request: method, path, query string and raw body."""
+        digest = hashlib.sha256()
+        digest.update(f"{request.method} {request.url.path}?{request.url.query}\n".encode())
+        digest.update(await request.body())
+        return digest.hexdigest()
+
+    @staticmethod
+    async def run(
+        request: Request,
+        key: Optional[str],
+        company_guid,
+        session: AsyncSession,
+        operation: Callable[..., Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Run operation once per company and Idempotency-Key.
+
+        With a key, operation is called with commit=False and its writes are committed
+        together with the stored result. A repeated key with the same request returns
+        the stored result without calling operation, waiting for a concurrent request
+        with the key to finish first (409 after SYNC_LOCK_TIMEOUT_SECONDS); reusing a
+        key for a different request is a 422. Without a key, operation simply runs.
+        """
+        if not key:
+            return await operation()
+
+        request_hash = await IdempotencyService.request_hash(request)
+        if not await advisory_xact_lock(
+            session, f"idempotency:{company_guid}:{key}", wait=True, timeout=settings.SYNC_LOCK_TIMEOUT_SECONDS
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress"
+            )
+        now = datetime.datetime.now(datetime.timezone.utc)
+        stored = (await session.execute(
+            select(IdempotencyKey.request_hash, IdempotencyKey.response).where(
+                IdempotencyKey.company_guid == company_guid,
+                IdempotencyKey.key == key,
+                IdempotencyKey.expires_at > now
+            )
+        )).first()
+        if stored:
+            if stored.request_hash != request_hash:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used for a different request"
+                )
+            logger.debug(f"Replaying stored result for Idempotency-Key {key}")
+            await session.commit()
+            return stored.response
+
+        result = await operation(commit=False)
+
+        # Evict the company's expired keys, then store this one
+        await session.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.company_guid == company_guid,
+                IdempotencyKey.expires_at <= now
+            )
+        )
+        await session.execute(
+            insert(IdempotencyKey).values(
+                company_guid=company_guid,
+                key=key,
+                request_hash=request_hash,
+                response=result,
+                expires_at=now + datetime.timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+            ).on_conflict_do_nothing(index_elements=[IdempotencyKey.company_guid, IdempotencyKey.key])
+        )
+        await session.commit()
+        return result
@@ -0,0 +1,266 @@
+from typing import Dict, Any, Optional, List
+from collections import defaultdict, deque
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, literal
+from sqlalchemy.dialects.postgresql import JSONB
+from fastapi import HTTPException, status
+import uuid
+import asyncio
+import logging
+import datetime
+
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.core.deps import set_tenant_for_session
+from app.models.sync_job import SyncJob
+from app.schemas.sync.main import SyncJobCreate, STORED_PAYLOAD_CONTEXT
+from app.services.sync_service import SyncService
+
+# Set up logging
+logger = logging.getLogger("app.services.sync_job_service")
+
+class SyncJobQueue:
+    """
+    Bounded in-process pool that runs sync jobs in the background.
+
+    A fixed number of worker tasks take jobs from one queue. Each company may have
+    at most its concurrency limit of jobs queued for the workers; further jobs wait
+    in a per-company backlog and move up as that company's jobs finish, so one
+    tenant can't occupy every worker. The limits are kept in memory and so apply per
+    process; they are not coordinated between processes.
+
+    Jobs cancelled by stop() go back to "queued" and are picked up by the next start().
+    A running job's worker refreshes its heartbeat every SYNC_JOB_HEARTBEAT_SECONDS; jobs
+    left "running" by a process that died stop getting one, and once it is older than
+    SYNC_JOB_STALE_SECONDS the sweep that every process runs at the same interval puts
+    them back in a queue.
+    """
+
+    def __init__(self, workers: int, tenant_concurrency: int, tenant_limits: Optional[Dict[str, int]] = None):
+        self.workers = workers
+        self.tenant_concurrency = tenant_concurrency
+        self.tenant_limits = tenant_limits or {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._active: Dict[str, int] = defaultdict(int)
+        self._backlog: Dict[str, deque] = defaultdict(deque)
+        self._tasks: List[asyncio.Task] = []
+
+    def limit_for(self, company_guid: str) -> int:
+        """Concurrent jobs allowed for a company."""
+        return self.tenant_limits.get(company_guid, self.tenant_concurrency)
+
+    def submit(self, job_guid: uuid.UUID, company_guid: str) -> None:
+        """Queue a job, or park it in the company's backlog if the company is at its limit."""
+        company_guid = str(company_guid)
+        if self._active[company_guid] < self.limit_for(company_guid):
+            self._active[company_guid] += 1
+            self._queue.put_nowait((job_guid, company_guid))
+        else:
+            self._backlog[company_guid].append(job_guid)
+
+    async def start(self) -> None:
+        """
+        Start the worker tasks and the sweep for abandoned jobs, and queue the jobs that
+        were waiting when the process stopped or whose worker died while running them.
+        """
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        await self.requeue_abandoned()
+        async with async_session_factory() as session:
+            result = await session.execute(
+                select(SyncJob.guid, SyncJob.company_guid)
+                .where(SyncJob.status == "queued")
+                .order_by(SyncJob.created_at)
+            )
+            for job_guid, company_guid in result.all():
+                self.submit(job_guid, company_guid)
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+
+    async def requeue_abandoned(self) -> List[tuple]:
+        """
+        Put jobs whose heartbeat is older than SYNC_JOB_STALE_SECONDS back to "queued".
+        The UPDATE only returns the jobs it changed, so with several processes sweeping
+        each abandoned job is requeued by one of them. Returns their (guid, company_guid).
+        """
+        stale_before = func.now() - datetime.timedelta(seconds=settings.SYNC_JOB_STALE_SECONDS)
+        async with async_session_factory() as session:
+            result = await session.execute(
+                update(SyncJob)
+                .where(
+                    SyncJob.status == "running",
+                    func.coalesce(SyncJob.heartbeat_at, SyncJob.started_at) < stale_before
+                )
+                .values(
+                    status="queued", started_at=None, heartbeat_at=None,
+                    # The run starts over, as after a cancellation
+                    progress=SyncJob.progress.op("||")(literal({"completed": {}}, JSONB))
+                )
+                .returning(SyncJob.guid, SyncJob.company_guid)
+            )
+            abandoned = result.all()
+            await session.commit()
+        for job_guid, _ in abandoned:
+            logger.warning(f"Sync job {job_guid} was left running by a stopped worker, re-queued")
+        return abandoned
+
+    async def _sweeper(self) -> None:
+        while True:
+            await asyncio.sleep(settings.SYNC_JOB_HEARTBEAT_SECONDS)
+            try:
+                for job_guid, company_guid in await self.requeue_abandoned():
+                    self.submit(job_guid, company_guid)
+            except Exception:
+                logger.exception("Sweep for abandoned sync jobs failed")
+
+    async def stop(self) -> None:
+        """Cancel the worker and sweep tasks. Unfinished jobs are left or put back queued in the database."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        while True:
+            job_guid, company_guid = await self._queue.get()
+            try:
+                await SyncJobService.run_job(job_guid)
+            except Exception:
+                logger.exception(f"Sync job {job_guid} crashed")
+            finally:
+                self._queue.task_done()
+                if self._backlog[company_guid]:
+                    self._queue.put_nowait((self._backlog[company_guid].popleft(), company_guid))
+                else:
+                    self._active[company_guid] -= 1
+
+
+class SyncJobService:
+    """
+    Service for background sync jobs.
+
+    The payload is stored with the job so that it survives until a worker picks it
+    up; the worker runs SyncService.run_full_sync and records progress and result.
+    """
+
+    @staticmethod
+    async def create_job(data: SyncJobCreate, company_guid: uuid.UUID, session: AsyncSession) -> SyncJob:
+        """Persist a sync job and hand it to the queue."""
+        for entity in SyncService.FULL_SYNC_STAGES:
+            for i, item in enumerate(getattr(data, entity)):
+                if item.company_guid is not None and str(item.company_guid) != str(company_guid):
+                    raise HTTPException(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        detail=f"{entity} item at index {i} has company_guid that doesn't match the authenticated user's company"
+                    )
+        job = SyncJob(
+            company_guid=company_guid,
+            status="queued",
+            payload=SyncService.dump_payload(data),
+            progress={
+                "stages": [entity for entity in SyncService.FULL_SYNC_STAGES if getattr(data, entity)],
+                "completed": {},
+            },
+        )
+        session.add(job)
+        await session.commit()
+        await session.refresh(job)
+        sync_job_queue.submit(job.guid, job.company_guid)
+        return job
+
+    @staticmethod
+    async def get_job(job_guid: uuid.UUID, company_guid: uuid.UUID, session: AsyncSession) -> SyncJob:
+        """Fetch a sync job of the company. Raises 404 if it doesn't exist or belongs to another company."""
+        result = await session.execute(
+            select(SyncJob).where(SyncJob.guid == job_guid, SyncJob.company_guid == company_guid)
+        )
+        job = result.scalar_one_or_none()
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Sync job {job_guid} not found"
+            )
+        return job
+
+    @staticmethod
+    async def _update_job(job_guid: uuid.UUID, **values: Any) -> None:
+        """Record job state in its own transaction, so it is visible while the sync is still open."""
+        async with async_session_factory() as session:
+            await session.execute(update(SyncJob).where(SyncJob.guid == job_guid).values(**values))
+            await session.commit()
+
+    @staticmethod
+    async def _heartbeat(job_guid: uuid.UUID) -> None:
+        """Refresh a running job's heartbeat every SYNC_JOB_HEARTBEAT_SECONDS until cancelled."""
+        while True:
+            await asyncio.sleep(settings.SYNC_JOB_HEARTBEAT_SECONDS)
+            try:
+                await SyncJobService._update_job(job_guid, heartbeat_at=func.now())
+            except Exception:
+                logger.exception(f"Heartbeat of sync job {job_guid} failed")
+
+    @staticmethod
+    async def run_job(job_guid: uuid.UUID) -> None:
+        """
+        Claim a queued job and run it as one full sync, or stage by stage in parallel if requested.
+        The claim is a conditional UPDATE, so a job is only ever run once even if it was queued twice.
+        If the run is cancelled the job is put back to "queued": the full sync is rolled back, and
+        stages a parallel run already committed are upserted again harmlessly on the next run.
+        While it runs, the job's heartbeat is refreshed so that no sweep takes it for abandoned.
+        """
+        async with async_session_factory() as session:
+            claimed = await session.execute(
+                update(SyncJob)
+                .where(SyncJob.guid == job_guid, SyncJob.status == "queued")
+                .values(status="running", started_at=func.now(), heartbeat_at=func.now())
+                .returning(SyncJob.company_guid, SyncJob.payload, SyncJob.progress)
+            )
+            job = claimed.first()
+            await session.commit()
+            if job is None:
+                return
+
+            company_guid, payload, progress = job
+            data = SyncJobCreate.model_validate(payload, context=STORED_PAYLOAD_CONTEXT)
+
+            async def on_stage(entity: str, counts: Dict[str, int]) -> None:
+                progress["completed"][entity] = counts
+                await SyncJobService._update_job(job_guid, progress=progress)
+
+            stages = {entity: getattr(data, entity) for entity in SyncService.FULL_SYNC_STAGES}
+            heartbeat = asyncio.create_task(SyncJobService._heartbeat(job_guid))
+            try:
+                if data.parallel:
+                    result = await SyncService.run_parallel_full_sync(stages, company_guid, on_stage=on_stage)
+                else:
+                    await set_tenant_for_session(session, str(company_guid))
+                    result = await SyncService.run_full_sync(stages, company_guid, session, on_stage=on_stage)
+            except asyncio.CancelledError:
+                progress["completed"] = {}
+                await SyncJobService._update_job(job_guid, status="queued", started_at=None, progress=progress)
+                logger.info(f"Sync job {job_guid} interrupted, re-queued")
+                raise
+            except HTTPException as e:
+                await SyncJobService._update_job(
+                    job_guid, status="failed", error=str(e.detail), finished_at=func.now()
+                )
+                return
+            except Exception:
+                logger.exception(f"Sync job {job_guid} failed")
+                await SyncJobService._update_job(
+                    job_guid, status="failed", error="Internal error while running the sync", finished_at=func.now()
+                )
+                return
+            finally:
+                heartbeat.cancel()
+
+            await SyncJobService._update_job(job_guid, status="succeeded", result=result, finished_at=func.now())
+            logger.info(f"Sync job {job_guid} succeeded: {result['timings']}")
+
+
+# Process-wide queue, started with the application
+sync_job_queue = SyncJobQueue(
+    settings.SYNC_JOB_WORKERS,
+    settings.SYNC_JOB_TENANT_CONCURRENCY,
+    settings.SYNC_JOB_TENANT_LIMITS,
+)
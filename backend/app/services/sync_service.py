@@ -1,21 +1,30 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional, Callable, Awaitable
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy import select, update, func
+from sqlalchemy import select, update, func, or_
 import uuid
 from fastapi import HTTPException, status
 import logging
 import datetime
+import time
+import asyncio
 
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.core.deps import set_tenant_for_session
 from app.models.project import Project
 from app.models.component import Component
 from app.models.assembly import Assembly
 from app.models.piece import Piece
 from app.models.article import Article
 from app.schemas.sync.main import (
-    ProjectCreate, ComponentCreate, AssemblyCreate, PieceCreate, ArticleCreate, SyncResult
+    ProjectCreate, ComponentCreate, AssemblyCreate, PieceCreate, ArticleCreate, SyncResult, FullSyncResult
 )
 from app.services.workflow_service import WorkflowService
+from app.repositories.sync import (
+    bulk_upsert_by_guid, copy_upsert_by_guid, bulk_cascade_soft_delete, bulk_cascade_restore,
+    bulk_soft_delete_missing, bulk_soft_delete_tombstones, acquire_sync_lock, ReferenceResolver, SyncDiff,
+    CASCADE_MODELS, CASCADE_PARENT_KEYS
+)
 from app.models.enums import WorkflowActionType
 
 # Set up logging
@@ -28,8 +37,164 @@ class SyncService:
     Handles bulk inserts and updates for production entities.
     """
     
+    # Entity types synced by run_full_sync, parents first
+    FULL_SYNC_STAGES = ["projects", "components", "assemblies", "pieces", "articles"]
+    
+    # GUIDs returned per kind of change by dry_run
+    DRY_RUN_SAMPLE_SIZE = 20
+    
+    # Stages each stage waits for in run_parallel_full_sync
+    FULL_SYNC_DEPENDENCIES = {
+        "projects": [],
+        "components": ["projects"],
+        "assemblies": ["projects", "components"],
+        "pieces": ["projects", "components", "assemblies"],
+        "articles": ["projects", "components"],
+    }
+    
     @staticmethod
-    async def sync_projects(projects_data: List[ProjectCreate], company_guid: uuid.UUID, session: AsyncSession) -> Dict[str, int]:
+    async def _upsert_rows(model, items: List[Any], company_guid: uuid.UUID, session: AsyncSession, resolver: Optional[ReferenceResolver] = None, ingest: Optional[str] = None) -> Dict[str, int]:
+        """
+        Write validated sync items with one set-based upsert per batch.
+        Parent references are checked by resolver first (400 on an invalid one).
+        ingest selects the write path: 'values' (multi-row INSERT) or 'copy' (COPY into a
+        staging table, then one merge); None picks 'copy' from settings.SYNC_COPY_THRESHOLD rows, if set.
+        Raises 409 if any GUID is already taken by another company's row.
+        Takes the company's sync lock for the entity type first (see _lock); the seconds
+        spent waiting for it are returned as lock_wait.
+        """
+        entity_type = next(name for name, m in CASCADE_MODELS.items() if m is model)
+        lock_wait = await SyncService._lock(entity_type, company_guid, session)
+        await SyncService._match_original_ids(entity_type, items, company_guid, session)
+        rows = []
+        for item in items:
+            # Shallow copy of the validated field values, no serialization pass per row
+            d = vars(item).copy()
+            d['company_guid'] = company_guid
+            if not d.get('guid'):
+                d['guid'] = uuid.uuid4()
+            rows.append(d)
+        if all(row.get('original_id') is None for row in rows):
+            # Leave the RaWorkshop IDs of existing rows alone
+            for row in rows:
+                row.pop('original_id', None)
+        if resolver is not None:
+            await resolver.resolve(rows, entity_type, model.__name__)
+        if ingest is None:
+            threshold = settings.SYNC_COPY_THRESHOLD
+            ingest = "copy" if threshold and len(rows) >= threshold else "values"
+        if ingest == "copy":
+            counts = await copy_upsert_by_guid(session, rows, model)
+        else:
+            counts = await bulk_upsert_by_guid(session, rows, model)
+        logger.debug(f"Upserted {len(rows)} {model.__tablename__} via {ingest}: {counts}")
+        skipped = len(rows) - counts["inserted"] - counts["updated"] - counts["unchanged"]
+        if skipped:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"{skipped} {model.__tablename__} in input data use GUIDs that belong to another company"
+            )
+        counts["lock_wait"] = lock_wait
+        return counts
+    
+    @staticmethod
+    def dump_payload(data: Any) -> Dict[str, Any]:
+        """
+        Serialize a sync payload for storage until it is run. Generated GUIDs are kept so that a
+        rerun writes the same rows, except on items with an original_id, which must still be
+        matched on it when the payload runs.
+        """
+        payload = data.model_dump(mode="json")
+        for entity in SyncService.FULL_SYNC_STAGES:
+            for item, stored in zip(getattr(data, entity, None) or [], payload.get(entity, [])):
+                if item.original_id is not None and "guid" not in item.model_fields_set:
+                    del stored["guid"]
+        return payload
+    
+    @staticmethod
+    async def _match_original_ids(entity_type: str, items: List[Any], company_guid: uuid.UUID, session: AsyncSession) -> None:
+        """
+        Give items sent with an original_id but no guid the guid of the company's row with that
+        RaWorkshop ID, so a resend updates the row instead of inserting a duplicate. Runs under
+        the sync lock, so the row can't be created concurrently. Raises 400 for an original_id
+        sent twice, 409 for a guid that doesn't match the row already holding its original_id
+        and 409 if a matched guid is also sent by another item.
+        """
+        natural = [item for item in items if item.original_id is not None]
+        if not natural:
+            return
+        seen = set()
+        for item in natural:
+            if item.original_id in seen:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Duplicate original_id found in input data: {item.original_id}"
+                )
+            seen.add(item.original_id)
+        # A resolver of its own: the request's shared one must not cache rows before they are upserted
+        existing = await ReferenceResolver(session, company_guid).guids_by_original_id(entity_type, seen)
+        for item in natural:
+            guid = existing.get(item.original_id)
+            if guid is None:
+                continue
+            if "guid" not in item.model_fields_set:
+                item.guid = guid
+            elif item.guid != guid:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"original_id {item.original_id} already belongs to {entity_type} {guid}, not {item.guid}"
+                )
+        guids = set()
+        for item in items:
+            if item.guid in guids:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Duplicate GUID found in input data: {item.guid}"
+                )
+            guids.add(item.guid)
+    
+    @staticmethod
+    async def _lock(entity_type: str, company_guid: uuid.UUID, session: AsyncSession) -> float:
+        """
+        Serialize the company's syncs of entity_type with a transaction-scoped advisory lock.
+        settings.SYNC_LOCK_POLICY 'wait' queues behind a running sync for up to
+        SYNC_LOCK_TIMEOUT_SECONDS, 'fail' raises 409 at once. Returns the seconds waited.
+        """
+        started = time.perf_counter()
+        await acquire_sync_lock(
+            session, entity_type, company_guid,
+            wait=settings.SYNC_LOCK_POLICY == "wait",
+            timeout=settings.SYNC_LOCK_TIMEOUT_SECONDS
+        )
+        waited = time.perf_counter() - started
+        if waited > 1:
+            logger.info(f"Waited {waited:.1f}s for the {entity_type} sync lock of company {company_guid}")
+        return waited
+    
+    @staticmethod
+    async def _lock_cascade(entity_type: str, company_guid: uuid.UUID, session: AsyncSession) -> None:
+        """
+        Take the sync locks of entity_type and of every type a cascade from it reaches, in
+        CASCADE_MODELS order, before the cascade runs. A cascade locks the rows of all those
+        tables in one statement, while a sync of one of them locks its rows in two passes
+        (upsert, then deletion); holding the sync locks keeps the two from interleaving into a
+        deadlock. Every transaction takes the locks in the same order, so the locks themselves
+        can't deadlock either. Locks already held by the transaction are simply taken again.
+        """
+        for name, parents in CASCADE_PARENT_KEYS.items():
+            if name == entity_type or any(parent == entity_type for parent, _ in parents):
+                await SyncService._lock(name, company_guid, session)
+    
+    @staticmethod
+    async def _lock_cascade_roots(entity_type: str, guids, session: AsyncSession) -> None:
+        """_lock_cascade for the companies owning the given roots."""
+        model = CASCADE_MODELS[entity_type]
+        result = await session.execute(select(model.company_guid).where(model.guid.in_(list(guids))).distinct())
+        for company_guid in sorted(result.scalars().all()):
+            await SyncService._lock_cascade(entity_type, company_guid, session)
+    
+    @staticmethod
+    async def sync_projects(projects_data: List[ProjectCreate], company_guid: uuid.UUID, session: AsyncSession, delta: bool = False, deleted_guids: Optional[List[uuid.UUID]] = None, deleted_original_ids: Optional[List[int]] = None, commit: bool = True) -> Dict[str, int]:
         # Convert company_guid to UUID if it's a string
         if isinstance(company_guid, str):
             company_guid = uuid.UUID(company_guid)
@@ -53,104 +218,30 @@ class SyncService:
                     )
                 guid_set.add(project.guid)
         
-        # Check which GUIDs already exist in the database
-        existing_guids = set()
-        if guid_set:
-            query = select(Project.guid, Project.is_active, Project.deleted_at).where(Project.guid.in_(guid_set))
-            result = await session.execute(query)
-            existing_db = {row[0]: (row[1], row[2]) for row in result.all()}
-            existing_guids = set(existing_db.keys())
-        else:
-            existing_db = {}
-        
-        # Convert ProjectCreate objects to dicts
-        insert_dicts = []
-        update_dicts = []
-        reactivated_dicts = []
-        input_guids = set()
-        for p in projects_data:
-            d = p.dict()
-            d['company_guid'] = company_guid
-            input_guids.add(p.guid)
-            if p.guid:
-                if p.guid in existing_guids:
-                    # If soft-deleted, reactivate and update
-                    is_active, deleted_at = existing_db[p.guid]
-                    if not is_active:
-                        d['is_active'] = True
-                        d['deleted_at'] = None
-                        reactivated_dicts.append(d)
-                    else:
-                        update_dicts.append(d)
-                else:
-                    insert_dicts.append(d)
-            else:
-                d['guid'] = uuid.uuid4()
-                insert_dicts.append(d)
-        
-        # Handle inserts
-        inserted_count = 0
-        if insert_dicts:
-            insert_stmt = insert(Project).values(insert_dicts)
-            await session.execute(insert_stmt)
-            inserted_count = len(insert_dicts)
-        
-        # Handle updates
-        updated_count = 0
-        for update_dict in update_dicts:
-            guid = update_dict.pop('guid')
-            update_stmt = update(Project).where(Project.guid == guid).values(**update_dict)
-            update_result = await session.execute(update_stmt)
-            updated_count += update_result.rowcount
-        
-        # Handle reactivations
-        for reactivate_dict in reactivated_dicts:
-            guid = reactivate_dict.pop('guid')
-            update_stmt = update(Project).where(Project.guid == guid).values(**reactivate_dict)
-            await session.execute(update_stmt)
-            updated_count += 1
+        await SyncService._check_tombstones(
+            'project', projects_data, company_guid, session, delta, deleted_guids, deleted_original_ids
+        )
+        counts = await SyncService._upsert_rows(Project, projects_data, company_guid, session)
         
-        # Soft delete children not present in payload
-        # (This requires a list of all project GUIDs for this company in DB)
-        db_query = select(Project.guid).where(Project.company_guid == company_guid, Project.is_active == True)
-        db_result = await session.execute(db_query)
-        db_guids = {row[0] for row in db_result.all()}
-        missing_guids = db_guids - input_guids
-        for missing_guid in missing_guids:
-            await SyncService.cascade_soft_delete('project', missing_guid, session)
+        # Soft delete projects missing from the payload, or only the tombstoned ones in delta mode
+        counts["deleted"] = await SyncService._remove_rows(
+            'project', projects_data, company_guid, session, delta, deleted_guids, deleted_original_ids
+        )
         
-        await session.commit()
-        return {"inserted": inserted_count, "updated": updated_count}
+        if commit:
+            await session.commit()
+        return counts
     
     @staticmethod
-    async def sync_components(components_data: List[ComponentCreate], company_guid: uuid.UUID, session: AsyncSession) -> Dict[str, int]:
+    async def sync_components(components_data: List[ComponentCreate], company_guid: uuid.UUID, session: AsyncSession, resolver: Optional[ReferenceResolver] = None, delta: bool = False, deleted_guids: Optional[List[uuid.UUID]] = None, deleted_original_ids: Optional[List[int]] = None, commit: bool = True) -> Dict[str, int]:
         if isinstance(company_guid, str):
             company_guid = uuid.UUID(company_guid)
-        project_guids = set()
-        for component in components_data:
-            if component.project_guid:
-                project_guids.add(component.project_guid)
-        if project_guids:
-            query = select(Project.guid).where(
-                Project.guid.in_(project_guids),
-                Project.company_guid == company_guid
-            )
-            result = await session.execute(query)
-            valid_project_guids = {str(row[0]).lower() for row in result.all()}
-            logger.debug(f"Valid project GUIDs: {valid_project_guids}")
-        else:
-            valid_project_guids = set()
         for i, component in enumerate(components_data):
             if component.company_guid is not None and component.company_guid != company_guid:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=f"Component at index {i} has company_guid that doesn't match the authenticated user's company"
                 )
-            if component.project_guid and str(component.project_guid).lower() not in valid_project_guids:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Component at index {i} references a project that doesn't exist or doesn't belong to your company"
-                )
         guid_set = set()
         for i, component in enumerate(components_data):
             if component.guid:
@@ -160,146 +251,29 @@ class SyncService:
                         detail=f"Duplicate GUID found in input data: {component.guid}"
                     )
                 guid_set.add(component.guid)
-        existing_guids = set()
-        if guid_set:
-            query = select(Component.guid, Component.is_active, Component.deleted_at).where(Component.guid.in_(guid_set))
-            result = await session.execute(query)
-            existing_db = {row[0]: (row[1], row[2]) for row in result.all()}
-            existing_guids = set(existing_db.keys())
-        else:
-            existing_db = {}
-        insert_dicts = []
-        update_dicts = []
-        reactivated_dicts = []
-        input_guids = set()
-        for c in components_data:
-            d = c.dict()
-            d['company_guid'] = company_guid
-            input_guids.add(c.guid)
-            if c.guid:
-                if c.guid in existing_guids:
-                    is_active, deleted_at = existing_db[c.guid]
-                    if not is_active:
-                        d['is_active'] = True
-                        d['deleted_at'] = None
-                        reactivated_dicts.append(d)
-                    else:
-                        update_dicts.append(d)
-                else:
-                    insert_dicts.append(d)
-            else:
-                d['guid'] = uuid.uuid4()
-                insert_dicts.append(d)
-        inserted_count = 0
-        if insert_dicts:
-            insert_stmt = insert(Component).values(insert_dicts)
-            await session.execute(insert_stmt)
-            inserted_count = len(insert_dicts)
-        updated_count = 0
-        for update_dict in update_dicts:
-            guid = update_dict.pop('guid')
-            update_stmt = update(Component).where(Component.guid == guid).values(**update_dict)
-            update_result = await session.execute(update_stmt)
-            updated_count += update_result.rowcount
-        for reactivate_dict in reactivated_dicts:
-            guid = reactivate_dict.pop('guid')
-            update_stmt = update(Component).where(Component.guid == guid).values(**reactivate_dict)
-            await session.execute(update_stmt)
-            updated_count += 1
-        db_query = select(Component.guid).where(Component.company_guid == company_guid, Component.is_active == True)
-        db_result = await session.execute(db_query)
-        db_guids = {row[0] for row in db_result.all()}
-        missing_guids = db_guids - input_guids
-        for missing_guid in missing_guids:
-            await SyncService.cascade_soft_delete('component', missing_guid, session)
-        await session.commit()
-        return {"inserted": inserted_count, "updated": updated_count}
+        await SyncService._check_tombstones(
+            'component', components_data, company_guid, session, delta, deleted_guids, deleted_original_ids
+        )
+        if resolver is None:
+            resolver = ReferenceResolver(session, company_guid)
+        counts = await SyncService._upsert_rows(Component, components_data, company_guid, session, resolver)
+        counts["deleted"] = await SyncService._remove_rows(
+            'component', components_data, company_guid, session, delta, deleted_guids, deleted_original_ids
+        )
+        if commit:
+            await session.commit()
+        return counts
     
     @staticmethod
-    async def sync_assemblies(assemblies_data: List[AssemblyCreate], company_guid: uuid.UUID, session: AsyncSession) -> Dict[str, int]:
+    async def sync_assemblies(assemblies_data: List[AssemblyCreate], company_guid: uuid.UUID, session: AsyncSession, resolver: Optional[ReferenceResolver] = None, delta: bool = False, deleted_guids: Optional[List[uuid.UUID]] = None, deleted_original_ids: Optional[List[int]] = None, commit: bool = True) -> Dict[str, int]:
         if isinstance(company_guid, str):
             company_guid = uuid.UUID(company_guid)
-        project_guids = set()
-        component_guids = set()
-        project_component_pairs = []
-        for assembly in assemblies_data:
-            if assembly.project_guid:
-                project_guids.add(assembly.project_guid)
-            if assembly.component_guid:
-                component_guids.add(assembly.component_guid)
-            if assembly.project_guid and assembly.component_guid:
-                project_component_pairs.append((assembly.project_guid, assembly.component_guid))
-        if project_guids:
-            query = select(Project.guid).where(
-                Project.guid.in_(project_guids),
-                Project.company_guid == company_guid
-            )
-            result = await session.execute(query)
-            valid_project_guids = {str(row[0]).lower() for row in result.all()}
-            logger.debug(f"Valid project GUIDs: {valid_project_guids}")
-        else:
-            valid_project_guids = set()
-        valid_component_guids = set()
-        component_project_map = {}
-        if component_guids:
-            query = select(Component.guid, Component.project_guid).where(
-                Component.guid.in_(component_guids),
-                Component.company_guid == company_guid
-            )
-            result = await session.execute(query)
-            rows = result.all()
-            for row in rows:
-                component_guid_str = str(row[0]).lower()
-                valid_component_guids.add(component_guid_str)
-                if row[1] is not None:
-                    component_project_map[component_guid_str] = str(row[1]).lower()
-                else:
-                    logger.warning(f"Component {component_guid_str} has NULL project_guid")
-            logger.debug(f"Valid component GUIDs: {valid_component_guids}")
-            logger.debug(f"Component->Project map: {component_project_map}")
         for i, assembly in enumerate(assemblies_data):
             if assembly.company_guid is not None and assembly.company_guid != company_guid:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=f"Assembly at index {i} has company_guid that doesn't match the authenticated user's company"
                 )
-            if assembly.project_guid and str(assembly.project_guid).lower() not in valid_project_guids:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Assembly at index {i} references a project that doesn't exist or doesn't belong to your company"
-                )
-            component_guid_str = str(assembly.component_guid).lower()
-            if assembly.component_guid and component_guid_str not in valid_component_guids:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Assembly at index {i} references a component that doesn't exist or doesn't belong to your company"
-                )
-            if assembly.project_guid and assembly.component_guid:
-                project_guid_str = str(assembly.project_guid).lower()
-                if component_guid_str not in component_project_map:
-                    direct_query = select(Component.project_guid).where(
-                        Component.guid == assembly.component_guid,
-                        Component.company_guid == company_guid
-                    )
-                    direct_result = await session.execute(direct_query)
-                    direct_project_guid = direct_result.scalar_one_or_none()
-                    if direct_project_guid is None:
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail=f"Assembly at index {i} references a component that has no project association"
-                        )
-                    else:
-                        logger.error(f"Assembly validation error: Component {component_guid_str} has project_guid={direct_project_guid} but wasn't in the component_project_map")
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail=f"Assembly at index {i} references a component with inconsistent project data. Please verify the component's project association."
-                        )
-                component_project_guid = component_project_map[component_guid_str]
-                if component_project_guid != project_guid_str:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Assembly at index {i} has mismatched project/component relationship. Component '{component_guid_str}' belongs to project '{component_project_guid}', not '{project_guid_str}'."
-                    )
         guid_set = set()
         for i, assembly in enumerate(assemblies_data):
             if assembly.guid:
@@ -309,120 +283,29 @@ class SyncService:
                         detail=f"Duplicate GUID found in input data: {assembly.guid}"
                     )
                 guid_set.add(assembly.guid)
-        existing_guids = set()
-        if guid_set:
-            query = select(Assembly.guid, Assembly.is_active, Assembly.deleted_at).where(Assembly.guid.in_(guid_set))
-            result = await session.execute(query)
-            existing_db = {row[0]: (row[1], row[2]) for row in result.all()}
-            existing_guids = set(existing_db.keys())
-        else:
-            existing_db = {}
-        insert_dicts = []
-        update_dicts = []
-        reactivated_dicts = []
-        input_guids = set()
-        for a in assemblies_data:
-            d = a.dict()
-            d['company_guid'] = company_guid
-            input_guids.add(a.guid)
-            if a.guid:
-                if a.guid in existing_guids:
-                    is_active, deleted_at = existing_db[a.guid]
-                    if not is_active:
-                        d['is_active'] = True
-                        d['deleted_at'] = None
-                        reactivated_dicts.append(d)
-                    else:
-                        update_dicts.append(d)
-                else:
-                    insert_dicts.append(d)
-            else:
-                d['guid'] = uuid.uuid4()
-                insert_dicts.append(d)
-        inserted_count = 0
-        if insert_dicts:
-            insert_stmt = insert(Assembly).values(insert_dicts)
-            await session.execute(insert_stmt)
-            inserted_count = len(insert_dicts)
-        updated_count = 0
-        for update_dict in update_dicts:
-            guid = update_dict.pop('guid')
-            update_stmt = update(Assembly).where(Assembly.guid == guid).values(**update_dict)
-            update_result = await session.execute(update_stmt)
-            updated_count += update_result.rowcount
-        for reactivate_dict in reactivated_dicts:
-            guid = reactivate_dict.pop('guid')
-            update_stmt = update(Assembly).where(Assembly.guid == guid).values(**reactivate_dict)
-            await session.execute(update_stmt)
-            updated_count += 1
-        db_query = select(Assembly.guid).where(Assembly.company_guid == company_guid, Assembly.is_active == True)
-        db_result = await session.execute(db_query)
-        db_guids = {row[0] for row in db_result.all()}
-        missing_guids = db_guids - input_guids
-        for missing_guid in missing_guids:
-            await SyncService.cascade_soft_delete('assembly', missing_guid, session)
-        await session.commit()
-        return {"inserted": inserted_count, "updated": updated_count}
+        await SyncService._check_tombstones(
+            'assembly', assemblies_data, company_guid, session, delta, deleted_guids, deleted_original_ids
+        )
+        if resolver is None:
+            resolver = ReferenceResolver(session, company_guid)
+        counts = await SyncService._upsert_rows(Assembly, assemblies_data, company_guid, session, resolver)
+        counts["deleted"] = await SyncService._remove_rows(
+            'assembly', assemblies_data, company_guid, session, delta, deleted_guids, deleted_original_ids
+        )
+        if commit:
+            await session.commit()
+        return counts
     
     @staticmethod
-    async def sync_pieces(pieces_data: List[PieceCreate], company_guid: uuid.UUID, session: AsyncSession) -> Dict[str, int]:
+    async def sync_pieces(pieces_data: List[PieceCreate], company_guid: uuid.UUID, session: AsyncSession, resolver: Optional[ReferenceResolver] = None, ingest: Optional[str] = None, delta: bool = False, deleted_guids: Optional[List[uuid.UUID]] = None, deleted_original_ids: Optional[List[int]] = None, commit: bool = True) -> Dict[str, int]:
         if isinstance(company_guid, str):
             company_guid = uuid.UUID(company_guid)
-        project_guids = set()
-        component_guids = set()
-        assembly_guids = set()
-        for piece in pieces_data:
-            if piece.project_guid:
-                project_guids.add(piece.project_guid)
-            if piece.component_guid:
-                component_guids.add(piece.component_guid)
-            if piece.assembly_guid:
-                assembly_guids.add(piece.assembly_guid)
-        valid_project_guids = set()
-        if project_guids:
-            query = select(Project.guid).where(
-                Project.guid.in_(project_guids),
-                Project.company_guid == company_guid
-            )
-            result = await session.execute(query)
-            valid_project_guids = {str(row[0]).lower() for row in result.all()}
-        valid_component_guids = set()
-        if component_guids:
-            query = select(Component.guid).where(
-                Component.guid.in_(component_guids),
-                Component.company_guid == company_guid
-            )
-            result = await session.execute(query)
-            valid_component_guids = {str(row[0]).lower() for row in result.all()}
-        valid_assembly_guids = set()
-        if assembly_guids:
-            query = select(Assembly.guid).where(
-                Assembly.guid.in_(assembly_guids),
-                Assembly.company_guid == company_guid
-            )
-            result = await session.execute(query)
-            valid_assembly_guids = {str(row[0]).lower() for row in result.all()}
         for i, piece in enumerate(pieces_data):
             if piece.company_guid is not None and piece.company_guid != company_guid:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=f"Piece at index {i} has company_guid that doesn't match the authenticated user's company"
                 )
-            if piece.project_guid and str(piece.project_guid).lower() not in valid_project_guids:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Piece at index {i} references a project that doesn't exist or doesn't belong to your company"
-                )
-            if piece.component_guid and str(piece.component_guid).lower() not in valid_component_guids:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Piece at index {i} references a component that doesn't exist or doesn't belong to your company"
-                )
-            if piece.assembly_guid and str(piece.assembly_guid).lower() not in valid_assembly_guids:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Piece at index {i} references an assembly that doesn't exist or doesn't belong to your company"
-                )
         guid_set = set()
         for i, piece in enumerate(pieces_data):
             if piece.guid:
@@ -432,104 +315,29 @@ class SyncService:
                         detail=f"Duplicate GUID found in input data: {piece.guid}"
                     )
                 guid_set.add(piece.guid)
-        existing_guids = set()
-        if guid_set:
-            query = select(Piece.guid, Piece.is_active, Piece.deleted_at).where(Piece.guid.in_(guid_set))
-            result = await session.execute(query)
-            existing_db = {row[0]: (row[1], row[2]) for row in result.all()}
-            existing_guids = set(existing_db.keys())
-        else:
-            existing_db = {}
-        insert_dicts = []
-        update_dicts = []
-        reactivated_dicts = []
-        input_guids = set()
-        for p in pieces_data:
-            d = p.dict()
-            d['company_guid'] = company_guid
-            input_guids.add(p.guid)
-            if p.guid:
-                if p.guid in existing_guids:
-                    is_active, deleted_at = existing_db[p.guid]
-                    if not is_active:
-                        d['is_active'] = True
-                        d['deleted_at'] = None
-                        reactivated_dicts.append(d)
-                    else:
-                        update_dicts.append(d)
-                else:
-                    insert_dicts.append(d)
-            else:
-                d['guid'] = uuid.uuid4()
-                insert_dicts.append(d)
-        inserted_count = 0
-        if insert_dicts:
-            insert_stmt = insert(Piece).values(insert_dicts)
-            await session.execute(insert_stmt)
-            inserted_count = len(insert_dicts)
-        updated_count = 0
-        for update_dict in update_dicts:
-            guid = update_dict.pop('guid')
-            update_stmt = update(Piece).where(Piece.guid == guid).values(**update_dict)
-            update_result = await session.execute(update_stmt)
-            updated_count += update_result.rowcount
-        for reactivate_dict in reactivated_dicts:
-            guid = reactivate_dict.pop('guid')
-            update_stmt = update(Piece).where(Piece.guid == guid).values(**reactivate_dict)
-            await session.execute(update_stmt)
-            updated_count += 1
-        db_query = select(Piece.guid).where(Piece.company_guid == company_guid, Piece.is_active == True)
-        db_result = await session.execute(db_query)
-        db_guids = {row[0] for row in db_result.all()}
-        missing_guids = db_guids - input_guids
-        for missing_guid in missing_guids:
-            await SyncService.cascade_soft_delete('piece', missing_guid, session)
-        await session.commit()
-        return {"inserted": inserted_count, "updated": updated_count}
+        await SyncService._check_tombstones(
+            'piece', pieces_data, company_guid, session, delta, deleted_guids, deleted_original_ids
+        )
+        if resolver is None:
+            resolver = ReferenceResolver(session, company_guid)
+        counts = await SyncService._upsert_rows(Piece, pieces_data, company_guid, session, resolver, ingest)
+        counts["deleted"] = await SyncService._remove_rows(
+            'piece', pieces_data, company_guid, session, delta, deleted_guids, deleted_original_ids
+        )
+        if commit:
+            await session.commit()
+        return counts
     
     @staticmethod
-    async def sync_articles(articles_data: List[ArticleCreate], company_guid: uuid.UUID, session: AsyncSession) -> Dict[str, int]:
+    async def sync_articles(articles_data: List[ArticleCreate], company_guid: uuid.UUID, session: AsyncSession, resolver: Optional[ReferenceResolver] = None, delta: bool = False, deleted_guids: Optional[List[uuid.UUID]] = None, deleted_original_ids: Optional[List[int]] = None, commit: bool = True) -> Dict[str, int]:
         if isinstance(company_guid, str):
             company_guid = uuid.UUID(company_guid)
-        project_guids = set()
-        component_guids = set()
-        for article in articles_data:
-            if article.project_guid:
-                project_guids.add(article.project_guid)
-            if article.component_guid:
-                component_guids.add(article.component_guid)
-        valid_project_guids = set()
-        if project_guids:
-            query = select(Project.guid).where(
-                Project.guid.in_(project_guids),
-                Project.company_guid == company_guid
-            )
-            result = await session.execute(query)
-            valid_project_guids = {str(row[0]).lower() for row in result.all()}
-        valid_component_guids = set()
-        if component_guids:
-            query = select(Component.guid).where(
-                Component.guid.in_(component_guids),
-                Component.company_guid == company_guid
-            )
-            result = await session.execute(query)
-            valid_component_guids = {str(row[0]).lower() for row in result.all()}
         for i, article in enumerate(articles_data):
             if article.company_guid is not None and article.company_guid != company_guid:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=f"Article at index {i} has company_guid that doesn't match the authenticated user's company"
                 )
-            if article.project_guid and str(article.project_guid).lower() not in valid_project_guids:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Article at index {i} references a project that doesn't exist or doesn't belong to your company"
-                )
-            if article.component_guid and str(article.component_guid).lower() not in valid_component_guids:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Article at index {i} references a component that doesn't exist or doesn't belong to your company"
-                )
         guid_set = set()
         for i, article in enumerate(articles_data):
             if article.guid:
@@ -539,219 +347,291 @@ class SyncService:
                         detail=f"Duplicate GUID found in input data: {article.guid}"
                     )
                 guid_set.add(article.guid)
-        existing_guids = set()
-        if guid_set:
-            query = select(Article.guid, Article.is_active, Article.deleted_at).where(Article.guid.in_(guid_set))
-            result = await session.execute(query)
-            existing_db = {row[0]: (row[1], row[2]) for row in result.all()}
-            existing_guids = set(existing_db.keys())
-        else:
-            existing_db = {}
-        insert_dicts = []
-        update_dicts = []
-        reactivated_dicts = []
-        input_guids = set()
-        for a in articles_data:
-            d = a.dict()
-            d['company_guid'] = company_guid
-            input_guids.add(a.guid)
-            if a.guid:
-                if a.guid in existing_guids:
-                    is_active, deleted_at = existing_db[a.guid]
-                    if not is_active:
-                        d['is_active'] = True
-                        d['deleted_at'] = None
-                        reactivated_dicts.append(d)
-                    else:
-                        update_dicts.append(d)
-                else:
-                    insert_dicts.append(d)
-            else:
-                d['guid'] = uuid.uuid4()
-                insert_dicts.append(d)
-        inserted_count = 0
-        if insert_dicts:
-            insert_stmt = insert(Article).values(insert_dicts)
-            await session.execute(insert_stmt)
-            inserted_count = len(insert_dicts)
-        updated_count = 0
-        for update_dict in update_dicts:
-            guid = update_dict.pop('guid')
-            update_stmt = update(Article).where(Article.guid == guid).values(**update_dict)
-            update_result = await session.execute(update_stmt)
-            updated_count += update_result.rowcount
-        for reactivate_dict in reactivated_dicts:
-            guid = reactivate_dict.pop('guid')
-            update_stmt = update(Article).where(Article.guid == guid).values(**reactivate_dict)
-            await session.execute(update_stmt)
-            updated_count += 1
-        db_query = select(Article.guid).where(Article.company_guid == company_guid, Article.is_active == True)
-        db_result = await session.execute(db_query)
-        db_guids = {row[0] for row in db_result.all()}
-        missing_guids = db_guids - input_guids
-        for missing_guid in missing_guids:
-            await SyncService.cascade_soft_delete('article', missing_guid, session)
-        await session.commit()
-        return {"inserted": inserted_count, "updated": updated_count}
+        await SyncService._check_tombstones(
+            'article', articles_data, company_guid, session, delta, deleted_guids, deleted_original_ids
+        )
+        if resolver is None:
+            resolver = ReferenceResolver(session, company_guid)
+        counts = await SyncService._upsert_rows(Article, articles_data, company_guid, session, resolver)
+        counts["deleted"] = await SyncService._remove_rows(
+            'article', articles_data, company_guid, session, delta, deleted_guids, deleted_original_ids
+        )
+        if commit:
+            await session.commit()
+        return counts
+    
+    @staticmethod
+    async def dry_run(
+        entity_type: str,
+        session: AsyncSession,
+        sync: Callable[[], Awaitable[Dict[str, int]]]
+    ) -> Dict[str, Any]:
+        """
+        Run a sync without keeping it: sync must not commit, and everything it wrote is rolled back.
+        The diff comes from the same set-based statements as a real sync, so the counts match
+        what committing would do. Returns the counts plus up to DRY_RUN_SAMPLE_SIZE GUIDs
+        each of the inserted, updated, reactivated and soft deleted entity_type rows.
+        """
+        diff = SyncDiff(SyncService.DRY_RUN_SAMPLE_SIZE)
+        session.info["sync_diff"] = diff
+        try:
+            counts = await sync()
+        finally:
+            del session.info["sync_diff"]
+            await session.rollback()
+        return {**counts, "samples": {**diff.samples, "deleted": diff.deleted[entity_type]}}
     
     @staticmethod
     async def run_full_sync(
         data: Dict[str, Any], 
         company_guid: uuid.UUID,
-        session: AsyncSession
-    ) -> Dict[str, Dict[str, int]]:
-        """Run a full synchronization for all entity types."""
-        result = SyncResult()
+        session: AsyncSession,
+        on_stage: Optional[Callable[[str, Dict[str, int]], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a full synchronization for all entity types in one transaction.
+        Each stage runs in its own savepoint and nothing is committed until every stage
+        succeeded; any failure rolls the whole sync back. Parent references are resolved
+        once per request by a shared ReferenceResolver.
+        on_stage, if given, is awaited with the entity type and counts after each stage.
+        Returns the counts per entity type plus the duration of each stage in seconds.
+        """
+        if isinstance(company_guid, str):
+            company_guid = uuid.UUID(company_guid)
+        resolver = ReferenceResolver(session, company_guid)
+        result = {"timings": {}}
         
         # Synchronize all provided entity types
-        if "projects" in data and data["projects"]:
-            result.projects = await SyncService.sync_projects(data["projects"], company_guid, session)
-        
-        if "components" in data and data["components"]:
-            result.components = await SyncService.sync_components(data["components"], company_guid, session)
+        try:
+            for entity in SyncService.FULL_SYNC_STAGES:
+                if not data.get(entity):
+                    continue
+                sync = getattr(SyncService, f"sync_{entity}")
+                kwargs = {"commit": False}
+                if entity != "projects":
+                    kwargs["resolver"] = resolver
+                started = time.perf_counter()
+                async with session.begin_nested():
+                    result[entity] = await sync(data[entity], company_guid, session, **kwargs)
+                result["timings"][entity] = time.perf_counter() - started
+                if on_stage is not None:
+                    await on_stage(entity, result[entity])
+            
+            started = time.perf_counter()
+            await session.commit()
+            result["timings"]["commit"] = time.perf_counter() - started
+        except Exception:
+            await session.rollback()
+            raise
         
-        if "assemblies" in data and data["assemblies"]:
-            result.assemblies = await SyncService.sync_assemblies(data["assemblies"], company_guid, session)
+        logger.info(f"Full sync for company {company_guid} finished, stage timings: {result['timings']}")
+        return FullSyncResult(**result).model_dump()
+    
+    @staticmethod
+    async def run_parallel_full_sync(
+        data: Dict[str, Any],
+        company_guid: uuid.UUID,
+        on_stage: Optional[Callable[[str, Dict[str, int]], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a full synchronization as a graph of stages, each on its own pooled connection
+        with the tenant context set. A stage starts as soon as the stages it depends on
+        (FULL_SYNC_DEPENDENCIES) have committed, so articles sync alongside assemblies and pieces.
+        Unlike run_full_sync every stage commits on its own: when one fails, the stages
+        depending on it are skipped, stages already committed stay, and the first error is
+        raised once the running stages have finished.
+        Returns the same result as run_full_sync, with the total wall-clock time instead of commit.
+        """
+        if isinstance(company_guid, str):
+            company_guid = uuid.UUID(company_guid)
+        result = {"timings": {}}
+        tasks: Dict[str, asyncio.Task] = {}
         
-        if "pieces" in data and data["pieces"]:
-            result.pieces = await SyncService.sync_pieces(data["pieces"], company_guid, session)
+        async def run_stage(entity: str) -> None:
+            for dependency in SyncService.FULL_SYNC_DEPENDENCIES[entity]:
+                if dependency in tasks:
+                    # Re-raises the dependency's error, which skips this stage
+                    await tasks[dependency]
+            started = time.perf_counter()
+            async with async_session_factory() as session:
+                await set_tenant_for_session(session, str(company_guid))
+                sync = getattr(SyncService, f"sync_{entity}")
+                result[entity] = await sync(data[entity], company_guid, session)
+            result["timings"][entity] = time.perf_counter() - started
+            if on_stage is not None:
+                await on_stage(entity, result[entity])
         
-        if "articles" in data and data["articles"]:
-            result.articles = await SyncService.sync_articles(data["articles"], company_guid, session)
+        started = time.perf_counter()
+        # Parents first, so that every stage finds the tasks it waits for
+        for entity in SyncService.FULL_SYNC_STAGES:
+            if data.get(entity):
+                tasks[entity] = asyncio.create_task(run_stage(entity))
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        result["timings"]["total"] = time.perf_counter() - started
         
-        return result.dict()
+        errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        if errors:
+            logger.warning(f"Parallel full sync for company {company_guid} failed after committing {[e for e in tasks if e in result]}")
+            raise errors[0]
+        logger.info(f"Parallel full sync for company {company_guid} finished, stage timings: {result['timings']}")
+        return FullSyncResult(**result).model_dump()
     
+    @staticmethod
+    async def _check_tombstones(entity_type: str, items: List[Any], company_guid: uuid.UUID, session: AsyncSession, delta: bool = False, deleted_guids=None, deleted_original_ids=None) -> None:
+        """
+        Validate the deletion side of a sync before anything is locked or written.
+        Tombstones are only accepted in delta mode, may not name a row that is also sent,
+        and must name rows of the company (soft deleted ones included). Raises 400 otherwise.
+        """
+        deleted_guids = set(deleted_guids or ())
+        deleted_original_ids = set(deleted_original_ids or ())
+        if not deleted_guids and not deleted_original_ids:
+            return
+        if not delta:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="deleted_guids and deleted_original_ids are only accepted in delta mode"
+            )
+        conflicting = {item.guid for item in items} & deleted_guids
+        if conflicting:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"GUID found in both input data and deleted_guids: {next(iter(conflicting))}"
+            )
+        conflicting = {item.original_id for item in items} & deleted_original_ids
+        if conflicting:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"original_id found in both input data and deleted_original_ids: {next(iter(conflicting))}"
+            )
+
+        model = CASCADE_MODELS[entity_type]
+        result = await session.execute(
+            select(model.guid, model.original_id).where(
+                model.company_guid == company_guid,
+                or_(model.guid.in_(deleted_guids), model.original_id.in_(deleted_original_ids)),
+            )
+        )
+        found = result.all()
+        unknown_guids = deleted_guids - {guid for guid, _ in found}
+        unknown_ids = deleted_original_ids - {original_id for _, original_id in found}
+        if unknown_guids or unknown_ids:
+            field, value = ("deleted_guids", next(iter(unknown_guids))) if unknown_guids else ("deleted_original_ids", next(iter(unknown_ids)))
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{field} names {entity_type} {value} that doesn't exist or doesn't belong to your company"
+            )
+
+    @staticmethod
+    async def _remove_rows(entity_type: str, items: List[Any], company_guid: uuid.UUID, session: AsyncSession, delta: bool = False, deleted_guids=None, deleted_original_ids=None) -> int:
+        """
+        Apply the deletion side of a sync, checked beforehand by _check_tombstones. Does not commit.
+        Full mode soft deletes every company row missing from items; delta mode only soft
+        deletes the rows named by deleted_guids/deleted_original_ids.
+        Returns the number of entity_type rows soft deleted.
+        """
+        if not delta:
+            input_guids = {item.guid for item in items}
+            return await SyncService.soft_delete_missing(entity_type, company_guid, input_guids, session)
+        return await SyncService.soft_delete_tombstones(
+            entity_type, company_guid, set(deleted_guids or ()), set(deleted_original_ids or ()), session
+        )
+
+    @staticmethod
+    async def soft_delete_tombstones(entity_type: str, company_guid: uuid.UUID, deleted_guids, deleted_original_ids, session: AsyncSession) -> int:
+        """
+        Soft delete, with cascade, the company's active rows of entity_type named by delta sync tombstones.
+        Does not commit. Returns the number of entity_type rows soft deleted.
+        """
+        if not deleted_guids and not deleted_original_ids:
+            return 0
+        await SyncService._lock_cascade(entity_type, company_guid, session)
+        counts = await bulk_soft_delete_tombstones(
+            session, entity_type, company_guid, deleted_guids, deleted_original_ids, datetime.datetime.utcnow()
+        )
+        logger.debug(f"Soft deleted tombstoned {entity_type}s: {counts}")
+        return counts.get(entity_type, 0)
+
+    @staticmethod
+    async def soft_delete_missing(entity_type: str, company_guid: uuid.UUID, input_guids, session: AsyncSession) -> int:
+        """
+        Soft delete the company's active rows of entity_type that are not in input_guids, with cascade.
+        Detection runs inside PostgreSQL, so the company's GUIDs are never loaded into Python.
+        Does not commit. Returns the number of entity_type rows soft deleted.
+        """
+        await SyncService._lock_cascade(entity_type, company_guid, session)
+        counts = await bulk_soft_delete_missing(
+            session, entity_type, company_guid, input_guids, datetime.datetime.utcnow()
+        )
+        logger.debug(f"Soft deleted {entity_type}s missing from sync payload: {counts}")
+        return counts.get(entity_type, 0)
+
     @staticmethod
     async def cascade_soft_delete(entity_type: str, guid: uuid.UUID, session: AsyncSession, deleted_at=None):
         """
-        Recursively soft delete the entity and all its active children.
+        Soft delete the entity and all its active children.
         entity_type: one of 'project', 'component', 'assembly', 'piece', 'article'
         guid: the guid of the entity to soft delete
         session: SQLAlchemy AsyncSession
         deleted_at: timestamp to use for deleted_at (if None, use a single utcnow() for the whole cascade)
         """
+        await SyncService.cascade_soft_delete_many(entity_type, [guid], session, deleted_at=deleted_at)
+
+    @staticmethod
+    async def cascade_soft_delete_many(entity_type: str, guids, session: AsyncSession, deleted_at=None, commit: bool = True) -> Dict[str, int]:
+        """
+        Soft delete a set of entities of one type and all their active descendants.
+        Runs as one set-based statement (one UPDATE per table) instead of recursing per GUID.
+        entity_type: one of 'project', 'component', 'assembly', 'piece', 'article'
+        guids: the guids of the entities to soft delete
+        session: SQLAlchemy AsyncSession
+        deleted_at: timestamp to use for deleted_at (if None, use a single utcnow() for the whole cascade)
+        commit: commit the session afterwards; pass False when the caller owns the transaction
+        Returns the number of soft deleted rows per entity type.
+        """
+        if entity_type not in CASCADE_MODELS:
+            raise ValueError(f"Unknown entity_type: {entity_type}")
+        if not guids:
+            return {}
         if deleted_at is None:
             deleted_at = datetime.datetime.utcnow()
-        # Map entity_type to model and children
-        entity_map = {
-            'project': (Project, [Component, Assembly, Piece, Article], 'project_guid'),
-            'component': (Component, [Assembly, Piece, Article], 'component_guid'),
-            'assembly': (Assembly, [Piece], 'assembly_guid'),
-            'piece': (Piece, [], None),
-            'article': (Article, [], None),
-        }
-        if entity_type not in entity_map:
-            raise ValueError(f"Unknown entity_type: {entity_type}")
-        model, children, fk_field = entity_map[entity_type]
-        # Soft delete the parent (always execute for the given guid)
-        await session.execute(
-            update(model)
-            .where(model.guid == guid)
-            .values(is_active=False, deleted_at=deleted_at)
-        )
-        # Audit log: fetch company_guid
-        result = await session.execute(select(model.company_guid).where(model.guid == guid))
-        company_guid = result.scalar_one_or_none()
-        if company_guid:
-            await WorkflowService.create_workflow_entry(
-                action_type=WorkflowActionType.SOFT_DELETE,
-                company_guid=company_guid,
-                action_value=f"Soft deleted {entity_type} {guid}",
-                session=session
-            )
-        # Cascade to children
-        table_to_entity_type = {
-            "projects": "project",
-            "components": "component",
-            "assemblies": "assembly",
-            "pieces": "piece",
-            "articles": "article"
-        }
-        for child_model in children:
-            child_fk = fk_field
-            if child_fk is None:
-                continue
-            # Find all active children
-            result = await session.execute(
-                select(child_model.guid)
-                .where(getattr(child_model, child_fk) == guid, child_model.is_active == True)
-            )
-            child_guids = [row[0] for row in result.all()]
-            for child_guid in child_guids:
-                child_type = table_to_entity_type[child_model.__tablename__]
-                await SyncService.cascade_soft_delete(child_type, child_guid, session, deleted_at=deleted_at)
-        await session.commit()
+        await SyncService._lock_cascade_roots(entity_type, guids, session)
+        counts = await bulk_cascade_soft_delete(session, entity_type, guids, deleted_at)
+        logger.debug(f"Cascade soft delete of {len(guids)} {entity_type}(s): {counts}")
+        if commit:
+            await session.commit()
+        return counts
 
     @staticmethod
     async def cascade_restore(entity_type: str, guid: uuid.UUID, session: AsyncSession, deleted_at=None):
         """
-        Recursively restore the entity and all its children that were deleted in the same operation (matching deleted_at).
+        Restore the entity and all its children that were deleted in the same operation (matching deleted_at).
         entity_type: one of 'project', 'component', 'assembly', 'piece', 'article'
         guid: the guid of the entity to restore
         session: SQLAlchemy AsyncSession
         deleted_at: timestamp to match for children (if None, fetch from parent)
         """
-        # Map entity_type to model and children
-        entity_map = {
-            'project': (Project, [Component, Assembly, Piece, Article], 'project_guid'),
-            'component': (Component, [Assembly, Piece, Article], 'component_guid'),
-            'assembly': (Assembly, [Piece], 'assembly_guid'),
-            'piece': (Piece, [], None),
-            'article': (Article, [], None),
-        }
-        if entity_type not in entity_map:
-            raise ValueError(f"Unknown entity_type: {entity_type}")
-        model, children, fk_field = entity_map[entity_type]
-
-        # Fetch parent's deleted_at if not provided
-        if deleted_at is None:
-            result = await session.execute(
-                select(model.deleted_at).where(model.guid == guid)
-            )
-            parent_deleted_at = result.scalar_one_or_none()
-            if parent_deleted_at is None:
-                # Already restored or not found
-                return
-            deleted_at = parent_deleted_at
+        await SyncService.cascade_restore_many(entity_type, [guid], session, deleted_at=deleted_at)
 
-        # Restore the parent
-        await session.execute(
-            update(model)
-            .where(model.guid == guid, model.is_active == False)
-            .values(is_active=True, deleted_at=None)
-        )
-        # Audit log: fetch company_guid
-        result = await session.execute(select(model.company_guid).where(model.guid == guid))
-        company_guid = result.scalar_one_or_none()
-        if company_guid:
-            await WorkflowService.create_workflow_entry(
-                action_type=WorkflowActionType.RESTORE,
-                company_guid=company_guid,
-                action_value=f"Restored {entity_type} {guid}",
-                session=session
-            )
-
-        # Cascade restore to children with matching deleted_at
-        table_to_entity_type = {
-            "projects": "project",
-            "components": "component",
-            "assemblies": "assembly",
-            "pieces": "piece",
-            "articles": "article"
-        }
-        for child_model in children:
-            child_fk = fk_field
-            if child_fk is None:
-                continue
-            # Find all children with matching deleted_at
-            result = await session.execute(
-                select(child_model.guid)
-                .where(getattr(child_model, child_fk) == guid,
-                       child_model.is_active == False,
-                       child_model.deleted_at == deleted_at)
-            )
-            child_guids = [row[0] for row in result.all()]
-            for child_guid in child_guids:
-                child_type = table_to_entity_type[child_model.__tablename__]
-                await SyncService.cascade_restore(child_type, child_guid, session, deleted_at=deleted_at)
-        await session.commit() 
\ No newline at end of file
+    @staticmethod
+    async def cascade_restore_many(entity_type: str, guids, session: AsyncSession, deleted_at=None, commit: bool = True) -> Dict[str, int]:
+        """
+        Restore a set of entities of one type and every descendant whose deleted_at matches its root's.
+        Runs as one set-based statement (one UPDATE per table) instead of walking the tree per child.
+        entity_type: one of 'project', 'component', 'assembly', 'piece', 'article'
+        guids: the guids of the entities to restore
+        session: SQLAlchemy AsyncSession
+        deleted_at: timestamp to match for children (if None, each root's own deleted_at is used)
+        commit: commit the session afterwards; pass False when the caller owns the transaction
+        Returns the number of restored rows per entity type.
+        """
+        if entity_type not in CASCADE_MODELS:
+            raise ValueError(f"Unknown entity_type: {entity_type}")
+        if not guids:
+            return {}
+        await SyncService._lock_cascade_roots(entity_type, guids, session)
+        counts = await bulk_cascade_restore(session, entity_type, guids, deleted_at)
+        logger.debug(f"Cascade restore of {len(guids)} {entity_type}(s): {counts}")
+        if commit:
+            await session.commit()
+        return counts
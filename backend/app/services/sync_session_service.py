@@ -0,0 +1,244 @@
+from typing import Dict, Any, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from pydantic import ValidationError
+from fastapi import HTTPException, status
+import uuid
+import json
+import logging
+import datetime
+
+from app.core.config import settings
+from app.models.sync_session import SyncSession, SyncSessionChunk
+from app.schemas.sync.main import (
+    ProjectBulkInsert, ComponentBulkInsert, AssemblyBulkInsert,
+    PieceBulkInsert, ArticleBulkInsert, STORED_PAYLOAD_CONTEXT
+)
+from app.services.sync_service import SyncService
+
+# Set up logging
+logger = logging.getLogger("app.services.sync_session_service")
+
+class SyncSessionService:
+    """
+    Service for chunked sync uploads.
+
+    A session stages numbered chunks server-side; committing applies all of them
+    as one sync in a single transaction, so chunks never soft delete each other.
+    """
+
+    # Rows accepted per chunk, matching the single-request sync limit
+    MAX_CHUNK_SIZE = 1000
+
+    # Body schema of a chunk for each entity type
+    CHUNK_SCHEMAS = {
+        "projects": ProjectBulkInsert,
+        "components": ComponentBulkInsert,
+        "assemblies": AssemblyBulkInsert,
+        "pieces": PieceBulkInsert,
+        "articles": ArticleBulkInsert,
+    }
+
+    @staticmethod
+    async def open_session(entity_type: str, mode: str, company_guid: uuid.UUID, session: AsyncSession) -> SyncSession:
+        """
+        Open a sync session for one entity type, dropping the company's expired sessions.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        await session.execute(
+            delete(SyncSession).where(
+                SyncSession.company_guid == company_guid,
+                SyncSession.expires_at < now
+            )
+        )
+        sync_session = SyncSession(
+            company_guid=company_guid,
+            entity_type=entity_type,
+            mode=mode,
+            status="open",
+            expires_at=now + datetime.timedelta(hours=settings.SYNC_SESSION_TTL_HOURS)
+        )
+        session.add(sync_session)
+        await session.commit()
+        await session.refresh(sync_session)
+        return sync_session
+
+    @staticmethod
+    async def get_session(session_guid: uuid.UUID, company_guid: uuid.UUID, session: AsyncSession, lock: Optional[str] = None) -> SyncSession:
+        """
+        Fetch a sync session of the company, optionally locking its row ('share' or 'update').
+        Raises 404 if it doesn't exist or belongs to another company.
+        """
+        query = select(SyncSession).where(
+            SyncSession.guid == session_guid,
+            SyncSession.company_guid == company_guid
+        )
+        if lock:
+            query = query.with_for_update(read=lock == "share")
+        sync_session = (await session.execute(query)).scalar_one_or_none()
+        if not sync_session:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Sync session {session_guid} not found"
+            )
+        return sync_session
+
+    @staticmethod
+    def _ensure_open(sync_session: SyncSession) -> None:
+        """Raise 409 if the session is no longer open, 410 if it has expired."""
+        if sync_session.status != "open":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Sync session {sync_session.guid} is {sync_session.status}"
+            )
+        if sync_session.expires_at < datetime.datetime.now(datetime.timezone.utc):
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail=f"Sync session {sync_session.guid} has expired"
+            )
+
+    @staticmethod
+    async def describe_session(sync_session: SyncSession, session: AsyncSession) -> Dict[str, Any]:
+        """Session fields plus the number of staged chunks and rows."""
+        query = select(
+            func.count(),
+            func.coalesce(func.sum(SyncSessionChunk.row_count), 0)
+        ).where(SyncSessionChunk.session_guid == sync_session.guid)
+        chunk_count, row_count = (await session.execute(query)).one()
+        return {
+            "guid": sync_session.guid,
+            "entity_type": sync_session.entity_type,
+            "mode": sync_session.mode,
+            "status": sync_session.status,
+            "created_at": sync_session.created_at,
+            "expires_at": sync_session.expires_at,
+            "committed_at": sync_session.committed_at,
+            "chunk_count": chunk_count,
+            "row_count": row_count,
+            "result": sync_session.result,
+        }
+
+    @staticmethod
+    async def upload_chunk(
+        session_guid: uuid.UUID,
+        chunk_number: int,
+        body: Dict[str, Any],
+        company_guid: uuid.UUID,
+        session: AsyncSession
+    ) -> Dict[str, Any]:
+        """
+        Validate a chunk and stage it under its number.
+        Uploading the same number again replaces the chunk, so retries are idempotent.
+        The session row is share-locked, so chunks upload in parallel but not during a commit.
+        """
+        sync_session = await SyncSessionService.get_session(session_guid, company_guid, session, lock="share")
+        SyncSessionService._ensure_open(sync_session)
+
+        schema = SyncSessionService.CHUNK_SCHEMAS[sync_session.entity_type]
+        try:
+            chunk = schema.model_validate(body)
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=json.loads(e.json(include_url=False))
+            )
+        items = getattr(chunk, sync_session.entity_type)
+        if len(items) > SyncSessionService.MAX_CHUNK_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Maximum chunk size is {SyncSessionService.MAX_CHUNK_SIZE} {sync_session.entity_type}"
+            )
+        for i, item in enumerate(items):
+            if item.company_guid is not None and str(item.company_guid) != str(company_guid):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail=f"Item at index {i} has company_guid that doesn't match the authenticated user's company"
+                )
+
+        stmt = insert(SyncSessionChunk).values(
+            session_guid=session_guid,
+            chunk_number=chunk_number,
+            row_count=len(items),
+            payload=SyncService.dump_payload(chunk)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SyncSessionChunk.session_guid, SyncSessionChunk.chunk_number],
+            set_={
+                "row_count": stmt.excluded.row_count,
+                "payload": stmt.excluded.payload,
+                "uploaded_at": func.now(),
+            }
+        )
+        await session.execute(stmt)
+        await session.commit()
+        return {"session_guid": session_guid, "chunk_number": chunk_number, "row_count": len(items)}
+
+    @staticmethod
+    async def commit_session(
+        session_guid: uuid.UUID,
+        chunk_count: int,
+        company_guid: uuid.UUID,
+        session: AsyncSession
+    ) -> Dict[str, int]:
+        """
+        Apply all chunks of a session as one sync and commit once.
+        Chunks 1..chunk_count must all be present, so a lost chunk can't turn into deletions.
+        Committing an already committed session returns the stored result.
+        """
+        sync_session = await SyncSessionService.get_session(session_guid, company_guid, session, lock="update")
+        if sync_session.status == "committed":
+            return sync_session.result
+        SyncSessionService._ensure_open(sync_session)
+
+        query = select(SyncSessionChunk.chunk_number, SyncSessionChunk.payload).where(
+            SyncSessionChunk.session_guid == session_guid
+        ).order_by(SyncSessionChunk.chunk_number)
+        chunks = (await session.execute(query)).all()
+        received = [number for number, _ in chunks]
+        if received != list(range(1, chunk_count + 1)):
+            missing = sorted(set(range(1, chunk_count + 1)) - set(received))
+            unexpected = sorted(set(received) - set(range(1, chunk_count + 1)))
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Sync session chunks don't match chunk_count {chunk_count}: missing {missing}, unexpected {unexpected}"
+            )
+
+        entity_type = sync_session.entity_type
+        schema = SyncSessionService.CHUNK_SCHEMAS[entity_type]
+        items, deleted_guids, deleted_original_ids = [], set(), set()
+        for _, payload in chunks:
+            chunk = schema.model_validate(payload, context=STORED_PAYLOAD_CONTEXT)
+            items.extend(getattr(chunk, entity_type))
+            deleted_guids.update(chunk.deleted_guids)
+            deleted_original_ids.update(chunk.deleted_original_ids)
+
+        sync = getattr(SyncService, f"sync_{entity_type}")
+        result = await sync(
+            items, company_guid, session,
+            delta=sync_session.mode == "delta",
+            deleted_guids=deleted_guids,
+            deleted_original_ids=deleted_original_ids,
+            commit=False
+        )
+
+        sync_session.status = "committed"
+        sync_session.result = result
+        sync_session.committed_at = datetime.datetime.now(datetime.timezone.utc)
+        await session.execute(delete(SyncSessionChunk).where(SyncSessionChunk.session_guid == session_guid))
+        await session.commit()
+        logger.info(f"Committed sync session {session_guid}: {len(chunks)} chunks, {len(items)} {entity_type}, {result}")
+        return result
+
+    @staticmethod
+    async def abort_session(session_guid: uuid.UUID, company_guid: uuid.UUID, session: AsyncSession) -> None:
+        """Abort an open session and drop its staged chunks."""
+        sync_session = await SyncSessionService.get_session(session_guid, company_guid, session, lock="update")
+        if sync_session.status != "open":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Sync session {session_guid} is {sync_session.status}"
+            )
+        sync_session.status = "aborted"
+        await session.execute(delete(SyncSessionChunk).where(SyncSessionChunk.session_guid == session_guid))
+        await session.commit()
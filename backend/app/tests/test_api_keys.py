@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Test script for API key authentication through the X-API-Key header.
+Legacy keys are inserted straight into the database the API server uses.
+"""
+
+import os
+import uuid
+import secrets
+import pytest
+import aiohttp
+from typing import Dict, Any
+from sqlalchemy import select, delete
+
+from app.core.database import async_session_factory
+from app.models.apikey import ApiKey
+from app.utils.security import hash_password
+
+# --- Constants ---
+BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+API_PREFIX = "/api/v1"
+COMPANY_GUID = "11111111-1111-1111-1111-111111111111"  # Test Company A (admin1.a@example.com) - predefined
+EMAIL = "admin1.a@example.com"
+PASSWORD = "password"
+
+# --- Helper Functions ---
+
+async def get_auth_token(session: aiohttp.ClientSession) -> str:
+    """Get authentication token for a user."""
+    login_url = f"{BASE_URL}{API_PREFIX}/auth/login"
+    credentials = {"email": EMAIL, "password": PASSWORD}
+    async with session.post(login_url, json=credentials) as response:
+        response.raise_for_status()
+        data = await response.json()
+        return data["access_token"]
+
+async def me_with_api_key(session: aiohttp.ClientSession, api_key: str):
+    """Call /auth/me authenticated by api_key. Returns (status, body)."""
+    async with session.get(f"{BASE_URL}{API_PREFIX}/auth/me", headers={"X-API-Key": api_key}) as response:
+        return response.status, await response.json()
+
+async def insert_legacy_key(raw_key: str) -> uuid.UUID:
+    """Store a key the way it was stored before key prefixes: bcrypt hash, no prefix."""
+    guid = uuid.uuid4()
+    async with async_session_factory() as db:
+        db.add(ApiKey(
+            guid=guid, company_guid=uuid.UUID(COMPANY_GUID), key_hash=hash_password(raw_key),
+            key_prefix=None, description="Legacy test key", scopes="sync:read", is_active=True
+        ))
+        await db.commit()
+    return guid
+
+async def get_key_row(guid: uuid.UUID) -> ApiKey:
+    async with async_session_factory() as db:
+        return (await db.execute(select(ApiKey).where(ApiKey.guid == guid))).scalar_one()
+
+async def remove_key_row(guid: uuid.UUID) -> None:
+    async with async_session_factory() as db:
+        await db.execute(delete(ApiKey).where(ApiKey.guid == guid))
+        await db.commit()
+
+# --- Tests ---
+
+@pytest.mark.asyncio
+async def test_legacy_api_key_is_rehashed_on_first_use():
+    """Test that a bcrypt-hashed key authenticates once the slow way and is then stored as a digest."""
+    raw_key = f"rfk_{secrets.token_urlsafe(24)}"
+    guid = await insert_legacy_key(raw_key)
+    try:
+        async with aiohttp.ClientSession() as session:
+            status, me = await me_with_api_key(session, raw_key)
+            assert status == 200, me
+            assert me["guid"] == str(guid)
+            assert me["api_key_guid"] == str(guid)
+            assert me["auth_type"] == "api_key"
+            assert me["company_guid"] == COMPANY_GUID
+            assert me["scopes"] == "sync:read"
+
+            row = await get_key_row(guid)
+            assert row.key_prefix == raw_key[:12]
+            assert not row.key_hash.startswith("$2"), "Key should no longer be stored as bcrypt"
+
+            # Now found through the prefix lookup
+            status, me = await me_with_api_key(session, raw_key)
+            assert status == 200 and me["guid"] == str(guid)
+    finally:
+        await remove_key_row(guid)
+
+@pytest.mark.asyncio
+async def test_unknown_api_key_is_rejected_while_legacy_keys_remain():
+    """Test that a key matching neither a prefix nor a legacy key gets 401, also when retried."""
+    guid = await insert_legacy_key(f"rfk_{secrets.token_urlsafe(24)}")
+    try:
+        async with aiohttp.ClientSession() as session:
+            unknown_key = f"rfk_{secrets.token_urlsafe(24)}"
+            for _ in range(2):  # the retry is answered from the rejection cache
+                status, body = await me_with_api_key(session, unknown_key)
+                assert status == 401
+                assert body["detail"] == "Invalid API key"
+
+            # The legacy key was checked, not migrated
+            row = await get_key_row(guid)
+            assert row.key_prefix is None and row.key_hash.startswith("$2")
+    finally:
+        await remove_key_row(guid)
+
+@pytest.mark.asyncio
+async def test_custom_api_key_cannot_reuse_a_legacy_key():
+    """Test that a custom key equal to a key still stored as bcrypt is refused."""
+    raw_key = f"rfk_{secrets.token_urlsafe(24)}"
+    guid = await insert_legacy_key(raw_key)
+    try:
+        async with aiohttp.ClientSession() as session:
+            token = await get_auth_token(session)
+            headers = {"Authorization": f"Bearer {token}"}
+            async with session.post(f"{BASE_URL}{API_PREFIX}/api-keys", json={"key": raw_key}, headers=headers) as resp:
+                assert resp.status == 400
+                assert (await resp.json())["detail"] == "An API key with this value already exists"
+
+            # The legacy holder still authenticates as its own key
+            status, me = await me_with_api_key(session, raw_key)
+            assert status == 200 and me["guid"] == str(guid)
+    finally:
+        await remove_key_row(guid)
+
+async def create_api_key(session: aiohttp.ClientSession, headers: Dict[str, str], scopes: str) -> Dict[str, Any]:
+    """Create an API key for Test Company A through the API."""
+    payload = {"description": "Auth test key", "scopes": scopes}
+    async with session.post(f"{BASE_URL}{API_PREFIX}/api-keys", json=payload, headers=headers) as resp:
+        assert resp.status == 201, await resp.text()
+        return await resp.json()
+
+@pytest.mark.asyncio
+async def test_api_key_authenticates_with_its_company_and_scopes():
+    """Test that a valid key authenticates as an API-key user carrying its company, scopes and guid."""
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}"}
+        created = await create_api_key(session, headers, "sync:read")
+        try:
+            status, me = await me_with_api_key(session, created["key"])
+            assert status == 200, me
+            assert me["auth_type"] == "api_key"
+            assert me["role"] == "Integration"
+            assert me["company_guid"] == COMPANY_GUID
+            assert me["scopes"] == "sync:read"
+            assert me["api_key_guid"] == created["guid"]
+
+            # require_scopes reads the key's scopes: sync:read can't write
+            payload = {"projects": [{"code": "API_KEY_SCOPE_PROJ", "company_guid": COMPANY_GUID}]}
+            async with session.post(f"{BASE_URL}{API_PREFIX}/sync/projects", json=payload, headers={"X-API-Key": created["key"]}) as resp:
+                assert resp.status == 403
+                assert "sync:write" in (await resp.json())["detail"]
+        finally:
+            async with session.delete(f"{BASE_URL}{API_PREFIX}/api-keys/{created['guid']}", headers=headers) as resp:
+                assert resp.status == 204
+
+@pytest.mark.asyncio
+async def test_cached_legacy_api_key_is_refused_once_deactivated():
+    """Test that a bcrypt-stored key authenticates, is cached, and stops working as soon as it is deactivated."""
+    raw_key = f"rfk_{secrets.token_urlsafe(24)}"
+    guid = await insert_legacy_key(raw_key)
+    try:
+        async with aiohttp.ClientSession() as session:
+            token = await get_auth_token(session)
+            headers = {"Authorization": f"Bearer {token}"}
+            for _ in range(2):  # the second request is answered from the cache
+                status, me = await me_with_api_key(session, raw_key)
+                assert status == 200, me
+                assert me["api_key_guid"] == str(guid) and me["auth_type"] == "api_key"
+
+            async with session.put(f"{BASE_URL}{API_PREFIX}/api-keys/{guid}", json={"is_active": False}, headers=headers) as resp:
+                assert resp.status == 200
+                assert (await resp.json())["is_active"] is False
+            status, body = await me_with_api_key(session, raw_key)
+            assert status == 401 and body["detail"] == "Invalid API key"
+    finally:
+        await remove_key_row(guid)
+
+@pytest.mark.asyncio
+async def test_deactivated_and_deleted_api_keys_are_refused_at_once():
+    """Test that a key in use (and so cached) stops working right after it is deactivated or deleted."""
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        deactivated = await create_api_key(session, headers, "sync:read,sync:write")
+        assert (await me_with_api_key(session, deactivated["key"]))[0] == 200
+        async with session.put(f"{BASE_URL}{API_PREFIX}/api-keys/{deactivated['guid']}", json={"is_active": False}, headers=headers) as resp:
+            assert resp.status == 200
+        status, body = await me_with_api_key(session, deactivated["key"])
+        assert status == 401 and body["detail"] == "Invalid API key"
+
+        # Reactivating lifts the rejection as well
+        async with session.put(f"{BASE_URL}{API_PREFIX}/api-keys/{deactivated['guid']}", json={"is_active": True}, headers=headers) as resp:
+            assert resp.status == 200
+        assert (await me_with_api_key(session, deactivated["key"]))[0] == 200
+
+        deleted = await create_api_key(session, headers, "sync:read,sync:write")
+        assert (await me_with_api_key(session, deleted["key"]))[0] == 200
+        for guid in (deleted["guid"], deactivated["guid"]):
+            async with session.delete(f"{BASE_URL}{API_PREFIX}/api-keys/{guid}", headers=headers) as resp:
+                assert resp.status == 204
+        status, body = await me_with_api_key(session, deleted["key"])
+        assert status == 401 and body["detail"] == "Invalid API key"
@@ -6,8 +6,18 @@ This script tests multiple generations of soft-deleted children and other edge c
 
 import pytest
 import aiohttp
+import asyncio
 import os
+import uuid
+import datetime
 from typing import Dict, Any
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.models.component import Component
+from app.models.project import Project
+from app.models.sync_job import SyncJob
 
 # --- Constants ---
 BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
@@ -147,4 +157,478 @@ async def test_sync_reactivation_edge_cases():
         async with session.get(f"{BASE_URL}{API_PREFIX}/projects/{project_guid}", headers=headers) as resp:
             data = await resp.json()
             assert data["is_active"]
-            assert data["code"] == "SYNC_REACT_PROJ_UPDATED" 
\ No newline at end of file
+            assert data["code"] == "SYNC_REACT_PROJ_UPDATED" 
+@pytest.mark.asyncio
+async def test_chunked_sync_session():
+    """Test that a chunked sync session applies all chunks at once, tolerating retried chunks and commits."""
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        # 1. Open a delta session so other projects are left alone
+        async with session.post(f"{BASE_URL}{API_PREFIX}/sync/sessions", json={"entity_type": "projects", "mode": "delta"}, headers=headers) as resp:
+            assert resp.status == 201
+            session_guid = (await resp.json())["guid"]
+        sessions_url = f"{BASE_URL}{API_PREFIX}/sync/sessions/{session_guid}"
+
+        # 2. Upload two chunks, retrying the second one
+        chunk_1 = {"projects": [{"code": "CHUNK_PROJ_1", "company_guid": COMPANY_GUID}]}
+        chunk_2 = {"projects": [{"code": "CHUNK_PROJ_2", "company_guid": COMPANY_GUID}]}
+        async with session.put(f"{sessions_url}/chunks/1", json=chunk_1, headers=headers) as resp:
+            assert resp.status == 200
+        for _ in range(2):
+            async with session.put(f"{sessions_url}/chunks/2", json=chunk_2, headers=headers) as resp:
+                assert resp.status == 200
+                assert (await resp.json())["row_count"] == 1
+
+        # 3. Nothing is written before the commit, and a commit with a missing chunk is refused
+        async with session.get(f"{BASE_URL}{API_PREFIX}/projects", headers=headers) as resp:
+            assert not any(p["code"] == "CHUNK_PROJ_1" for p in await resp.json())
+        async with session.post(f"{sessions_url}/commit", json={"chunk_count": 3}, headers=headers) as resp:
+            assert resp.status == 409
+
+        # 4. Commit, then retry the commit
+        async with session.post(f"{sessions_url}/commit", json={"chunk_count": 2}, headers=headers) as resp:
+            assert resp.status == 200
+            result = await resp.json()
+            assert result["inserted"] == 2
+        async with session.post(f"{sessions_url}/commit", json={"chunk_count": 2}, headers=headers) as resp:
+            assert resp.status == 200
+            assert await resp.json() == result
+
+        await find_guid_by_code(session, headers, "projects", {}, "CHUNK_PROJ_1", "projects")
+        await find_guid_by_code(session, headers, "projects", {}, "CHUNK_PROJ_2", "projects")
+
+async def get_component_picture(component_guid: str) -> bytes:
+    """Read a component's picture straight from the database the API server uses."""
+    async with async_session_factory() as db:
+        return (await db.execute(select(Component.picture).where(Component.guid == component_guid))).scalar_one()
+
+@pytest.mark.asyncio
+async def test_msgpack_binary_pictures_through_sessions_and_jobs():
+    """Test that raw MessagePack bin pictures are staged by sessions and jobs and stored unchanged."""
+    msgpack = pytest.importorskip("msgpack")
+    picture = bytes(range(256))  # not valid UTF-8
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}"}
+        msgpack_headers = {**headers, "Content-Type": "application/msgpack"}
+
+        project_payload = {"projects": [{"code": "MSGPACK_BIN_PROJ", "company_guid": COMPANY_GUID}]}
+        async with session.post(f"{BASE_URL}{API_PREFIX}/sync/projects", json=project_payload, headers=headers) as resp:
+            assert resp.status == 200
+        project_guid = await find_guid_by_code(session, headers, "projects", {}, "MSGPACK_BIN_PROJ", "projects")
+
+        # 1. A session chunk
+        async with session.post(f"{BASE_URL}{API_PREFIX}/sync/sessions", json={"entity_type": "components", "mode": "delta"}, headers=headers) as resp:
+            assert resp.status == 201
+            sessions_url = f"{BASE_URL}{API_PREFIX}/sync/sessions/{(await resp.json())['guid']}"
+        chunk = {"components": [{"code": "MSGPACK_BIN_SESSION", "project_guid": project_guid, "company_guid": COMPANY_GUID, "picture": picture}]}
+        async with session.put(f"{sessions_url}/chunks/1", data=msgpack.packb(chunk), headers=msgpack_headers) as resp:
+            assert resp.status == 200, await resp.text()
+            assert (await resp.json())["row_count"] == 1
+        async with session.post(f"{sessions_url}/commit", json={"chunk_count": 1}, headers=headers) as resp:
+            assert resp.status == 200, await resp.text()
+            assert (await resp.json())["inserted"] == 1
+        session_component = await find_guid_by_code(session, headers, "components", {"project_guid": project_guid}, "MSGPACK_BIN_SESSION", "components")
+        assert await get_component_picture(session_component) == picture
+
+        # 2. A background job
+        job = {"components": [{"code": "MSGPACK_BIN_JOB", "project_guid": project_guid, "company_guid": COMPANY_GUID, "picture": picture}]}
+        async with session.post(f"{BASE_URL}{API_PREFIX}/sync/jobs", data=msgpack.packb(job), headers=msgpack_headers) as resp:
+            assert resp.status == 202, await resp.text()
+            job_guid = (await resp.json())["guid"]
+        for _ in range(60):
+            async with session.get(f"{BASE_URL}{API_PREFIX}/sync/jobs/{job_guid}", headers=headers) as resp:
+                job_status = await resp.json()
+            if job_status["status"] in ("succeeded", "failed"):
+                break
+            await asyncio.sleep(0.5)
+        assert job_status["status"] == "succeeded", job_status
+        assert job_status["result"]["components"]["inserted"] == 1
+        job_component = await find_guid_by_code(session, headers, "components", {"project_guid": project_guid}, "MSGPACK_BIN_JOB", "components")
+        assert await get_component_picture(job_component) == picture
+
+@pytest.mark.asyncio
+async def test_concurrent_retries_with_one_idempotency_key_sync_once():
+    """Test that simultaneous requests with the same Idempotency-Key run the sync once and return the same result."""
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": str(uuid.uuid4())}
+        code = f"IDEMPOTENT_{uuid.uuid4().hex[:8]}"
+        payload = {"projects": [{"code": code, "company_guid": COMPANY_GUID}]}
+        url = f"{BASE_URL}{API_PREFIX}/sync/projects?mode=delta"
+
+        async def post():
+            async with session.post(url, json=payload, headers=headers) as resp:
+                return resp.status, await resp.json()
+
+        responses = await asyncio.gather(*(post() for _ in range(4)))
+        assert all(status == 200 for status, _ in responses), responses
+        results = [result for _, result in responses]
+        assert all(result == results[0] for result in results)
+        assert results[0]["inserted"] == 1
+
+        async with session.get(f"{BASE_URL}{API_PREFIX}/projects", headers={"Authorization": f"Bearer {token}"}) as resp:
+            assert sum(p["code"] == code for p in await resp.json()) == 1
+
+@pytest.mark.asyncio
+async def test_zstd_bomb_and_truncated_zstd_body_are_refused():
+    """Test that a zstd body inflating past the limit gets 413 and a cut-off zstd stream gets 400."""
+    zstandard = pytest.importorskip("zstandard")
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json", "Content-Encoding": "zstd"}
+        url = f"{BASE_URL}{API_PREFIX}/sync/projects?mode=delta"
+
+        # 1. 128 MiB of zeros, a few KiB compressed, without the content size in the frame header
+        compressor = zstandard.ZstdCompressor().compressobj()
+        bomb = compressor.compress(b"\0" * (128 * 1024 * 1024)) + compressor.flush()
+        async with session.post(url, data=bomb, headers=headers) as resp:
+            assert resp.status == 413
+            assert "exceeds" in (await resp.json())["detail"]
+
+        # 2. A valid body with the end of the frame cut off
+        body = zstandard.ZstdCompressor().compress(b'{"projects": [{"code": "ZSTD_TRUNCATED_PROJ"}]}')
+        async with session.post(url, data=body[:-4], headers=headers) as resp:
+            assert resp.status == 400
+            assert (await resp.json())["detail"] == "Malformed or truncated zstd request body"
+
+        # 3. The whole body goes through
+        async with session.post(url, data=body, headers=headers) as resp:
+            assert resp.status == 200, await resp.text()
+
+async def set_project_original_id(project_guid: str, original_id: int) -> None:
+    """Give a project a RaWorkshop ID, as a RaConnect sync would."""
+    async with async_session_factory() as db:
+        await db.execute(update(Project).where(Project.guid == project_guid).values(original_id=original_id))
+        await db.commit()
+
+@pytest.mark.asyncio
+async def test_delta_sync_applies_only_tombstones():
+    """Test that a delta sync upserts the sent rows and soft deletes only the tombstoned ones, with cascade."""
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}"}
+        suffix = uuid.uuid4().hex[:8]
+        url = f"{BASE_URL}{API_PREFIX}/sync/projects"
+
+        # 1. Four projects, one with a component, one with a RaWorkshop ID
+        codes = [f"DELTA_KEEP_{suffix}", f"DELTA_BY_GUID_{suffix}", f"DELTA_BY_ID_{suffix}", f"DELTA_OTHER_{suffix}"]
+        payload = {"projects": [{"code": code, "company_guid": COMPANY_GUID} for code in codes]}
+        async with session.post(f"{url}?mode=delta", json=payload, headers=headers) as resp:
+            assert resp.status == 200, await resp.text()
+            assert (await resp.json())["inserted"] == 4
+        keep_guid, by_guid_guid, by_id_guid, other_guid = [
+            await find_guid_by_code(session, headers, "projects", {}, code, "projects") for code in codes
+        ]
+        original_id = uuid.uuid4().int % 2**31
+        await set_project_original_id(by_id_guid, original_id)
+
+        component_payload = {"components": [{"code": f"DELTA_CHILD_{suffix}", "project_guid": by_guid_guid, "company_guid": COMPANY_GUID}]}
+        async with session.post(f"{BASE_URL}{API_PREFIX}/sync/components?mode=delta", json=component_payload, headers=headers) as resp:
+            assert resp.status == 200
+        component_guid = await find_guid_by_code(session, headers, "components", {"project_guid": by_guid_guid}, f"DELTA_CHILD_{suffix}", "components")
+
+        # 2. Tombstones are refused in full mode
+        tombstones = {"deleted_guids": [by_guid_guid], "deleted_original_ids": [original_id]}
+        async with session.post(url, json={"projects": [], **tombstones}, headers=headers) as resp:
+            assert resp.status == 400
+            assert (await resp.json())["detail"] == "deleted_guids and deleted_original_ids are only accepted in delta mode"
+
+        # 3. Update one project and tombstone the others, by GUID and by RaWorkshop ID
+        payload = {"projects": [{"guid": keep_guid, "code": f"DELTA_KEPT_{suffix}", "company_guid": COMPANY_GUID}], **tombstones}
+        async with session.post(f"{url}?mode=delta", json=payload, headers=headers) as resp:
+            assert resp.status == 200, await resp.text()
+            result = await resp.json()
+        assert (result["inserted"], result["updated"], result["deleted"]) == (0, 1, 2)
+
+        async with session.get(f"{BASE_URL}{API_PREFIX}/projects/{keep_guid}", headers=headers) as resp:
+            data = await resp.json()
+            assert data["is_active"] and data["code"] == f"DELTA_KEPT_{suffix}"
+        for guid in (by_guid_guid, by_id_guid):
+            async with session.get(f"{BASE_URL}{API_PREFIX}/projects/{guid}?include_inactive=true", headers=headers) as resp:
+                assert not (await resp.json())["is_active"]
+        async with session.get(f"{BASE_URL}{API_PREFIX}/components/{component_guid}?include_inactive=true", headers=headers) as resp:
+            assert not (await resp.json())["is_active"], "The tombstone should cascade to the component"
+
+        # 4. A project neither sent nor tombstoned is left alone
+        async with session.get(f"{BASE_URL}{API_PREFIX}/projects/{other_guid}", headers=headers) as resp:
+            assert (await resp.json())["is_active"]
+
+        # 5. A GUID both sent and tombstoned is refused
+        payload = {"projects": [{"guid": keep_guid, "code": f"DELTA_KEPT_{suffix}", "company_guid": COMPANY_GUID}], "deleted_guids": [keep_guid]}
+        async with session.post(f"{url}?mode=delta", json=payload, headers=headers) as resp:
+            assert resp.status == 400
+            assert keep_guid in (await resp.json())["detail"]
+
+@pytest.mark.asyncio
+async def test_dry_run_reports_the_diff_without_writing():
+    """Test that a dry run returns the counts and sample GUIDs of a sync and leaves the data untouched."""
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}"}
+        suffix = uuid.uuid4().hex[:8]
+        url = f"{BASE_URL}{API_PREFIX}/sync/projects?mode=delta"
+
+        # 1. One project to update, one to reactivate and one to tombstone
+        codes = [f"DRY_UPDATE_{suffix}", f"DRY_REACTIVATE_{suffix}", f"DRY_DELETE_{suffix}"]
+        payload = {"projects": [{"code": code, "company_guid": COMPANY_GUID} for code in codes]}
+        async with session.post(url, json=payload, headers=headers) as resp:
+            assert resp.status == 200, await resp.text()
+        update_guid, reactivate_guid, delete_guid = [
+            await find_guid_by_code(session, headers, "projects", {}, code, "projects") for code in codes
+        ]
+        async with session.delete(f"{BASE_URL}{API_PREFIX}/projects/{reactivate_guid}", headers=headers) as resp:
+            assert resp.status in (200, 204)
+
+        # 2. Dry run a sync touching all of them plus a new project
+        insert_guid = str(uuid.uuid4())
+        payload = {
+            "projects": [
+                {"guid": insert_guid, "code": f"DRY_INSERT_{suffix}", "company_guid": COMPANY_GUID},
+                {"guid": update_guid, "code": f"DRY_UPDATED_{suffix}", "company_guid": COMPANY_GUID},
+                {"guid": reactivate_guid, "code": codes[1], "company_guid": COMPANY_GUID},
+            ],
+            "deleted_guids": [delete_guid],
+        }
+        async with session.post(f"{url}&dry_run=true", json=payload, headers=headers) as resp:
+            assert resp.status == 200, await resp.text()
+            result = await resp.json()
+        assert (result["inserted"], result["updated"], result["reactivated"], result["deleted"]) == (1, 2, 1, 1)
+        assert result["samples"]["inserted"] == [insert_guid]
+        assert sorted(result["samples"]["updated"]) == sorted([update_guid, reactivate_guid])
+        assert result["samples"]["reactivated"] == [reactivate_guid]
+        assert result["samples"]["deleted"] == [delete_guid]
+
+        # 3. Nothing was written
+        async with session.get(f"{BASE_URL}{API_PREFIX}/projects/{insert_guid}?include_inactive=true", headers=headers) as resp:
+            assert resp.status == 404
+        async with session.get(f"{BASE_URL}{API_PREFIX}/projects/{update_guid}", headers=headers) as resp:
+            assert (await resp.json())["code"] == codes[0]
+        async with session.get(f"{BASE_URL}{API_PREFIX}/projects/{reactivate_guid}?include_inactive=true", headers=headers) as resp:
+            assert not (await resp.json())["is_active"]
+        async with session.get(f"{BASE_URL}{API_PREFIX}/projects/{delete_guid}", headers=headers) as resp:
+            assert (await resp.json())["is_active"]
+
+        # 4. The real sync does what the dry run reported
+        async with session.post(url, json=payload, headers=headers) as resp:
+            assert resp.status == 200
+            real = await resp.json()
+        assert {key: real[key] for key in ("inserted", "updated", "reactivated", "deleted")} == \
+            {key: result[key] for key in ("inserted", "updated", "reactivated", "deleted")}
+        assert real["samples"] is None
+
+@pytest.mark.asyncio
+async def test_sync_session_chunk_company_guid_is_checked():
+    """Test that a chunk naming the caller's own company is accepted and one naming another company is refused."""
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}"}
+        code = f"CHUNK_OWN_COMPANY_{uuid.uuid4().hex[:8]}"
+
+        async with session.post(f"{BASE_URL}{API_PREFIX}/sync/sessions", json={"entity_type": "projects", "mode": "delta"}, headers=headers) as resp:
+            assert resp.status == 201
+            sessions_url = f"{BASE_URL}{API_PREFIX}/sync/sessions/{(await resp.json())['guid']}"
+
+        foreign = {"projects": [{"code": code, "company_guid": str(uuid.uuid4())}]}
+        async with session.put(f"{sessions_url}/chunks/1", json=foreign, headers=headers) as resp:
+            assert resp.status == 403
+            assert (await resp.json())["detail"] == "Item at index 0 has company_guid that doesn't match the authenticated user's company"
+
+        own = {"projects": [{"code": code, "company_guid": COMPANY_GUID}]}
+        async with session.put(f"{sessions_url}/chunks/1", json=own, headers=headers) as resp:
+            assert resp.status == 200, await resp.text()
+            assert (await resp.json())["row_count"] == 1
+        async with session.post(f"{sessions_url}/commit", json={"chunk_count": 1}, headers=headers) as resp:
+            assert resp.status == 200, await resp.text()
+            assert (await resp.json())["inserted"] == 1
+        await find_guid_by_code(session, headers, "projects", {}, code, "projects")
+
+@pytest.mark.asyncio
+async def test_resent_row_without_guid_is_matched_on_original_id():
+    """Test that a row sent again with its RaWorkshop ID but no GUID updates the existing row."""
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}"}
+        suffix = uuid.uuid4().hex[:8]
+        original_id = uuid.uuid4().int % 2**31
+        url = f"{BASE_URL}{API_PREFIX}/sync/projects?mode=delta"
+
+        payload = {"projects": [{"original_id": original_id, "code": f"NATURAL_KEY_{suffix}", "company_guid": COMPANY_GUID}]}
+        async with session.post(url, json=payload, headers=headers) as resp:
+            assert resp.status == 200, await resp.text()
+            assert (await resp.json())["inserted"] == 1
+        guid = await find_guid_by_code(session, headers, "projects", {}, f"NATURAL_KEY_{suffix}", "projects")
+
+        payload = {"projects": [{"original_id": original_id, "code": f"NATURAL_KEY_RESENT_{suffix}", "company_guid": COMPANY_GUID}]}
+        async with session.post(url, json=payload, headers=headers) as resp:
+            assert resp.status == 200, await resp.text()
+            result = await resp.json()
+        assert (result["inserted"], result["updated"]) == (0, 1)
+
+        async with session.get(f"{BASE_URL}{API_PREFIX}/projects", headers=headers) as resp:
+            projects = [p for p in await resp.json() if p["code"].startswith("NATURAL_KEY_") and p["code"].endswith(suffix)]
+        assert [(p["guid"], p["code"]) for p in projects] == [(guid, f"NATURAL_KEY_RESENT_{suffix}")]
+
+        # A GUID other than the one holding the RaWorkshop ID is refused
+        payload = {"projects": [{"guid": str(uuid.uuid4()), "original_id": original_id, "code": f"NATURAL_KEY_{suffix}", "company_guid": COMPANY_GUID}]}
+        async with session.post(url, json=payload, headers=headers) as resp:
+            assert resp.status == 409
+            assert guid in (await resp.json())["detail"]
+
+@pytest.mark.asyncio
+async def test_delta_sync_with_unknown_tombstone_writes_nothing():
+    """Test that a tombstone naming no row of the company is refused before the sent rows are written."""
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}"}
+        code = f"DELTA_UNKNOWN_TOMBSTONE_{uuid.uuid4().hex[:8]}"
+        unknown_guid = str(uuid.uuid4())
+
+        payload = {"projects": [{"code": code, "company_guid": COMPANY_GUID}], "deleted_guids": [unknown_guid]}
+        async with session.post(f"{BASE_URL}{API_PREFIX}/sync/projects?mode=delta", json=payload, headers=headers) as resp:
+            assert resp.status == 400
+            assert (await resp.json())["detail"] == f"deleted_guids names project {unknown_guid} that doesn't exist or doesn't belong to your company"
+
+        async with session.get(f"{BASE_URL}{API_PREFIX}/projects", headers=headers) as resp:
+            assert not any(p["code"] == code for p in await resp.json())
+
+async def insert_abandoned_job(payload: Dict[str, Any], stage: str) -> uuid.UUID:
+    """Store a job as a worker that died mid-run leaves it: running, heartbeat long gone, a stage done."""
+    long_ago = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=2 * settings.SYNC_JOB_STALE_SECONDS)
+    guid = uuid.uuid4()
+    async with async_session_factory() as db:
+        db.add(SyncJob(
+            guid=guid, company_guid=uuid.UUID(COMPANY_GUID), status="running", payload=payload,
+            progress={"stages": [stage], "completed": {stage: {"inserted": 99, "updated": 0}}},
+            started_at=long_ago, heartbeat_at=long_ago
+        ))
+        await db.commit()
+    return guid
+
+@pytest.mark.asyncio
+async def test_abandoned_sync_job_is_requeued_and_run():
+    """Test that a job left running without a heartbeat is picked up by the periodic sweep and run again."""
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}"}
+        suffix = uuid.uuid4().hex[:8]
+
+        # Jobs are full syncs, so the job only carries articles, under a project and component of its own
+        async with session.post(f"{BASE_URL}{API_PREFIX}/sync/projects?mode=delta", json={"projects": [{"code": f"ABANDONED_JOB_{suffix}", "company_guid": COMPANY_GUID}]}, headers=headers) as resp:
+            assert resp.status == 200
+        project_guid = await find_guid_by_code(session, headers, "projects", {}, f"ABANDONED_JOB_{suffix}", "projects")
+        component_payload = {"components": [{"code": f"ABANDONED_JOB_{suffix}", "project_guid": project_guid, "company_guid": COMPANY_GUID}]}
+        async with session.post(f"{BASE_URL}{API_PREFIX}/sync/components?mode=delta", json=component_payload, headers=headers) as resp:
+            assert resp.status == 200
+        component_guid = await find_guid_by_code(session, headers, "components", {"project_guid": project_guid}, f"ABANDONED_JOB_{suffix}", "components")
+
+        article = {"code": f"ABANDONED_JOB_{suffix}", "project_guid": project_guid, "component_guid": component_guid, "company_guid": COMPANY_GUID}
+        job_guid = await insert_abandoned_job({"articles": [article]}, "articles")
+
+        # One sweep interval, plus time to run the job
+        deadline = asyncio.get_running_loop().time() + settings.SYNC_JOB_HEARTBEAT_SECONDS + 30
+        while True:
+            async with session.get(f"{BASE_URL}{API_PREFIX}/sync/jobs/{job_guid}", headers=headers) as resp:
+                assert resp.status == 200
+                job_status = await resp.json()
+            if job_status["status"] in ("succeeded", "failed") or asyncio.get_running_loop().time() > deadline:
+                break
+            await asyncio.sleep(1)
+
+        assert job_status["status"] == "succeeded", job_status
+        assert job_status["result"]["articles"]["inserted"] == 1
+        # The stage done before the worker died was run again, not taken from the old progress
+        assert job_status["progress"]["completed"]["articles"]["inserted"] == 1
+        await find_guid_by_code(session, headers, "articles", {"limit": 1000}, f"ABANDONED_JOB_{suffix}", "articles")
+
+@pytest.mark.asyncio
+async def test_piece_sync_and_component_cascade_run_concurrently_without_deadlock():
+    """Test that a two-pass piece sync racing a component delete that cascades over the same pieces both succeed."""
+    allowed = {200, 204} | ({409} if settings.SYNC_LOCK_POLICY == "fail" else set())
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        for round_number in range(3):
+            suffix = f"{uuid.uuid4().hex[:8]}_{round_number}"
+            async with session.post(f"{BASE_URL}{API_PREFIX}/sync/projects?mode=delta", json={"projects": [{"code": f"RACE_{suffix}", "company_guid": COMPANY_GUID}]}, headers=headers) as resp:
+                assert resp.status == 200
+            project_guid = await find_guid_by_code(session, headers, "projects", {}, f"RACE_{suffix}", "projects")
+            component_payload = {"components": [{"code": f"RACE_{suffix}", "project_guid": project_guid, "company_guid": COMPANY_GUID}]}
+            async with session.post(f"{BASE_URL}{API_PREFIX}/sync/components?mode=delta", json=component_payload, headers=headers) as resp:
+                assert resp.status == 200
+            component_guid = await find_guid_by_code(session, headers, "components", {"project_guid": project_guid}, f"RACE_{suffix}", "components")
+
+            pieces = [
+                {"guid": str(uuid.uuid4()), "piece_id": f"RACE_{suffix}_{i}", "project_guid": project_guid, "component_guid": component_guid, "company_guid": COMPANY_GUID}
+                for i in range(200)
+            ]
+            async with session.post(f"{BASE_URL}{API_PREFIX}/sync/pieces?mode=delta", json={"pieces": pieces}, headers=headers) as resp:
+                assert resp.status == 200, await resp.text()
+
+            # The sync upserts pieces, then soft deletes one; the delete cascades over all of them at once
+            changed = [{**piece, "barcode": f"B{i}"} for i, piece in enumerate(pieces[:-1])]
+            piece_sync = {"pieces": changed, "deleted_guids": [pieces[-1]["guid"]]}
+
+            async def sync_pieces():
+                async with session.post(f"{BASE_URL}{API_PREFIX}/sync/pieces?mode=delta", json=piece_sync, headers=headers) as resp:
+                    return resp.status, await resp.text()
+
+            async def delete_component():
+                async with session.delete(f"{BASE_URL}{API_PREFIX}/components/{component_guid}", headers=headers) as resp:
+                    return resp.status, await resp.text()
+
+            results = await asyncio.gather(sync_pieces(), delete_component())
+            assert all(status in allowed for status, _ in results), results
+
+            async with session.get(f"{BASE_URL}{API_PREFIX}/components/{component_guid}?include_inactive=true", headers=headers) as resp:
+                assert not (await resp.json())["is_active"] or results[1][0] == 409
+
+@pytest.mark.asyncio
+async def test_sync_counts_inserts_updates_and_unchanged_rows():
+    """Test the upsert counts: a batch sent twice is inserted, then left unchanged, and one edited row is updated."""
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}"}
+        suffix = uuid.uuid4().hex[:8]
+        url = f"{BASE_URL}{API_PREFIX}/sync/projects?mode=delta"
+        n = 5
+        projects = [{"guid": str(uuid.uuid4()), "code": f"COUNTS_{suffix}_{i}", "company_guid": COMPANY_GUID} for i in range(n)]
+
+        async def sync(batch):
+            async with session.post(url, json={"projects": batch}, headers=headers) as resp:
+                assert resp.status == 200, await resp.text()
+                result = await resp.json()
+            return result["inserted"], result["updated"], result["unchanged"]
+
+        assert await sync(projects) == (n, 0, 0)
+        assert await sync(projects) == (0, 0, n)
+
+        projects[2] = {**projects[2], "code": f"COUNTS_{suffix}_2_EDITED"}
+        assert await sync(projects) == (0, 1, n - 1)
+        async with session.get(f"{BASE_URL}{API_PREFIX}/projects/{projects[2]['guid']}", headers=headers) as resp:
+            assert (await resp.json())["code"] == f"COUNTS_{suffix}_2_EDITED"
+
+@pytest.mark.asyncio
+async def test_unchanged_fingerprint_still_reactivates_soft_deleted_rows():
+    """Test that a soft-deleted row resent with identical content is reactivated rather than counted as unchanged."""
+    async with aiohttp.ClientSession() as session:
+        token = await get_auth_token(session)
+        headers = {"Authorization": f"Bearer {token}"}
+        suffix = uuid.uuid4().hex[:8]
+        url = f"{BASE_URL}{API_PREFIX}/sync/projects?mode=delta"
+        projects = [{"guid": str(uuid.uuid4()), "code": f"FINGERPRINT_{suffix}_{i}", "company_guid": COMPANY_GUID} for i in range(3)]
+
+        async with session.post(url, json={"projects": projects}, headers=headers) as resp:
+            assert resp.status == 200
+        async with session.delete(f"{BASE_URL}{API_PREFIX}/projects/{projects[0]['guid']}", headers=headers) as resp:
+            assert resp.status in (200, 204)
+
+        async with session.post(url, json={"projects": projects}, headers=headers) as resp:
+            assert resp.status == 200, await resp.text()
+            result = await resp.json()
+        assert (result["inserted"], result["updated"], result["reactivated"], result["unchanged"]) == (0, 1, 1, 2)
+        async with session.get(f"{BASE_URL}{API_PREFIX}/projects/{projects[0]['guid']}", headers=headers) as resp:
+            assert (await resp.json())["is_active"]
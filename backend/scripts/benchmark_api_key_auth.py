@@ -0,0 +1,75 @@
+"""
+Measure the per-request cost of X-API-Key authentication as get_current_user does it:
+ApiKeyService.validate_api_key, then setting the tenant for RLS.
+
+"uncached" looks the key up by its indexed prefix on every round, "cached" answers from
+api_key_cache after the first round. Nothing is written except the tenant setting of the
+benchmark session; last_used_at updates are only noted in memory and never flushed.
+
+Usage:
+    python scripts/benchmark_api_key_auth.py --api-key <key> [--rounds 500]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.database import async_session_factory, engine
+from app.core.deps import set_tenant_for_session
+from app.services.api_key_cache import api_key_cache
+from app.services.api_key_service import ApiKeyService
+
+
+async def authenticate(api_key, session):
+    """The API-key branch of get_current_user."""
+    key_info = await ApiKeyService.validate_api_key(api_key, session)
+    if key_info is None:
+        raise SystemExit("API key was rejected")
+    await set_tenant_for_session(session, str(key_info["company_guid"]))
+
+
+async def time_rounds(api_key, rounds, cached):
+    timings = []
+    async with async_session_factory() as session:
+        await authenticate(api_key, session)  # warm up the connection
+        for _ in range(rounds):
+            if not cached:
+                api_key_cache.clear()
+            start = time.perf_counter()
+            await authenticate(api_key, session)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def main(args):
+    await api_key_cache.start()
+    if not api_key_cache.enabled:
+        print("Warning: invalidation listener not connected, the cache is bypassed")
+    try:
+        print(f"Authenticating one API key, {args.rounds} rounds per mode")
+        for name, cached in (("uncached", False), ("cached", True)):
+            timings = await time_rounds(args.api_key, args.rounds, cached)
+            timings.sort()
+            print(
+                f"  {name:>8}: median {statistics.median(timings) * 1000:6.3f} ms, "
+                f"p99 {timings[int(len(timings) * 0.99) - 1] * 1000:6.3f} ms"
+            )
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            ApiKeyService.hash_api_key(args.api_key)
+        print(f"  {'digest':>8}: {(time.perf_counter() - start) * 1e6 / args.rounds:6.1f} us per key")
+    finally:
+        await api_key_cache.stop()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API key authentication")
+    parser.add_argument("--api-key", required=True, help="An active API key")
+    parser.add_argument("--rounds", type=int, default=500, help="Authentications per mode")
+    asyncio.run(main(parser.parse_args()))
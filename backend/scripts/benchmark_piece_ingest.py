@@ -0,0 +1,90 @@
+"""
+Compare the two piece sync write paths: multi-row VALUES upsert vs COPY into a staging table.
+
+Every round runs inside a transaction that is rolled back, so the database is left untouched.
+Needs an existing company, project and component to attach the generated pieces to.
+
+Usage:
+    python scripts/benchmark_piece_ingest.py --company <guid> --project <guid> --component <guid> [--rows 1000] [--rounds 5]
+"""
+import os
+import sys
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+
+from sqlalchemy import text
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.database import async_session_factory, engine
+from app.models.piece import Piece
+from app.schemas.sync.main import PieceCreate
+from app.repositories.sync import bulk_upsert_by_guid, copy_upsert_by_guid
+
+WRITE_PATHS = {
+    "values": bulk_upsert_by_guid,
+    "copy": copy_upsert_by_guid,
+}
+
+
+def make_rows(count, company_guid, project_guid, component_guid):
+    """Build fully populated piece rows the way SyncService does."""
+    rows = []
+    for i in range(count):
+        piece = PieceCreate(
+            piece_id=f"BENCH-{i}",
+            project_guid=project_guid,
+            component_guid=component_guid,
+            barcode=f"BENCH{i:08d}",
+            outer_length=1000 + i % 500,
+            angle_left=45,
+            angle_right=90,
+            profile_code="PRF-70",
+            profile_color="RAL9016",
+        )
+        row = piece.dict()
+        row["company_guid"] = company_guid
+        rows.append(row)
+    return rows
+
+
+async def time_path(name, rows, rounds):
+    """Time an insert pass followed by an update pass of the same rows."""
+    upsert = WRITE_PATHS[name]
+    timings = {"insert": [], "update": []}
+    for _ in range(rounds):
+        async with async_session_factory() as session:
+            await session.execute(text(f"SET rls.tenant_id = '{rows[0]['company_guid']}'"))
+            for phase in ("insert", "update"):
+                start = time.perf_counter()
+                await upsert(session, rows, Piece)
+                timings[phase].append(time.perf_counter() - start)
+            await session.rollback()
+    return timings
+
+
+async def main(args):
+    company_guid = uuid.UUID(args.company)
+    rows = make_rows(args.rows, company_guid, uuid.UUID(args.project), uuid.UUID(args.component))
+    print(f"Upserting {args.rows} pieces, {args.rounds} rounds per path (median seconds)")
+    for name in WRITE_PATHS:
+        timings = await time_path(name, rows, args.rounds)
+        print(
+            f"  {name:>6}: insert {statistics.median(timings['insert']):.3f}s, "
+            f"update {statistics.median(timings['update']):.3f}s"
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark piece sync write paths")
+    parser.add_argument("--company", required=True, help="Company GUID owning the project")
+    parser.add_argument("--project", required=True, help="Project GUID to attach pieces to")
+    parser.add_argument("--component", required=True, help="Component GUID to attach pieces to")
+    parser.add_argument("--rows", type=int, default=1000, help="Pieces per batch")
+    parser.add_argument("--rounds", type=int, default=5, help="Rounds per write path")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,138 @@
+"""
+Compare decoding a piece sync body from JSON and from MessagePack into PieceBulkInsert,
+and the cost of turning the validated pieces into sync rows.
+
+Measures what the sync route does before touching the database: parse the request body
+and validate it into the schema. Pictures are base64 strings in JSON and raw bytes in
+MessagePack, the way clients send them. No database is needed.
+
+Usage:
+    python scripts/benchmark_sync_formats.py [--rows 1000] [--rounds 20] [--picture-bytes 4096]
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import base64
+import argparse
+import tracemalloc
+import datetime
+import statistics
+
+import msgpack
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pydantic import TypeAdapter
+
+from app.schemas.sync.main import PieceBulkInsert
+
+BODY_ADAPTER = TypeAdapter(PieceBulkInsert)
+
+
+def make_pieces(count, picture_bytes):
+    """Build realistic piece payloads with every commonly filled field set."""
+    project_guid, component_guid = str(uuid.uuid4()), str(uuid.uuid4())
+    picture = os.urandom(picture_bytes) if picture_bytes else None
+    deleted_at = datetime.datetime.now(datetime.timezone.utc)
+    pieces = []
+    for i in range(count):
+        pieces.append({
+            "guid": str(uuid.uuid4()),
+            "piece_id": f"BENCH-{i}",
+            "project_guid": project_guid,
+            "component_guid": component_guid,
+            "barcode": f"BENCH{i:08d}",
+            "outer_length": 1000 + i % 500,
+            "inner_length": 940 + i % 500,
+            "angle_left": 45,
+            "angle_right": 90,
+            "orientation": "H",
+            "trolley": f"T{i % 20}",
+            "cell": str(i % 40),
+            "profile_code": "PRF-70",
+            "profile_name": "Frame 70mm",
+            "profile_color": "RAL9016",
+            "profile_width": 70,
+            "profile_height": 82,
+            "reinforcement_code": "RF-30",
+            "reinforcement_length": 900,
+            "client": "Benchmark Client",
+            "project_description": "Benchmark project",
+            "picture": picture,
+            "deleted_at": deleted_at if i % 50 == 0 else None,
+        })
+    return pieces
+
+
+def encode_json(pieces):
+    def default(value):
+        if isinstance(value, bytes):
+            return base64.b64encode(value).decode()
+        if isinstance(value, datetime.datetime):
+            return value.isoformat()
+        raise TypeError(value)
+    return json.dumps({"pieces": pieces}, default=default).encode()
+
+
+def encode_msgpack(pieces):
+    return msgpack.packb({"pieces": pieces}, datetime=True)
+
+
+DECODERS = {
+    # A declared body parameter: json.loads, then validate the dict
+    "json": lambda body: PieceBulkInsert.model_validate(json.loads(body)),
+    # validated_body: validate the raw bytes in one pass
+    "json-raw": lambda body: BODY_ADAPTER.validate_json(body),
+    # validated_body for application/msgpack
+    "msgpack": lambda body: BODY_ADAPTER.validate_python(msgpack.unpackb(body, raw=False, timestamp=3)),
+}
+
+ROW_BUILDERS = {
+    # Before: a serialized dict per row
+    "model_dump": lambda pieces: [piece.model_dump() for piece in pieces],
+    # SyncService._upsert_rows: shallow copy of the validated values
+    "shallow": lambda pieces: [vars(piece).copy() for piece in pieces],
+}
+
+
+def time_call(func, arg, rounds):
+    """Median seconds and peak traced KiB of func(arg)."""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak / 1024
+
+
+def main(args):
+    pieces = make_pieces(args.rows, args.picture_bytes)
+    bodies = {"json": encode_json(pieces), "msgpack": encode_msgpack(pieces)}
+    print(f"Decoding {args.rows} pieces, {args.rounds} rounds per format (median, peak allocation)")
+    for name, decode in DECODERS.items():
+        body = bodies[name.split("-")[0]]
+        median, peak = time_call(decode, body, args.rounds)
+        print(
+            f"  {name:>10}: {len(body) / 1024:8.1f} KiB body, {median * 1000:7.2f} ms, "
+            f"{args.rows / median:9.0f} rows/s, {peak:8.1f} KiB peak"
+        )
+    validated = BODY_ADAPTER.validate_json(bodies["json"]).pieces
+    print(f"Building sync rows from {args.rows} validated pieces")
+    for name, build in ROW_BUILDERS.items():
+        median, peak = time_call(build, validated, args.rounds)
+        print(f"  {name:>10}: {median * 1000:7.2f} ms, {peak:8.1f} KiB peak")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sync body decoding and row building")
+    parser.add_argument("--rows", type=int, default=1000, help="Pieces per body")
+    parser.add_argument("--rounds", type=int, default=20, help="Rounds per format")
+    parser.add_argument("--picture-bytes", type=int, default=4096, help="Picture size per piece, 0 for none")
+    main(parser.parse_args())
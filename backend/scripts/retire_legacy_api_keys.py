@@ -0,0 +1,61 @@
+"""
+Deactivate API keys that are still stored as bcrypt hashes and haven't been used recently.
+
+A bcrypt key is moved to the keyed digest scheme the first time it is presented, since
+the raw key is needed to compute the digest. Keys that are never presented again can't
+be migrated, and while any are active every unknown key is bcrypt-checked against them.
+Run this once the grace period after deploying key prefixes is over; holders of retired
+keys need a new one. Workers drop the retired keys from their caches at once.
+
+Usage:
+    python scripts/retire_legacy_api_keys.py [--unused-days 30] [--dry-run]
+"""
+import os
+import sys
+import asyncio
+import argparse
+import datetime
+
+from sqlalchemy import update, func
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.database import async_session_factory, engine
+from app.models.apikey import ApiKey
+from app.services.api_key_cache import ApiKeyCache
+
+
+async def main(args):
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=args.unused_days)
+    try:
+        async with async_session_factory() as session:
+            result = await session.execute(
+                update(ApiKey)
+                .where(
+                    ApiKey.key_prefix.is_(None),
+                    ApiKey.is_active == True,
+                    func.coalesce(ApiKey.last_used_at, ApiKey.created_at) < cutoff
+                )
+                .values(is_active=False)
+                .returning(ApiKey.guid, ApiKey.company_guid, ApiKey.description)
+            )
+            retired = result.all()
+            for guid, company_guid, description in retired:
+                print(f"  {guid} company {company_guid}: {description or '(no description)'}")
+                await ApiKeyCache.notify_invalidation(session, guid)
+            if args.dry_run:
+                await session.rollback()
+                print(f"Would retire {len(retired)} legacy API keys unused since {cutoff:%Y-%m-%d}")
+            else:
+                await session.commit()
+                print(f"Retired {len(retired)} legacy API keys unused since {cutoff:%Y-%m-%d}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deactivate legacy bcrypt API keys that were never migrated")
+    parser.add_argument("--unused-days", type=int, default=30, help="Retire keys not used for this many days")
+    parser.add_argument("--dry-run", action="store_true", help="List the keys without deactivating them")
+    asyncio.run(main(parser.parse_args()))